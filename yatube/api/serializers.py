@@ -1,24 +1,68 @@
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework.relations import SlugRelatedField
 from rest_framework.serializers import (
-    CurrentUserDefault, ModelSerializer, ValidationError
+    CurrentUserDefault, IntegerField, ModelSerializer, ReadOnlyField,
+    SerializerMethodField, UUIDField, ValidationError
 )
-from rest_framework.validators import UniqueTogetherValidator
 
-from posts.models import Comment, Follow, Group, Post
+from posts.follow_cache import is_following
+from posts.group_stats import current_activity
+from posts.identity import get_user_by_username
+from posts.models import (
+    Comment, Follow, FollowSuggestion, Group, GroupStats, Post, UploadSession
+)
+from posts.uploads import claim_upload, get_completed_upload
 
 User = get_user_model()
 
 
 class PostSerializer(ModelSerializer):
     author = SlugRelatedField(read_only=True, slug_field='username')
+    upload_token = UUIDField(write_only=True, required=False)
 
     class Meta:
         fields = '__all__'
         model = Post
 
+    def validate_upload_token(self, value):
+        try:
+            get_completed_upload(value, self.context['request'].user)
+        except DjangoValidationError as error:
+            raise ValidationError(error.messages)
+        return value
+
+    def save(self, **kwargs):
+        token = self.validated_data.pop('upload_token', None)
+        if token is None:
+            return super().save(**kwargs)
+        with claim_upload(token, self.context['request'].user) as name:
+            return super().save(image=name, **kwargs)
+
+
+class UploadSerializer(ModelSerializer):
+    size = IntegerField(min_value=1)
+    offset = ReadOnlyField(source='received')
+    complete = ReadOnlyField()
+
+    class Meta:
+        model = UploadSession
+        fields = ('token', 'filename', 'size', 'offset', 'complete')
+
+
+class GroupStatsSerializer(ModelSerializer):
+    activity = SerializerMethodField()
+
+    class Meta:
+        model = GroupStats
+        fields = ('posts_count', 'last_post', 'activity')
+
+    def get_activity(self, obj):
+        return current_activity(obj)
+
 
 class GroupSerializer(ModelSerializer):
+    stats = GroupStatsSerializer(read_only=True, allow_null=True)
 
     class Meta:
         model = Group
@@ -34,29 +78,46 @@ class CommentSerializer(ModelSerializer):
         model = Comment
 
 
+class CachedUsernameField(SlugRelatedField):
+    """Пользователь по username через кэш posts.identity."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('queryset', User.objects.all())
+        super().__init__(slug_field='username', **kwargs)
+
+    def to_internal_value(self, data):
+        user = get_user_by_username(data) if isinstance(data, str) else None
+        if user is None:
+            self.fail('does_not_exist', slug_name='username', value=data)
+        return user
+
+
 class FollowSerializer(ModelSerializer):
     user = SlugRelatedField(
         default=CurrentUserDefault(),
         read_only=True,
         slug_field='username'
     )
-    following = SlugRelatedField(
-        queryset=User.objects.all(), slug_field='username'
-    )
+    following = CachedUsernameField(source='author')
 
     class Meta:
         model = Follow
-        fields = '__all__'
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Follow.objects.all(),
-                fields=('user', 'following')
-            )
-        ]
+        fields = ('id', 'user', 'following')
 
     def validate_following(self, value):
         user = self.context['request'].user
         if value == user:
             raise ValidationError(
                 'Нельзя подписываться на самого себя!')
-        return super().validate(value)
+        # Проверка уникальности по кэшу подписок вместо запроса к БД.
+        if is_following(user.id, value.id):
+            raise ValidationError('Вы уже подписаны на этого автора.')
+        return value
+
+
+class FollowSuggestionSerializer(ModelSerializer):
+    author = SlugRelatedField(read_only=True, slug_field='username')
+
+    class Meta:
+        model = FollowSuggestion
+        fields = ('author', 'score')
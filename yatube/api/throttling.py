@@ -0,0 +1,64 @@
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from core.ratelimit import get_bucket, get_ident
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Ограничение частоты запросов к API по корзине токенов."""
+
+    scope = None
+    key = 'user_or_ip'
+
+    def get_scope(self, request, view):
+        return self.scope
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        if scope is None:
+            return True
+        allowed, self._wait = get_bucket(scope).consume(
+            get_ident(request, self.key)
+        )
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class AnonTokenBucketThrottle(TokenBucketThrottle):
+    scope = 'api_anon'
+    key = 'ip'
+
+    def get_scope(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.scope
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    scope = 'api_user'
+    key = 'user'
+
+    def get_scope(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return self.scope
+        return None
+
+
+class ScopedTokenBucketThrottle(TokenBucketThrottle):
+    """Лимит на конкретный viewset: берёт scope из view.throttle_scope.
+
+    Для небезопасных методов используется отдельный scope с суффиксом
+    '_write', если он задан в RATELIMIT_RATES.
+    """
+
+    def get_scope(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope is None:
+            return None
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            write_scope = f'{scope}_write'
+            if write_scope in settings.RATELIMIT_RATES:
+                return write_scope
+        return scope
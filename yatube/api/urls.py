@@ -1,7 +1,9 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from api.views import CommentViewSet, FollowViewSet, GroupViewSet, PostViewSet
+from api.views import (
+    CommentViewSet, FollowViewSet, GroupViewSet, PostViewSet, UploadViewSet
+)
 
 app_name = 'api'
 
@@ -13,6 +15,7 @@ v1_router.register(
     viewset=CommentViewSet, basename='comments'
 )
 v1_router.register('follow', FollowViewSet, basename='follow')
+v1_router.register('uploads', UploadViewSet, basename='uploads')
 
 v1_urlpatterns = [
     path('', include('djoser.urls.jwt')),
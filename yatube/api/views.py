@@ -1,17 +1,31 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
-from rest_framework.mixins import CreateModelMixin, ListModelMixin
+from rest_framework.mixins import (
+    CreateModelMixin, ListModelMixin, RetrieveModelMixin
+)
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.viewsets import (
     GenericViewSet, ModelViewSet, ReadOnlyModelViewSet
 )
 
 from api.permissions import AuthorOrReadOnly
 from api.serializers import (
-    CommentSerializer, FollowSerializer, GroupSerializer, PostSerializer
+    CommentSerializer, FollowSerializer, FollowSuggestionSerializer,
+    GroupSerializer, PostSerializer, UploadSerializer
 )
 from posts.models import Group, Post
+from posts.uploads import UploadConflict, append_chunk, start_upload
+from posts.utils import get_suggestions
 
 
 class CreateRetrieveViewSet(
@@ -21,23 +35,28 @@ class CreateRetrieveViewSet(
 
 
 class PostViewSet(ModelViewSet):
-    queryset = Post.objects.all()
+    queryset = Post.objects.select_related('author')
     serializer_class = PostSerializer
     pagination_class = LimitOffsetPagination
     permission_classes = (AuthorOrReadOnly,)
+    throttle_scope = 'api_posts'
 
     def perform_create(self, instance):
         instance.save(author=self.request.user)
 
 
 class GroupViewSet(ReadOnlyModelViewSet):
-    queryset = Group.objects.all()
+    queryset = Group.objects.select_related('stats').order_by(
+        '-stats__activity', 'id'
+    )
     serializer_class = GroupSerializer
+    pagination_class = LimitOffsetPagination
 
 
 class CommentViewSet(ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = (AuthorOrReadOnly, )
+    throttle_scope = 'api_comments'
 
     def get_post(self):
         post_id = self.kwargs.get('post_id')
@@ -46,7 +65,7 @@ class CommentViewSet(ModelViewSet):
 
     def get_queryset(self):
         post = self.get_post()
-        return post.comments
+        return post.comments.select_related('author')
 
     def perform_create(self, serializer):
         post = self.get_post()
@@ -58,9 +77,70 @@ class FollowViewSet(CreateRetrieveViewSet):
     filter_backends = (SearchFilter,)
     search_fields = ('following__username',)
     permission_classes = (IsAuthenticated, )
+    throttle_scope = 'api_follow'
+
+    def get_queryset(self):
+        return self.request.user.follower.select_related('user', 'author')
+
+    def perform_create(self, serializer):
+        # Проверка в сериализаторе читает кэш подписок, который может
+        # отставать от параллельной подписки: дубликат ловит ограничение
+        # уникальности в БД.
+        try:
+            with transaction.atomic():
+                serializer.save(user=self.request.user)
+        except IntegrityError:
+            raise ValidationError(
+                {'following': ['Вы уже подписаны на этого автора.']}
+            )
+
+    @action(detail=False)
+    def suggestions(self, request):
+        """Рекомендации "кого почитать" из compute_follow_suggestions."""
+        serializer = FollowSuggestionSerializer(
+            get_suggestions(request.user), many=True
+        )
+        return Response(serializer.data)
+
+
+class UploadViewSet(CreateModelMixin, RetrieveModelMixin, GenericViewSet):
+    """Докачиваемая загрузка картинки кусками (см. posts.uploads).
+
+    Сессионная аутентификация нужна форме поста на сайте.
+    """
+
+    serializer_class = UploadSerializer
+    permission_classes = (IsAuthenticated,)
+    authentication_classes = (JWTAuthentication, SessionAuthentication)
+    lookup_field = 'token'
 
     def get_queryset(self):
-        return self.request.user.follower
+        return self.request.user.upload_sessions.all()
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        try:
+            serializer.instance = start_upload(
+                self.request.user, **serializer.validated_data
+            )
+        except DjangoValidationError as error:
+            raise ValidationError(error.messages)
+
+    def partial_update(self, request, *args, **kwargs):
+        """Дописывает тело запроса с позиции из заголовка Upload-Offset."""
+        session = self.get_object()
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except (KeyError, ValueError):
+            raise ValidationError('Нужен заголовок Upload-Offset.')
+        if length > settings.UPLOAD_CHUNK_MAX_SIZE:
+            return Response(status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        try:
+            append_chunk(session, offset, request._request, length)
+        except UploadConflict as conflict:
+            return Response(
+                {'offset': conflict.received}, status=status.HTTP_409_CONFLICT
+            )
+        except DjangoValidationError as error:
+            raise ValidationError(error.messages)
+        return Response(self.get_serializer(session).data)
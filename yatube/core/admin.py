@@ -0,0 +1,113 @@
+import time
+
+from django.contrib import admin, messages
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import FieldDoesNotExist
+
+from core.fields import CompressedTextField, PlainText
+from core.paginator import EstimatedCountPaginator
+
+
+class PreloadedAutocompleteSelect(AutocompleteSelect):
+    """AutocompleteSelect, который подписывает выбранное значение по уже
+    загруженному объекту строки, а не отдельным запросом на каждую строку.
+    """
+
+    selected_obj = None
+
+    def optgroups(self, name, value, attr=None):
+        obj = self.selected_obj
+        if obj is None or [str(v) for v in value] != [str(obj.pk)]:
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        options.append(self.create_option(
+            name, obj.pk, self.choices.field.label_from_instance(obj),
+            True, len(options),
+        ))
+        return [(None, options, 0)]
+
+
+class CompressedTextSearchMixin:
+    """Поиск по CompressedTextField из search_fields идёт по
+    распакованному тексту (PlainText), иначе длинные сжатые тексты не
+    находятся."""
+
+    PLAIN_SUFFIX = '_plain'
+
+    def get_compressed_search_fields(self, request):
+        names = []
+        for name in super().get_search_fields(request):
+            try:
+                field = self.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if isinstance(field, CompressedTextField):
+                names.append(name)
+        return names
+
+    def get_search_fields(self, request):
+        compressed = self.get_compressed_search_fields(request)
+        return [
+            name + self.PLAIN_SUFFIX if name in compressed else name
+            for name in super().get_search_fields(request)
+        ]
+
+    def get_search_results(self, request, queryset, search_term):
+        if search_term:
+            queryset = queryset.annotate(**{
+                name + self.PLAIN_SUFFIX: PlainText(name)
+                for name in self.get_compressed_search_fields(request)
+            })
+        return super().get_search_results(request, queryset, search_term)
+
+
+class LargeTableAdmin(CompressedTextSearchMixin, admin.ModelAdmin):
+    """Список для таблиц на миллионы строк.
+
+    Без COUNT(*) по всей таблице, связанные объекты - одним JOIN
+    (list_select_related), внешние ключи в list_editable - autocomplete
+    без запроса на каждую строку. Массовые действия выполняются через
+    run_bulk, поиск по сжатым текстам - CompressedTextSearchMixin.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.get_autocomplete_fields(request):
+            kwargs.setdefault('widget', PreloadedAutocompleteSelect(
+                db_field, self.admin_site, using=kwargs.get('using'),
+            ))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_form(self, request, **kwargs):
+        form_class = super().get_changelist_form(request, **kwargs)
+
+        class PreloadedForm(form_class):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                for name, field in self.fields.items():
+                    widget = getattr(field.widget, 'widget', field.widget)
+                    if isinstance(widget, PreloadedAutocompleteSelect):
+                        widget.selected_obj = getattr(self.instance, name)
+
+        return PreloadedForm
+
+    def run_bulk(self, request, description, operation, *args):
+        """Выполняет пачечную операцию и сообщает итог и число пачек.
+
+        operation(*args, progress=...) должна вернуть число строк.
+        """
+        started = time.monotonic()
+        chunks = []
+        count = operation(
+            *args, progress=lambda number, done: chunks.append(number)
+        )
+        self.message_user(
+            request,
+            f'{description}: {count} (пачек: {len(chunks)}, '
+            f'{time.monotonic() - started:.1f} с)',
+            messages.SUCCESS,
+        )
@@ -0,0 +1,69 @@
+"""Массовые операции пачками без загрузки объектов и сигналов на объект.
+
+Вместо pre_delete/post_delete на каждую строку raw_delete один раз на
+пачку шлёт raw_deleting(sender=модель, pks=...) - до DELETE, в той же
+транзакции. Приёмники по pks обновляют то, что обычно обновляют
+сигналы удаления (счётчики, кэши, ссылки на файлы).
+"""
+from django.conf import settings
+from django.db import models, transaction
+from django.dispatch import Signal
+
+RAW_ON_DELETE = (models.CASCADE, models.SET_NULL, models.DO_NOTHING)
+
+raw_deleting = Signal()
+
+
+def chunked_pks(queryset, size=None):
+    """Списки pk queryset пачками по size (по умолчанию BULK_CHUNK_SIZE)."""
+    size = size or settings.BULK_CHUNK_SIZE
+    pks = queryset.order_by('pk').values_list('pk', flat=True)
+    last_pk = None
+    while True:
+        chunk = pks if last_pk is None else pks.filter(pk__gt=last_pk)
+        chunk = list(chunk[:size])
+        if not chunk:
+            return
+        last_pk = chunk[-1]
+        yield chunk
+
+
+def raw_delete(model, pks, using='default'):
+    """DELETE строк model с данными pk и зависимых строк по CASCADE.
+
+    SET_NULL выполняется одним UPDATE, DO_NOTHING пропускается. Перед
+    удалением строк каждой модели шлётся raw_deleting. Если у model
+    есть связи с другими on_delete (PROTECT, RESTRICT, SET_DEFAULT...),
+    строки удаляются обычным QuerySet.delete(): он проверит
+    PROTECT/RESTRICT (ProtectedError, RestrictedError) и отправит
+    сигналы. Возвращает число удалённых строк model.
+    """
+    relations = model._meta.related_objects
+    if any(
+        relation.on_delete not in RAW_ON_DELETE for relation in relations
+    ):
+        queryset = model._base_manager.using(using).filter(pk__in=pks)
+        return queryset.delete()[1].get(model._meta.label, 0)
+    with transaction.atomic(using=using):
+        for relation in relations:
+            related = relation.related_model._base_manager.using(using)
+            related = related.filter(**{f'{relation.field.name}__in': pks})
+            on_delete = relation.on_delete
+            if on_delete is models.CASCADE:
+                if (
+                    relation.related_model._meta.related_objects
+                    or raw_deleting.has_listeners(relation.related_model)
+                ):
+                    raw_delete(
+                        relation.related_model,
+                        list(related.values_list('pk', flat=True)),
+                        using,
+                    )
+                else:
+                    related._raw_delete(using)
+            elif on_delete is models.SET_NULL:
+                related.update(**{relation.field.name: None})
+        raw_deleting.send(sender=model, pks=pks, using=using)
+        return model._base_manager.using(using).filter(
+            pk__in=pks
+        )._raw_delete(using)
@@ -0,0 +1,85 @@
+"""Сборка контекста шаблонов: отложенные и замеренные context processors.
+
+Бэкенд DjangoTemplates - стандартный, но каждый context processor
+из TEMPLATES оборачивается:
+
+* processors из OPTIONS['lazy_context_processors'] (путь -> имена
+  переменных) не вызываются при рендеринге: в контекст попадают
+  ленивые значения, и processor выполняется, только если шаблон
+  обратился к одной из его переменных;
+* время каждого вызова копится в request.context_timings, а
+  ServerTimingMiddleware отдаёт его в заголовке Server-Timing.
+
+Список context_processors в TEMPLATES остаётся прежним - его проверяют
+системные проверки админки.
+"""
+import time
+
+from django.template.backends import django
+from django.template.context import _builtin_context_processors
+from django.utils.functional import SimpleLazyObject
+from django.utils.module_loading import import_string
+
+TIMINGS_ATTR = 'context_timings'
+
+
+def record(request, name, started):
+    if request is None:
+        return
+    timings = getattr(request, TIMINGS_ATTR, None)
+    if timings is None:
+        timings = {}
+        setattr(request, TIMINGS_ATTR, timings)
+    timings[name] = timings.get(name, 0) + time.perf_counter() - started
+
+
+def timed(name, processor):
+    def wrapper(request):
+        started = time.perf_counter()
+        try:
+            return processor(request)
+        finally:
+            record(request, name, started)
+    return wrapper
+
+
+def lazy(processor, names):
+    """Processor, который выполняется при первом обращении к names."""
+    def wrapper(request):
+        result = []
+
+        def value(name):
+            if not result:
+                result.append(processor(request))
+            # Переменной нет, как у debug без DEBUG: пустая строка, как
+            # для любой неизвестной переменной шаблона.
+            return result[0].get(name, '')
+
+        return {
+            name: SimpleLazyObject(lambda name=name: value(name))
+            for name in names
+        }
+    return wrapper
+
+
+def assemble(paths, lazy_names):
+    processors = []
+    for path in paths:
+        name = path.rsplit('.', 1)[-1]
+        processor = timed(name, import_string(path))
+        if path in lazy_names:
+            processor = lazy(processor, lazy_names[path])
+        processors.append(processor)
+    return tuple(processors)
+
+
+class DjangoTemplates(django.DjangoTemplates):
+    def __init__(self, params):
+        params = params.copy()
+        options = params['OPTIONS'] = params.get('OPTIONS', {}).copy()
+        lazy_names = options.pop('lazy_context_processors', {})
+        super().__init__(params)
+        paths = _builtin_context_processors + tuple(
+            self.engine.context_processors
+        )
+        self.engine.template_context_processors = assemble(paths, lazy_names)
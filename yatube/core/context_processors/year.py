@@ -1,8 +1,20 @@
-from datetime import datetime
+import time
+from datetime import date, datetime, timedelta
+
+# Год меняется раз в сутки: значение считается заново после полуночи.
+_year = None
+_expires = 0.0
 
 
 def year(request):
     """Добавляет переменную с текущим годом."""
+    global _year, _expires
+    if time.time() >= _expires:
+        today = date.today()
+        _year = today.year
+        _expires = datetime.combine(
+            today + timedelta(days=1), datetime.min.time()
+        ).timestamp()
     return {
-        'year': datetime.today().year
+        'year': _year
     }
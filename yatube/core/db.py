@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.db import connections
+
+from .fields import plain_text
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Обработчик connection_created: выставляет PRAGMA для SQLite.
+
+    WAL позволяет читателям не блокировать писателя, synchronous=NORMAL
+    в режиме WAL безопасен и избавляет от fsync на каждый коммит.
+    Регистрирует PLAIN_TEXT для поиска по сжатым текстам (core.fields).
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+    connection.connection.create_function(
+        'PLAIN_TEXT', 1, plain_text, deterministic=True
+    )
+
+
+def estimate_count(model, using='default'):
+    """Примерное число строк таблицы без COUNT(*); None - оценки нет.
+
+    PostgreSQL - pg_class.reltuples, SQLite - статистика ANALYZE
+    (sqlite_stat1). Без статистики оценки нет: MAX(pk) после удалений
+    завышал бы число строк и страниц.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE relname = %s', [table]
+            )
+            row = cursor.fetchone()
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            )
+            if not cursor.fetchone():
+                return None
+            cursor.execute(
+                'SELECT stat FROM sqlite_stat1 WHERE tbl = %s', [table]
+            )
+            row = cursor.fetchone()
+            # stat: число строк таблицы, затем оценки по колонкам индекса.
+            row = row and (row[0].split()[0],)
+        else:
+            return None
+    return None if row is None or row[0] is None else max(int(row[0]), 0)
@@ -0,0 +1,112 @@
+"""Текстовое поле с прозрачным сжатием длинных значений.
+
+Колонка остаётся TEXT: SQLite хранит в ней и строки, и BLOB. Тексты
+длиннее COMPRESSED_TEXT_THRESHOLD байт пишутся zlib-блобом, если так
+выходит короче, остальные - обычной строкой.
+
+Распаковка ленивая в смысле запроса, а не атрибута: значение
+распаковывается, когда колонка пришла из БД (и в модели, и в
+values()). Ленты и комментарии откладывают text (.defer), поэтому
+распаковывают только те тексты, к которым действительно обращаются.
+
+Фильтры по полю (text__contains, text=... и т.д.) в SQLite сравнивают
+PLAIN_TEXT(колонки) и находят и сжатые строки; для выражений в
+annotate() и order_by() есть PlainText.
+На других СУБД и при COMPRESSED_TEXT_THRESHOLD = None поле ведёт себя
+как обычный TextField; вернуть сжатые строки в текст - compress_texts.
+"""
+import functools
+import zlib
+
+from django.conf import settings
+from django.db import models
+
+
+def decompress(value):
+    return zlib.decompress(value).decode()
+
+
+def plain_text(value):
+    """SQL-функция PLAIN_TEXT для SQLite (core.db.configure_sqlite)."""
+    if isinstance(value, bytes):
+        try:
+            return decompress(value)
+        except zlib.error:
+            return None
+    return value
+
+
+def to_storage(value, connection):
+    """Значение в том виде, в каком его нужно хранить в БД."""
+    threshold = settings.COMPRESSED_TEXT_THRESHOLD
+    if (
+        not isinstance(value, str)
+        or threshold is None
+        or connection.vendor != 'sqlite'
+    ):
+        return value
+    raw = value.encode()
+    if len(raw) < threshold:
+        return value
+    packed = zlib.compress(raw, settings.COMPRESSED_TEXT_LEVEL)
+    return packed if len(packed) < len(raw) else value
+
+
+@functools.lru_cache(maxsize=None)
+def _plain_lookup(lookup):
+    """Подкласс lookup, который сравнивает распакованный текст."""
+
+    class PlainTextLookup(lookup):
+        def process_lhs(self, compiler, connection, lhs=None):
+            sql, params = super().process_lhs(compiler, connection, lhs)
+            if connection.vendor == 'sqlite':
+                sql = f'PLAIN_TEXT({sql})'
+            return sql, params
+
+    PlainTextLookup.__name__ = f'PlainText{lookup.__name__}'
+    return PlainTextLookup
+
+
+class CompressedTextField(models.TextField):
+    def get_lookup(self, lookup_name):
+        lookup = super().get_lookup(lookup_name)
+        # NULL не сжимается: isnull может смотреть на колонку как есть.
+        if lookup is None or lookup_name == 'isnull':
+            return lookup
+        return _plain_lookup(lookup)
+
+    def from_db_value(self, value, expression, connection):
+        if isinstance(value, (bytes, memoryview)):
+            return decompress(value)
+        return value
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return decompress(value)
+        return super().to_python(value)
+
+    def get_db_prep_save(self, value, connection):
+        # Только запись: параметры поиска и фильтров не сжимаются.
+        value = super().get_db_prep_save(value, connection)
+        return to_storage(value, connection)
+
+
+class PlainText(models.Func):
+    """Текст CompressedTextField в запросе: для поиска по подстроке."""
+
+    function = 'PLAIN_TEXT'
+    output_field = models.TextField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # Сжатые значения бывают только в SQLite.
+        return compiler.compile(self.source_expressions[0])
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, **extra_context)
+
+
+def StoredValue(name):
+    """Значение колонки как есть, без распаковки: строка или zlib-блоб."""
+    return models.ExpressionWrapper(
+        models.F(name), output_field=models.TextField()
+    )
@@ -0,0 +1,70 @@
+import os
+import pstats
+import statistics
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import FILENAME
+
+SORT_KEYS = ('cumulative', 'tottime', 'calls')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка по профилям из PROFILE_DIR (core.profiling): число и '
+        'медианное время запросов по view и самые тяжёлые функции по '
+        'всем профилям вместе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--view', action='append', default=[],
+            help='Только профили этого view, например posts-index.',
+        )
+        parser.add_argument(
+            '--sort', choices=SORT_KEYS, default='cumulative',
+        )
+        parser.add_argument('--limit', type=int, default=30)
+        parser.add_argument(
+            '--delete', action='store_true',
+            help='Удалить учтённые профили.',
+        )
+
+    def handle(self, *args, **options):
+        paths, timings = [], defaultdict(list)
+        for path, view, ms in self.get_profiles(options['view']):
+            paths.append(path)
+            timings[view].append(ms)
+        if not paths:
+            raise CommandError(f'Нет профилей в {settings.PROFILE_DIR}.')
+
+        for view, values in sorted(
+            timings.items(), key=lambda item: -sum(item[1])
+        ):
+            self.stdout.write(
+                f'{view}: {len(values)} запр., медиана '
+                f'{statistics.median(values):.0f} мс, '
+                f'максимум {max(values)} мс'
+            )
+        stats = pstats.Stats(*paths, stream=self.stdout)
+        stats.strip_dirs().sort_stats(options['sort'])
+        stats.print_stats(options['limit'])
+        if options['delete']:
+            for path in paths:
+                os.remove(path)
+
+    def get_profiles(self, views):
+        try:
+            names = sorted(os.listdir(settings.PROFILE_DIR))
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            match = FILENAME.match(name)
+            if match and (not views or match['view'] in views):
+                yield (
+                    os.path.join(settings.PROFILE_DIR, name),
+                    match['view'],
+                    int(match['ms']),
+                )
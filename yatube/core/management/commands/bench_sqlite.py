@@ -0,0 +1,105 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+BASELINE = 'без настроек, новое соединение на запрос'
+TUNED = 'WAL + PRAGMA, постоянные соединения'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite при параллельном чтении '
+        'и записи: настройки по умолчанию против WAL и SQLITE_PRAGMAS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=3)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--rows', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        for title, tuned in ((BASELINE, False), (TUNED, True)):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'bench.sqlite3')
+                self.seed(path, options['rows'], tuned)
+                result = self.run_bench(path, tuned, options)
+            seconds = options['seconds']
+            self.stdout.write(
+                f'{title}: чтений {result["reads"] / seconds:.0f}/с, '
+                f'записей {result["writes"] / seconds:.0f}/с, '
+                f'ошибок блокировки {result["locked"]}'
+            )
+
+    def connect(self, path, tuned):
+        conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+        if tuned:
+            for pragma, value in settings.SQLITE_PRAGMAS.items():
+                conn.execute(f'PRAGMA {pragma} = {value}')
+        return conn
+
+    def seed(self, path, rows, tuned):
+        conn = self.connect(path, tuned)
+        conn.execute(
+            'CREATE TABLE post ('
+            'id INTEGER PRIMARY KEY, author_id INTEGER, text TEXT)'
+        )
+        conn.execute('CREATE INDEX post_author ON post (author_id)')
+        conn.executemany(
+            'INSERT INTO post (author_id, text) VALUES (?, ?)',
+            ((i % 100, 'x' * 200) for i in range(rows)),
+        )
+        conn.close()
+
+    def run_bench(self, path, tuned, options):
+        result = {'reads': 0, 'writes': 0, 'locked': 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['seconds']
+
+        def worker(kind):
+            # Постоянное соединение в режиме tuned, иначе - как при
+            # CONN_MAX_AGE = 0: новое соединение на каждую операцию.
+            conn = self.connect(path, tuned) if tuned else None
+            done = locked = 0
+            while time.monotonic() < deadline:
+                current = conn or self.connect(path, tuned)
+                try:
+                    if kind == 'reads':
+                        current.execute(
+                            'SELECT id, text FROM post WHERE author_id = ? '
+                            'ORDER BY id DESC LIMIT 10', (done % 100,)
+                        ).fetchall()
+                    else:
+                        current.execute(
+                            'INSERT INTO post (author_id, text) VALUES (?, ?)',
+                            (done % 100, 'y' * 200),
+                        )
+                    done += 1
+                except sqlite3.OperationalError:
+                    locked += 1
+                finally:
+                    if conn is None:
+                        current.close()
+            if conn is not None:
+                conn.close()
+            with lock:
+                result[kind] += done
+                result['locked'] += locked
+
+        threads = [
+            threading.Thread(target=worker, args=('reads',))
+            for _ in range(options['readers'])
+        ] + [
+            threading.Thread(target=worker, args=('writes',))
+            for _ in range(options['writers'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return result
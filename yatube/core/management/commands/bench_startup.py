@@ -0,0 +1,87 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+MODES = {'production': '0', 'debug': '1'}
+# Запуск воркера: WSGI-приложение и первый запрос - корневой URLconf.
+SCRIPT = '''
+import time
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from django.urls import resolve, reverse
+resolve({path!r})
+reverse('posts:index')
+print(time.perf_counter() - started)
+'''
+IMPORT_TIME = re.compile(r'^import time:\s+(\d+) \|\s+\d+ \|( *)(\S+)$')
+
+
+def run(path, debug, importtime=False):
+    env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': os.environ['DJANGO_SETTINGS_MODULE'],
+        'YATUBE_DEBUG': debug,
+    }
+    args = [sys.executable]
+    if importtime:
+        args += ['-X', 'importtime']
+    result = subprocess.run(
+        [*args, '-c', SCRIPT.format(path=path)],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise CommandError(result.stderr)
+    return float(result.stdout.split()[-1]), result.stderr
+
+
+def import_costs(log):
+    """Собственное время импорта в мкс по пакетам верхнего уровня."""
+    costs = Counter()
+    for line in log.splitlines():
+        match = IMPORT_TIME.match(line)
+        if match:
+            costs[match[3].split('.')[0]] += int(match[1])
+    return costs
+
+
+class Command(BaseCommand):
+    help = (
+        'Время запуска воркера в отдельном процессе: WSGI-приложение и '
+        'первый запрос в боевом режиме (YATUBE_DEBUG=0) и в режиме '
+        'разработки, и самые дорогие по python -X importtime пакеты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--limit', type=int, default=15)
+        parser.add_argument(
+            '--mode', choices=MODES, action='append',
+            help='По умолчанию оба режима.',
+        )
+        parser.add_argument(
+            '--path', default='/', help='URL первого запроса.',
+        )
+
+    def handle(self, *args, **options):
+        for mode in options['mode'] or MODES:
+            debug = MODES[mode]
+            timings = [
+                run(options['path'], debug)[0]
+                for _ in range(options['runs'])
+            ]
+            _, log = run(options['path'], debug, importtime=True)
+            costs = import_costs(log)
+            self.stdout.write(
+                f'{mode}: запуск {statistics.median(timings) * 1000:.1f} мс '
+                f'(медиана из {len(timings)}), импорт '
+                f'{sum(costs.values()) / 1000:.1f} мс'
+            )
+            for package, cost in costs.most_common(options['limit']):
+                self.stdout.write(f'  {package:<28} {cost / 1000:7.1f} мс')
@@ -0,0 +1,106 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.fields import (
+    CompressedTextField, StoredValue, decompress, to_storage
+)
+
+
+def compressed_fields():
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, CompressedTextField):
+                yield model, field
+
+
+def db_size():
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA page_count')
+        (pages,) = cursor.fetchone()
+        cursor.execute('PRAGMA page_size')
+        (page_size,) = cursor.fetchone()
+    return pages * page_size
+
+
+def stored_size(value):
+    return len(value) if isinstance(value, bytes) else len(value.encode())
+
+
+class Command(BaseCommand):
+    help = (
+        'Перепаковывает тексты полей CompressedTextField по текущему '
+        'COMPRESSED_TEXT_THRESHOLD: сжимает длинные или распаковывает, '
+        'если сжатие выключено. Идёт пачками по pk, можно прерывать.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--vacuum', action='store_true',
+            help='VACUUM после перепаковки, чтобы уменьшить файл БД.',
+        )
+
+    def handle(self, *args, **options):
+        sqlite = connection.vendor == 'sqlite'
+        if sqlite:
+            size_before = db_size()
+        for model, field in compressed_fields():
+            read_before = self.read_all(model, field)
+            changed, before, after = self.convert(
+                model, field, options['batch_size']
+            )
+            read_after = self.read_all(model, field)
+            self.stdout.write(
+                f'{model._meta.label}.{field.name}: перепаковано {changed}, '
+                f'данные {before / 1024:.0f} -> {after / 1024:.0f} КБ, '
+                f'чтение всех строк {read_before * 1000:.0f} -> '
+                f'{read_after * 1000:.0f} мс'
+            )
+        if not sqlite:
+            return
+        if options['vacuum']:
+            with connection.cursor() as cursor:
+                cursor.execute('VACUUM')
+        self.stdout.write(
+            f'Файл БД: {size_before / 1024:.0f} -> {db_size() / 1024:.0f} КБ'
+        )
+
+    def convert(self, model, field, batch_size):
+        attname = field.attname
+        manager = model._base_manager
+        changed = before = after = 0
+        last_pk = None
+        while True:
+            rows = manager.order_by('pk')
+            if last_pk is not None:
+                rows = rows.filter(pk__gt=last_pk)
+            rows = list(
+                rows.values_list('pk', StoredValue(attname))[:batch_size]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            objs = []
+            for pk, stored in rows:
+                text = stored
+                if isinstance(stored, (bytes, memoryview)):
+                    stored = bytes(stored)
+                    text = decompress(stored)
+                target = to_storage(text, connection)
+                before += stored_size(stored)
+                after += stored_size(target)
+                if type(target) is not type(stored):
+                    objs.append(model(pk=pk, **{attname: text}))
+            with transaction.atomic():
+                manager.bulk_update(objs, [attname])
+            changed += len(objs)
+        return changed, before, after
+
+    def read_all(self, model, field):
+        started = time.perf_counter()
+        for obj in model._base_manager.only(field.attname).iterator():
+            getattr(obj, field.attname)
+        return time.perf_counter() - started
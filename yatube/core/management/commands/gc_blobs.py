@@ -0,0 +1,106 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.db.models import Count
+from django.utils import timezone
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+from core.bulk import chunked_pks
+from core.models import Blob
+from core.storage import ContentAddressedStorage, blob_storage
+
+
+def blob_fields():
+    """Поля с именами файлов: FileField с ContentAddressedStorage и
+    поля из BLOB_REFERENCE_FIELDS."""
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField) and isinstance(
+                field.storage, ContentAddressedStorage
+            ):
+                yield model, field
+    for path in settings.BLOB_REFERENCE_FIELDS:
+        label, name = path.rsplit('.', 1)
+        model = apps.get_model(label)
+        yield model, model._meta.get_field(name)
+
+
+def count_refs():
+    """Число ссылок на каждый файл по всем полям с ContentAddressedStorage."""
+    refs = Counter()
+    for model, field in blob_fields():
+        rows = model._base_manager.exclude(
+            **{field.attname: ''}
+        ).values_list(field.attname).annotate(n=Count('pk')).order_by()
+        for name, n in rows:
+            refs[name] += n
+    return refs
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет счётчики ссылок Blob с моделями и удаляет файлы без '
+        'ссылок, не сохранявшиеся дольше BLOB_GC_GRACE, вместе с их '
+        'миниатюрами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что будет удалено.',
+        )
+
+    def handle(self, *args, **options):
+        refs = count_refs()
+        fixed = 0
+        for pks in chunked_pks(Blob.objects.all()):
+            blobs = [
+                blob for blob in Blob.objects.filter(pk__in=pks)
+                if blob.refs != refs[blob.name]
+            ]
+            for blob in blobs:
+                blob.refs = refs[blob.name]
+            Blob.objects.bulk_update(blobs, ['refs'])
+            fixed += len(blobs)
+
+        garbage = Blob.objects.filter(
+            refs__lte=0,
+            last_seen__lt=timezone.now() - timedelta(
+                seconds=settings.BLOB_GC_GRACE
+            ),
+        )
+        deleted = freed = 0
+        for pks in chunked_pks(garbage):
+            for blob in Blob.objects.filter(pk__in=pks):
+                if not options['dry_run'] and not self.purge(garbage, blob):
+                    continue
+                deleted += 1
+                freed += blob.size
+        self.stdout.write(
+            f'Исправлено счётчиков: {fixed}, удалено файлов: {deleted} '
+            f'({freed / 1024:.0f} КБ)'
+        )
+
+    def purge(self, garbage, blob):
+        """Удаляет строку и файл, если blob всё ещё мусор.
+
+        Пока идёт обход, файл могли загрузить снова или сослаться на
+        него. Строка удаляется условно и под блокировкой до конца
+        транзакции: повторное сохранение того же содержимого
+        (ContentAddressedStorage.register) дождётся удаления файла и
+        создаст строку и файл заново.
+        """
+        with transaction.atomic():
+            if not garbage.filter(pk=blob.pk).delete()[0]:
+                return False
+            if blob_storage.exists(blob.name):
+                delete_thumbnails(
+                    ImageFile(blob.name, blob_storage), delete_file=False
+                )
+                blob_storage.purge(blob.name)
+        return True
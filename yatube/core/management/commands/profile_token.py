@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.profiling import make_token
+
+
+class Command(BaseCommand):
+    help = (
+        'Токен для заголовка X-Profile: запрос с ним профилируется '
+        'независимо от PROFILE_SAMPLE_RATE. Действует '
+        'PROFILE_TOKEN_MAX_AGE секунд.'
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_token())
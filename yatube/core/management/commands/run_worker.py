@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from core.models import Task
+from core.tasks import Worker
+
+
+class Command(BaseCommand):
+    help = 'Запускает исполнитель фоновых задач (core.tasks).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int)
+        parser.add_argument('--poll-interval', type=float)
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Выйти, когда очередь опустеет.',
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Показать метрики выполненных задач и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            return self.print_stats()
+        worker = Worker(
+            concurrency=options['concurrency'],
+            poll_interval=options['poll_interval'],
+        )
+        self.stdout.write(
+            f'Воркер запущен, одновременно задач: {worker.concurrency}'
+        )
+        try:
+            worker.run(burst=options['burst'])
+        except KeyboardInterrupt:
+            self.stdout.write('Воркер остановлен')
+
+    def print_stats(self):
+        queue = dict(
+            Task.objects.values_list('status').annotate(Count('id'))
+        )
+        self.stdout.write(f'Очередь: {queue}')
+        durations = {}
+        for name, duration in Task.objects.filter(
+            status=Task.DONE
+        ).values_list('name', 'duration'):
+            durations.setdefault(name, []).append(duration)
+        for name, values in sorted(durations.items()):
+            values.sort()
+            p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+            self.stdout.write(
+                f'{name}: {len(values)} шт., '
+                f'среднее {sum(values) / len(values) * 1000:.1f} мс, '
+                f'p95 {p95 * 1000:.1f} мс'
+            )
@@ -0,0 +1,186 @@
+import re
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.middleware import gzip
+from django.utils.cache import patch_vary_headers
+
+from . import profiling
+from .context import TIMINGS_ATTR
+from .routers import is_pinned, pin_scope
+from .serving import accepts_encoding
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class AsyncCapableMiddleware:
+    """Основа middleware, которые работают и в sync-, и в async-цепочке.
+
+    Django не адаптирует такие middleware через async_to_sync, и под
+    ASGI асинхронные view выполняются в цикле событий, а не в потоке
+    (раздел "Asynchronous support" документации по middleware).
+    Наследник задаёт sync_call и async_call.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.async_call(request)
+        return self.sync_call(request)
+
+    def sync_call(self, request):
+        raise NotImplementedError
+
+    async def async_call(self, request):
+        raise NotImplementedError
+
+
+class ReplicaPinMiddleware(AsyncCapableMiddleware):
+    """Закрепляет клиента за основной БД на REPLICA_PIN_SECONDS после записи.
+
+    Небезопасные запросы и запросы с cookie закрепления читают из основной
+    БД. Если в ходе запроса была запись, клиент получает cookie, и
+    следующие чтения в течение окна тоже идут мимо реплик.
+    """
+
+    def pinned(self, request):
+        return (
+            request.method not in SAFE_METHODS
+            or settings.REPLICA_PIN_COOKIE in request.COOKIES
+        )
+
+    def sync_call(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        pinned = self.pinned(request)
+        with pin_scope(pinned):
+            response = self.get_response(request)
+            wrote = is_pinned() and not pinned
+        return self.set_cookie(request, response, wrote)
+
+    async def async_call(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+        pinned = self.pinned(request)
+        with pin_scope(pinned):
+            response = await self.get_response(request)
+            wrote = is_pinned() and not pinned
+        return self.set_cookie(request, response, wrote)
+
+    def set_cookie(self, request, response, wrote):
+        if wrote or request.method not in SAFE_METHODS:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class ProfilingMiddleware(AsyncCapableMiddleware):
+    """Запускает выбранные запросы под cProfile (core.profiling)."""
+
+    def sync_call(self, request):
+        if not profiling.should_profile(request):
+            return self.get_response(request)
+        return profiling.profile(self.get_response, request)
+
+    async def async_call(self, request):
+        if not profiling.should_profile(request):
+            return await self.get_response(request)
+        return await profiling.aprofile(self.get_response, request)
+
+
+class ServerTimingMiddleware(AsyncCapableMiddleware):
+    """Время context processors запроса в заголовке Server-Timing
+    (core.context), если включён SERVER_TIMING."""
+
+    def sync_call(self, request):
+        return self.add_header(request, self.get_response(request))
+
+    async def async_call(self, request):
+        return self.add_header(request, await self.get_response(request))
+
+    def add_header(self, request, response):
+        timings = getattr(request, TIMINGS_ATTR, None)
+        if settings.SERVER_TIMING and timings:
+            metrics = [
+                f'ctx-{name};dur={seconds * 1000:.3f}'
+                for name, seconds in timings.items()
+            ]
+            metrics.append(f'ctx;dur={sum(timings.values()) * 1000:.3f}')
+            response['Server-Timing'] = ', '.join(metrics)
+        return response
+
+
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/|image/svg\+xml|application/'
+    r'(json|javascript|xml|[\w.-]+\+json|[\w.-]+\+xml))'
+)
+
+
+def compress_stream(chunks, level):
+    """gzip-поток, в котором каждый кусок можно распаковать сразу."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if chunk:
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class GZipMiddleware(gzip.GZipMiddleware):
+    """GZipMiddleware, который не тормозит потоковые ответы.
+
+    Стандартный копит поток в буфере GzipFile, и шапка страницы
+    (core.streaming) доходит до браузера только вместе с остальным.
+    Здесь каждый кусок сжимается с Z_SYNC_FLUSH и уходит сразу. Сжимаются
+    только текстовые типы: картинки и готовые .gz/.br (core.serving)
+    идут как есть. Уровень и порог - GZIP_LEVEL, GZIP_MIN_LENGTH.
+    """
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or not (
+            COMPRESSIBLE_TYPES.match(response.get('Content-Type', ''))
+        ):
+            return response
+        if not response.streaming and (
+            len(response.content) < settings.GZIP_MIN_LENGTH
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not accepts_encoding(request, 'gzip'):
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, settings.GZIP_LEVEL
+            )
+            del response['Content-Length']
+        else:
+            content = b''.join(
+                compress_stream([response.content], settings.GZIP_LEVEL)
+            )
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = 'gzip'
+        return response
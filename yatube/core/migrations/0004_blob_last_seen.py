@@ -0,0 +1,19 @@
+# Generated by Django 3.2.16 on 2026-10-19 07:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blob',
+            name='last_seen',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Последнее сохранение'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class CreatedModel(models.Model):
@@ -6,8 +7,71 @@ class CreatedModel(models.Model):
 
     created = models.DateTimeField(
         'Дата создания',
-        auto_now_add=True
+        auto_now_add=True,
+        db_index=True,
     )
 
     class Meta:
         abstract = True
+
+
+class Task(CreatedModel):
+    """Фоновая задача для run_worker."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=200, db_index=True)
+    args = models.JSONField('Аргументы', default=list)
+    kwargs = models.JSONField('Именованные аргументы', default=dict)
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUSES, default=PENDING
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveIntegerField('Максимум попыток', default=3)
+    run_at = models.DateTimeField('Запустить не раньше', default=timezone.now)
+    started_at = models.DateTimeField('Начало', null=True, blank=True)
+    finished_at = models.DateTimeField('Окончание', null=True, blank=True)
+    duration = models.FloatField('Длительность, с', null=True, blank=True)
+    error = models.TextField('Ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = [
+            models.Index(
+                fields=['status', 'run_at'], name='task_status_run_at'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} [{self.status}]'
+
+
+class Blob(CreatedModel):
+    """Файл в хранилище по хэшу содержимого (core.storage)."""
+
+    digest = models.CharField('SHA-256', max_length=64, primary_key=True)
+    name = models.CharField('Имя в хранилище', max_length=255, unique=True)
+    size = models.PositiveBigIntegerField('Размер, байт')
+    refs = models.IntegerField('Ссылок', default=0)
+    # Последнее сохранение этого содержимого: новое или повторное.
+    # gc_blobs не трогает файлы моложе BLOB_GC_GRACE по этому полю.
+    last_seen = models.DateTimeField(
+        'Последнее сохранение', default=timezone.now, db_index=True
+    )
+
+    class Meta:
+        verbose_name = 'Файл'
+        verbose_name_plural = 'Файлы'
+
+    def __str__(self):
+        return self.name
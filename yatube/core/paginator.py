@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from core.db import estimate_count
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator для огромных таблиц: без фильтров не делает COUNT(*).
+
+    Для нефильтрованного списка берётся оценка числа строк
+    (core.db.estimate_count); точный COUNT - только для небольших таблиц
+    и отфильтрованных списков. Если по оценке страница есть, а строк на
+    ней нет, число строк пересчитывается точно и страница проверяется
+    заново.
+    """
+
+    estimated = False
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimate = estimate_count(
+                self.object_list.model, self.object_list.db
+            )
+            if (
+                estimate is not None
+                and estimate >= settings.ESTIMATED_COUNT_THRESHOLD
+            ):
+                self.estimated = True
+                return estimate
+        return super().count
+
+    def page(self, number):
+        page = super().page(number)
+        if self.estimated and page.number > 1 and not page.object_list:
+            self.estimated = False
+            self.__dict__['count'] = Paginator.count.func(self)
+            self.__dict__.pop('num_pages', None)
+            page = super().page(number)
+        return page
@@ -0,0 +1,131 @@
+"""Выборочное профилирование запросов cProfile (core.middleware).
+
+Профилируется доля PROFILE_SAMPLE_RATE запросов и каждый запрос с
+заголовком X-Profile, в котором подписанный токен (make_token,
+manage.py profile_token). Профиль пишется в PROFILE_DIR файлом
+<view>.<мс>ms.<время>.<pid>.<uuid>.prof (uuid - чтобы не совпали имена
+профилей потоков одного процесса); сводка - manage.py aggregate_profiles.
+"""
+import cProfile
+import os
+import random
+import re
+import time
+import uuid
+
+from django.conf import settings
+from django.core import signing
+
+SALT = 'core.profiling'
+HEADER = 'HTTP_X_PROFILE'
+FILENAME = re.compile(
+    r'^(?P<view>.+)\.(?P<ms>\d+)ms\.[^.]+\.\d+\.[0-9a-f]{32}\.prof$'
+)
+# Идёт профиль асинхронного запроса (aprofile).
+_async_active = False
+
+
+def make_token():
+    return signing.TimestampSigner(salt=SALT).sign('profile')
+
+
+def has_token(request):
+    token = request.META.get(HEADER)
+    if not token:
+        return False
+    try:
+        signing.TimestampSigner(salt=SALT).unsign(
+            token, max_age=settings.PROFILE_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def should_profile(request):
+    return (
+        random.random() < settings.PROFILE_SAMPLE_RATE or has_token(request)
+    )
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    name = match.view_name if match else 'unresolved'
+    return re.sub(r'[^\w-]+', '-', name).strip('-') or 'unresolved'
+
+
+def save(profiler, request, elapsed):
+    """Сохраняет профиль; файл появляется целиком или не появляется."""
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    name = '{}.{}ms.{}.{}.{}.prof'.format(
+        view_name(request),
+        round(elapsed * 1000),
+        time.strftime('%Y%m%dT%H%M%S'),
+        os.getpid(),
+        uuid.uuid4().hex,
+    )
+    path = os.path.join(settings.PROFILE_DIR, name)
+    profiler.dump_stats(path + '.part')
+    os.replace(path + '.part', path)
+    return path
+
+
+def profile_stream(chunks, profiler, request, started):
+    """Тело потокового ответа рендерится при отдаче, и профиль
+    дописывается, пока отдаются куски."""
+    try:
+        while True:
+            profiler.enable()
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                break
+            finally:
+                profiler.disable()
+            yield chunk
+    finally:
+        save(profiler, request, time.perf_counter() - started)
+
+
+def profile(get_response, request):
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        response = get_response(request)
+    finally:
+        profiler.disable()
+    return finish(profiler, request, response, started)
+
+
+async def aprofile(get_response, request):
+    """profile для асинхронной цепочки (ASGI).
+
+    cProfile видит только поток цикла событий: в профиль попадают и
+    другие задачи цикла, а код в потоках sync_to_async - нет. Пока идёт
+    один такой профиль, другие запросы не профилируются: второй
+    профилировщик в том же потоке сбил бы первый.
+    """
+    global _async_active
+    if _async_active:
+        return await get_response(request)
+    _async_active = True
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        response = await get_response(request)
+    finally:
+        profiler.disable()
+        _async_active = False
+    return finish(profiler, request, response, started)
+
+
+def finish(profiler, request, response, started):
+    if response.streaming:
+        response.streaming_content = profile_stream(
+            iter(response.streaming_content), profiler, request, started
+        )
+    else:
+        save(profiler, request, time.perf_counter() - started)
+    return response
@@ -0,0 +1,195 @@
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.shortcuts import render
+
+RATE_PERIODS = {
+    's': 1,
+    'm': 60,
+    'h': 60 * 60,
+    'd': 60 * 60 * 24,
+}
+
+
+def parse_rate(rate):
+    """Разбирает строку вида '10/m' в пару (кол-во запросов, секунды)."""
+    if rate is None:
+        return None, None
+    num, period = rate.split('/')
+    return int(num), RATE_PERIODS[period[0]]
+
+
+class MemoryBucketStore:
+    """Хранилище состояния корзин в памяти процесса.
+
+    Используется, когда кэш не настроен (RATELIMIT_CACHE = None).
+    """
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._buckets.get(key)
+
+    def set(self, key, state, timeout):
+        self._buckets[key] = state
+
+    def lock(self, key):
+        return self._lock
+
+    def clear(self):
+        self._buckets.clear()
+
+
+class CacheLock:
+    """Блокировка ключа через cache.add, общая для всех процессов.
+
+    Ключ живёт TIMEOUT секунд, чтобы упавший процесс не заблокировал
+    корзину навсегда. Если блокировку не удалось взять за WAIT секунд,
+    корзина обновляется без неё: лимит в этом случае приблизительный.
+    """
+    TIMEOUT = 2
+    WAIT = 0.5
+    POLL = 0.005
+
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = f'{key}:lock'
+        self.acquired = False
+
+    def __enter__(self):
+        deadline = time.monotonic() + self.WAIT
+        while not self.cache.add(self.key, 1, self.TIMEOUT):
+            if time.monotonic() >= deadline:
+                return self
+            time.sleep(self.POLL)
+        self.acquired = True
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.acquired:
+            self.cache.delete(self.key)
+            self.acquired = False
+
+
+class CacheBucketStore:
+    """Хранилище состояния корзин в кэше Django."""
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, state, timeout):
+        self.cache.set(key, state, timeout)
+
+    def lock(self, key):
+        return CacheLock(self.cache, key)
+
+
+class TokenBucket:
+    """Корзина токенов: `capacity` токенов, пополняется за `period` секунд.
+
+    Состояние корзины - пара (токены, время последнего пополнения),
+    хранится по ключу в store. Время - time.time(): корзину в общем
+    кэше обновляют разные процессы и хосты, а monotonic у каждого свой.
+    """
+
+    def __init__(self, rate, store, prefix='ratelimit'):
+        self.capacity, self.period = parse_rate(rate)
+        self.store = store
+        self.prefix = prefix
+
+    @property
+    def fill_rate(self):
+        return self.capacity / self.period
+
+    def consume(self, ident, tokens=1):
+        """Списывает токены. Возвращает (разрешено, секунд до токена)."""
+        if self.capacity is None:
+            return True, 0
+        key = f'{self.prefix}:{ident}'
+        with self.store.lock(key):
+            now = time.time()
+            state = self.store.get(key)
+            if state is None:
+                available, last = self.capacity, now
+            else:
+                available, last = state
+                # Часы хостов могут расходиться: время назад не пополняет
+                # и не опустошает корзину.
+                elapsed = max(0, now - last)
+                available = min(
+                    self.capacity, available + elapsed * self.fill_rate
+                )
+            allowed = available >= tokens
+            if allowed:
+                available -= tokens
+            self.store.set(key, (available, now), self.period)
+        wait = 0 if allowed else (tokens - available) / self.fill_rate
+        return allowed, wait
+
+
+_memory_store = MemoryBucketStore()
+
+
+def get_store():
+    """Хранилище из настроек: кэш RATELIMIT_CACHE либо память процесса."""
+    alias = getattr(settings, 'RATELIMIT_CACHE', None)
+    if alias is None:
+        return _memory_store
+    return CacheBucketStore(alias)
+
+
+def get_bucket(scope):
+    """Корзина для области (scope) из настройки RATELIMIT_RATES."""
+    rate = settings.RATELIMIT_RATES.get(scope)
+    return TokenBucket(rate, get_store(), prefix=f'ratelimit:{scope}')
+
+
+def get_client_ip(request):
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded and getattr(settings, 'RATELIMIT_TRUST_FORWARDED', False):
+        return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR')
+
+
+def get_ident(request, key='user_or_ip'):
+    """Ключ клиента: пользователь, IP или пользователь (а для гостя IP)."""
+    user = getattr(request, 'user', None)
+    authenticated = user is not None and user.is_authenticated
+    if key == 'ip' or (key == 'user_or_ip' and not authenticated):
+        return f'ip:{get_client_ip(request)}'
+    return f'user:{user.pk}'
+
+
+def ratelimit(scope, key='user_or_ip', methods=('POST', 'GET')):
+    """Декоратор view-функции: ограничивает частоту запросов к ней.
+
+    При исчерпании лимита возвращает страницу 429 без обращения к view.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                allowed, wait = get_bucket(scope).consume(
+                    get_ident(request, key)
+                )
+                if not allowed:
+                    response = render(
+                        request, 'core/429.html', status=429
+                    )
+                    response['Retry-After'] = str(int(wait) + 1)
+                    return response
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
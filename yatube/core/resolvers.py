@@ -0,0 +1,46 @@
+"""Отложенная загрузка URLconf с пространством имён.
+
+include() импортирует модуль сразу, а корневой URLResolver при первом
+reverse() обходит все вложенные. lazy_include() импортирует свой
+URLconf только при запросе к его префиксу или reverse('<namespace>:...'):
+воркер, который API не обслуживал, не платит за импорт DRF.
+"""
+from django.urls.resolvers import RoutePattern, URLResolver
+
+
+class LazyURLResolver(URLResolver):
+    def _populate(self):
+        # Родитель вызывает _populate() у всех вложенных резолверов, хотя
+        # для пространства имён ему нужны только app_name и namespace.
+        if 'url_patterns' in self.__dict__:
+            super()._populate()
+
+    def _load(self):
+        return self.url_patterns
+
+    @property
+    def reverse_dict(self):
+        self._load()
+        return super().reverse_dict
+
+    @property
+    def namespace_dict(self):
+        self._load()
+        return super().namespace_dict
+
+    @property
+    def app_dict(self):
+        self._load()
+        return super().app_dict
+
+    def _is_callback(self, name):
+        self._load()
+        return super()._is_callback(name)
+
+
+def lazy_include(route, urlconf, namespace):
+    """path(route, include(urlconf)) для URLconf с app_name = namespace."""
+    return LazyURLResolver(
+        RoutePattern(route, is_endpoint=False), urlconf,
+        app_name=namespace, namespace=namespace,
+    )
@@ -0,0 +1,57 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_pinned = ContextVar('pinned_to_primary', default=False)
+
+
+def pin_to_primary():
+    """Все дальнейшие чтения в этом запросе/потоке идут в основную БД."""
+    _pinned.set(True)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+@contextmanager
+def pin_scope(pinned=False):
+    """Закрепление за основной БД в пределах блока (запрос, задача).
+
+    pinned=True - все чтения блока идут в основную БД. По выходе
+    закрепление прежнее, в том числе если в блоке была запись: иначе
+    долгоживущий поток (пул воркера задач) оставался бы закреплён
+    навсегда.
+    """
+    token = _pinned.set(pinned)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class ReplicaRouter:
+    """Чтение - из реплик DATABASE_REPLICAS, запись - в 'default'.
+
+    После первой записи контекст закрепляется за основной БД, чтобы
+    пользователь сразу видел свои изменения (read-your-writes), - до
+    конца блока pin_scope: запроса (ReplicaPinMiddleware) или задачи
+    (core.tasks).
+    """
+
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or is_pinned():
+            return 'default'
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
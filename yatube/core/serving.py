@@ -0,0 +1,145 @@
+"""Отдача статики и медиа.
+
+Если задан SENDFILE_HEADER, процесс только выбирает файл и заголовки, а
+сам файл отдаёт веб-сервер: 'X-Accel-Redirect' (nginx) получает
+внутренний адрес из SENDFILE_URLS, 'X-Sendfile' (Apache, lighttpd) -
+путь на диске. Без него файл отдаёт процесс через FileResponse - для
+локального запуска и как запасной вариант.
+
+Статика с хэшем в имени и файлы по хэшу содержимого (core.storage,
+миниатюры) не меняются никогда: они отдаются с Cache-Control immutable
+на год, остальное - на STATIC_CACHE_MAX_AGE / MEDIA_CACHE_MAX_AGE.
+Для статики выбирается готовая сжатая копия (.br, .gz) по
+Accept-Encoding (core.staticfiles).
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified
+)
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+from .storage import BLOB_DIR
+
+YEAR = 365 * 24 * 60 * 60
+# Имя вида name.0123456789ab.css - так ManifestStaticFilesStorage
+# добавляет хэш.
+HASHED_STATIC = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+# Файлы по хэшу и миниатюры sorl-thumbnail (THUMBNAIL_PREFIX), чьё имя
+# считается от имени исходника.
+IMMUTABLE_MEDIA = (f'{BLOB_DIR}/', 'cache/')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _path(root, path):
+    try:
+        full_path = safe_join(root, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    return full_path
+
+
+def _weights(accept_encoding):
+    """Веса q кодировок из Accept-Encoding; без q - 1, кривой q - 0."""
+    weights = {}
+    for item in accept_encoding.split(','):
+        token, *params = item.split(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[token] = weight
+    return weights
+
+
+def accepts_encoding(request, encoding):
+    """Клиент принимает encoding: у неё (или у *) ненулевой вес q.
+
+    Проверка подстрокой, как re_accepts_gzip в django.middleware.gzip,
+    принимает и gzip;q=0, и чужие токены вроде xbr.
+    """
+    weights = _weights(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    return weights.get(encoding, weights.get('*', 0)) > 0
+
+
+def _precompressed(request, full_path):
+    """Сжатая копия файла, которую принимает клиент, или (None, путь)."""
+    for encoding, suffix in ENCODINGS:
+        if accepts_encoding(request, encoding) and os.path.isfile(
+            full_path + suffix
+        ):
+            return encoding, full_path + suffix
+    return None, full_path
+
+
+def send_file(request, kind, root, path, max_age, immutable=False,
+              encodings=False):
+    full_path = _path(root, path)
+    encoding, send_path = None, full_path
+    if encodings:
+        encoding, send_path = _precompressed(request, full_path)
+    stat = os.stat(send_path)
+    if not was_modified_since(
+        request.headers.get('If-Modified-Since'), stat.st_mtime, stat.st_size
+    ):
+        response = HttpResponseNotModified()
+    else:
+        if settings.SENDFILE_HEADER:
+            response = HttpResponse()
+            response[settings.SENDFILE_HEADER] = (
+                send_path if settings.SENDFILE_HEADER == 'X-Sendfile'
+                else settings.SENDFILE_URLS[kind] + path
+                + send_path[len(full_path):]
+            )
+        else:
+            response = FileResponse(open(send_path, 'rb'))
+        content_type, _ = mimetypes.guess_type(full_path)
+        response['Content-Type'] = content_type or 'application/octet-stream'
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if encoding:
+            response['Content-Encoding'] = encoding
+    if encodings:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    if immutable:
+        patch_cache_control(
+            response, public=True, max_age=YEAR, immutable=True
+        )
+    else:
+        patch_cache_control(response, public=True, max_age=max_age)
+    return response
+
+
+@require_safe
+def serve_static(request, path):
+    return send_file(
+        request, 'static', settings.STATIC_ROOT, path,
+        settings.STATIC_CACHE_MAX_AGE,
+        immutable=bool(HASHED_STATIC.search(path)),
+        encodings=True,
+    )
+
+
+@require_safe
+def serve_media(request, path):
+    return send_file(
+        request, 'media', settings.MEDIA_ROOT, path,
+        settings.MEDIA_CACHE_MAX_AGE,
+        immutable=path.startswith(IMMUTABLE_MEDIA),
+    )
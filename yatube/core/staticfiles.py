@@ -0,0 +1,56 @@
+"""Статика для продакшена.
+
+Имена файлов с хэшем содержимого (ManifestStaticFilesStorage), поэтому
+их можно кэшировать навсегда, а рядом со сжимаемыми файлами collectstatic
+кладёт готовые .gz и .br (если установлен brotli), чтобы не сжимать их
+на каждый запрос.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = (
+    '.css', '.js', '.map', '.svg', '.ico', '.txt', '.html', '.json',
+    '.xml', '.yaml',
+)
+# Меньше этого сжатие не окупает лишний файл и запрос к диску.
+MIN_SIZE = 256
+
+
+def compressors():
+    yield '.gz', lambda data: gzip.compress(data, 9, mtime=0)
+    if brotli is not None:
+        yield '.br', lambda data: brotli.compress(data, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        hashed = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in sorted(hashed):
+            if name.endswith(COMPRESSIBLE):
+                self.compress(name)
+
+    def compress(self, name):
+        """Пишет сжатые копии name, если они меньше оригинала."""
+        with self.open(name) as file:
+            data = file.read()
+        if len(data) < MIN_SIZE:
+            return
+        for suffix, compress in compressors():
+            packed = compress(data)
+            if len(packed) < len(data):
+                with open(self.path(name + suffix), 'wb') as file:
+                    file.write(packed)
@@ -0,0 +1,117 @@
+"""Хранилище файлов по хэшу содержимого.
+
+Файл при сохранении хэшируется (SHA-256) по ходу записи во временный
+файл и кладётся под именем blobs/ab/cd/<хэш>.<расширение>. Одинаковые
+файлы хранятся один раз: повторная загрузка получает имя уже
+сохранённого. Миниатюры sorl-thumbnail строятся по имени исходника,
+поэтому и они общие для всех копий.
+
+Ссылки на файл считаются в Blob.refs (retain/release из сигналов
+моделей и загрузок). Хранилище само файлы не удаляет - это делает
+gc_blobs для файлов без ссылок, которые давно не сохранялись.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db.models import F
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+from .models import Blob
+
+BLOB_DIR = 'blobs'
+READ_BLOCK = 64 * 1024
+
+
+def blob_name(digest, name):
+    extension = os.path.splitext(name)[1].lower()
+    return '/'.join(
+        (BLOB_DIR, digest[:2], digest[2:4], f'{digest}{extension}')
+    )
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        size = 0
+        if hasattr(content, 'temporary_file_path'):
+            # Файл уже на диске: только хэшируем, потом переносим.
+            source = content.temporary_file_path()
+            with open(source, 'rb') as file:
+                for block in iter(lambda: file.read(READ_BLOCK), b''):
+                    digest.update(block)
+                    size += len(block)
+            own_source = False
+        else:
+            temp_dir = self.path(BLOB_DIR)
+            os.makedirs(temp_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=temp_dir, suffix='.part', delete=False
+            ) as file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    size += len(chunk)
+                    file.write(chunk)
+            source = file.name
+            own_source = True
+        blob = self.register(digest.hexdigest(), name, size)
+        path = self.path(blob.name)
+        if os.path.exists(path):
+            if own_source:
+                os.remove(source)
+            return blob.name
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_move_safe(source, path, allow_overwrite=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(path, self.file_permissions_mode)
+        return blob.name
+
+    def register(self, digest, name, size):
+        """Строка Blob содержимого; у уже известного - свежий last_seen.
+
+        Без него повторная загрузка старого файла без ссылок выглядела бы
+        для gc_blobs мусором. Если gc_blobs как раз удалил строку (и файл),
+        она создаётся заново.
+        """
+        while True:
+            blob, created = Blob.objects.get_or_create(
+                digest=digest,
+                defaults={'name': blob_name(digest, name), 'size': size},
+            )
+            if created or Blob.objects.filter(pk=digest).update(
+                last_seen=timezone.now()
+            ):
+                return blob
+
+    def get_available_name(self, name, max_length=None):
+        # Итоговое имя задаёт хэш, подбирать свободное не нужно.
+        return name
+
+    def delete(self, name):
+        """Файл может быть нужен другим ссылкам: удаляет только gc_blobs."""
+
+    def purge(self, name):
+        """Удаляет файл с диска по-настоящему."""
+        super().delete(name)
+
+
+blob_storage = ContentAddressedStorage()
+
+
+def add_refs(name, delta):
+    if name:
+        Blob.objects.filter(name=name).update(refs=F('refs') + delta)
+
+
+def retain(name):
+    """Ещё одна ссылка на файл name (пустое имя и чужие файлы - без
+    изменений)."""
+    add_refs(name, 1)
+
+
+def release(name):
+    add_refs(name, -1)
@@ -0,0 +1,71 @@
+"""Потоковый рендеринг страниц-лент.
+
+Шаблон рендерится как обычно, но циклы {% streamfor %} (библиотека
+streaming) вместо своего содержимого оставляют метку. Всё до первой
+метки - шапка страницы - уходит клиенту сразу, затем тело цикла по
+одной итерации (запрос постов и рендеринг карточек идут уже после
+отправки шапки), затем остаток страницы.
+
+Ошибка посреди потока обрывает страницу: код ответа уже отправлен.
+"""
+import re
+
+from django.http import StreamingHttpResponse
+from django.template import loader
+
+from .routers import _pinned, is_pinned
+
+STREAM_KEY = '_stream_deferred'
+MARK = re.compile('\x00stream:(\\d+)\x00')
+
+
+def mark(index):
+    return f'\x00stream:{index}\x00'
+
+
+def _chunks(parts, deferred):
+    yield parts[0]
+    for index, text in zip(parts[1::2], parts[2::2]):
+        node, node_context = deferred[int(index)]
+        yield from node.iter_render(node_context)
+        yield text
+
+
+def _keep_pin(chunks, pinned):
+    """Каждый кусок считается с закреплением за основной БД, каким оно
+    было при рендеринге шапки (core.routers).
+
+    Тело потока рендерится, когда ReplicaPinMiddleware уже сбросило
+    закрепление запроса: без этого посты после записи читались бы из
+    реплики. Запись посреди потока закрепляет и остаток потока.
+    """
+    while True:
+        token = _pinned.set(pinned)
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        finally:
+            pinned = _pinned.get()
+            _pinned.reset(token)
+        yield chunk
+
+
+def stream_template(template_name, context=None, request=None):
+    """Куски HTML шаблона template_name.
+
+    Страница без тел циклов рендерится сразу: ошибки в ней - обычный
+    500, а не оборванный поток.
+    """
+    deferred = []
+    context = {**(context or {}), STREAM_KEY: deferred}
+    html = loader.render_to_string(template_name, context, request)
+    return _keep_pin(_chunks(MARK.split(html), deferred), is_pinned())
+
+
+def stream_render(request, template_name, context=None):
+    """Как django.shortcuts.render, но ответ - StreamingHttpResponse."""
+    return StreamingHttpResponse(
+        stream_template(template_name, context, request),
+        content_type='text/html; charset=utf-8',
+    )
@@ -0,0 +1,203 @@
+import logging
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Task
+from .routers import pin_scope
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(func=None, *, max_attempts=3, timeout=None):
+    """Регистрирует функцию как фоновую задачу.
+
+    У функции появляется метод delay(*args, **kwargs), ставящий её
+    в очередь. Аргументы должны сериализоваться в JSON.
+    """
+    if func is None:
+        return partial(task, max_attempts=max_attempts, timeout=timeout)
+    name = f'{func.__module__}.{func.__name__}'
+    func.task_name = name
+    func.max_attempts = max_attempts
+    func.timeout = timeout or settings.TASKS_DEFAULT_TIMEOUT
+    func.delay = partial(enqueue, func)
+    _registry[name] = func
+    return func
+
+
+def timeout_of(name):
+    return getattr(
+        _registry.get(name), 'timeout', settings.TASKS_DEFAULT_TIMEOUT
+    )
+
+
+def get_task(name):
+    if name not in _registry:
+        autodiscover_modules('tasks')
+    return _registry[name]
+
+
+def enqueue(func, *args, **kwargs):
+    """Ставит задачу в очередь после коммита текущей транзакции."""
+    if settings.TASKS_ALWAYS_EAGER:
+        return func(*args, **kwargs)
+    transaction.on_commit(lambda: Task.objects.create(
+        name=func.task_name,
+        args=list(args),
+        kwargs=kwargs,
+        max_attempts=func.max_attempts,
+    ))
+
+
+class Worker:
+    """Исполнитель задач из таблицы Task.
+
+    Забирает готовые к запуску задачи условным UPDATE (так несколько
+    воркеров не возьмут одну задачу), выполняет не более concurrency задач
+    одновременно, повторяет упавшие с экспоненциальной задержкой.
+    """
+
+    def __init__(self, concurrency=None, poll_interval=None):
+        self.concurrency = concurrency or settings.TASKS_CONCURRENCY
+        self.poll_interval = poll_interval or settings.TASKS_POLL_INTERVAL
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        # future -> (задача, время запуска). Снятая по таймауту задача
+        # остаётся здесь, пока её поток не освободится: он занимает
+        # место в пуле.
+        self.running = {}
+        self.timed_out = set()
+
+    def claim(self, limit):
+        now = timezone.now()
+        candidates = Task.objects.filter(
+            status=Task.PENDING, run_at__lte=now
+        ).order_by('run_at').values_list('id', flat=True)[:limit]
+        claimed = []
+        for task_id in list(candidates):
+            updated = Task.objects.filter(
+                id=task_id, status=Task.PENDING
+            ).update(
+                status=Task.RUNNING,
+                started_at=now,
+                attempts=F('attempts') + 1,
+            )
+            if updated:
+                claimed.append(Task.objects.get(id=task_id))
+        return claimed
+
+    def requeue_stale(self):
+        """Возвращает в очередь задачи, брошенные упавшим воркером.
+
+        Брошенной считается задача, которая выполняется дольше двух своих
+        таймаутов. Исчерпавшая попытки (например, каждый раз роняющая
+        воркер) помечается ошибкой, а не запускается снова.
+        """
+        now = timezone.now()
+        running = Task.objects.filter(status=Task.RUNNING)
+        requeued = 0
+        for name in set(running.values_list('name', flat=True)):
+            stale = running.filter(
+                name=name,
+                started_at__lt=now - timedelta(seconds=timeout_of(name) * 2),
+            )
+            stale.filter(attempts__gte=F('max_attempts')).update(
+                status=Task.FAILED,
+                finished_at=now,
+                error='Воркер остановился во время выполнения',
+            )
+            requeued += stale.filter(
+                attempts__lt=F('max_attempts')
+            ).update(status=Task.PENDING)
+        return requeued
+
+    def execute(self, task_obj):
+        started = time.monotonic()
+        try:
+            func = get_task(task_obj.name)
+            # Задача ставится после коммита и должна видеть его данные, а
+            # реплика может отставать. Поток пула переживает задачу, и
+            # закрепление не должно перейти к следующей.
+            with pin_scope(True):
+                func(*task_obj.args, **task_obj.kwargs)
+        except Exception:
+            self.finish(task_obj, started, error=traceback.format_exc())
+        else:
+            self.finish(task_obj, started)
+        finally:
+            close_old_connections()
+
+    def finish(self, task_obj, started, error=''):
+        duration = time.monotonic() - started
+        values = {
+            'finished_at': timezone.now(),
+            'duration': duration,
+            'error': error,
+            'status': Task.DONE,
+        }
+        if error:
+            if task_obj.attempts < task_obj.max_attempts:
+                delay = settings.TASKS_RETRY_DELAY * 2 ** task_obj.attempts
+                values['status'] = Task.PENDING
+                values['run_at'] = timezone.now() + timedelta(seconds=delay)
+            else:
+                values['status'] = Task.FAILED
+        # Условие по attempts: результат зависшей попытки, уже снятой
+        # по таймауту, не перезапишет следующую.
+        Task.objects.filter(
+            id=task_obj.id, status=Task.RUNNING, attempts=task_obj.attempts
+        ).update(**values)
+        logger.info(
+            '%s #%s: %s за %.3f с',
+            task_obj.name, task_obj.id, values['status'], duration,
+        )
+
+    def check_timeouts(self):
+        for future, (task_obj, started) in list(self.running.items()):
+            if future.done():
+                del self.running[future]
+                self.timed_out.discard(future)
+            elif future not in self.timed_out and (
+                time.monotonic() - started > timeout_of(task_obj.name)
+            ):
+                self.finish(task_obj, started, error='Превышен таймаут')
+                self.timed_out.add(future)
+
+    def run_once(self):
+        """Один цикл опроса. Возвращает число запущенных задач."""
+        self.check_timeouts()
+        free = self.concurrency - len(self.running)
+        if free <= 0:
+            return 0
+        claimed = self.claim(free)
+        for task_obj in claimed:
+            future = self.executor.submit(self.execute, task_obj)
+            self.running[future] = (task_obj, time.monotonic())
+        return len(claimed)
+
+    def run(self, burst=False):
+        """Основной цикл. burst=True - выйти, когда очередь опустеет."""
+        autodiscover_modules('tasks')
+        # Очередь читается только из основной БД: в реплике может не
+        # оказаться только что поставленных или уже взятых задач.
+        with pin_scope(True):
+            self.requeue_stale()
+            try:
+                while True:
+                    started = self.run_once()
+                    if burst and not started and not self.running:
+                        break
+                    if not started:
+                        time.sleep(self.poll_interval)
+            finally:
+                self.executor.shutdown(wait=True)
@@ -0,0 +1,68 @@
+from copy import copy
+
+from django import template
+from django.template.defaulttags import ForNode, do_for
+
+from core.streaming import STREAM_KEY, mark
+
+register = template.Library()
+
+
+class StreamForNode(ForNode):
+    """{% for %}, который при потоковом рендеринге (core.streaming)
+    откладывает тело цикла и выдаёт его по одной итерации."""
+
+    def render(self, context):
+        deferred = context.get(STREAM_KEY)
+        if deferred is None:
+            return super().render(context)
+        node_context = copy(context)
+        node_context.update({})
+        deferred.append((self, node_context))
+        return mark(len(deferred) - 1)
+
+    def iter_render(self, context):
+        parentloop = context.get('forloop', {})
+        with context.push():
+            values = self.sequence.resolve(context, ignore_failures=True)
+            if values is None:
+                values = []
+            if not hasattr(values, '__len__'):
+                values = list(values)
+            len_values = len(values)
+            if len_values < 1:
+                yield self.nodelist_empty.render(context)
+                return
+            if self.is_reversed:
+                values = reversed(values)
+            loop_dict = context['forloop'] = {'parentloop': parentloop}
+            for i, item in enumerate(values):
+                loop_dict.update(
+                    counter0=i,
+                    counter=i + 1,
+                    revcounter=len_values - i,
+                    revcounter0=len_values - i - 1,
+                    first=i == 0,
+                    last=i == len_values - 1,
+                )
+                if len(self.loopvars) > 1:
+                    context.update(dict(zip(self.loopvars, item)))
+                else:
+                    context[self.loopvars[0]] = item
+                yield ''.join(
+                    node.render_annotated(context)
+                    for node in self.nodelist_loop
+                )
+                if len(self.loopvars) > 1:
+                    context.pop()
+
+
+@register.tag
+def streamfor(parser, token):
+    """{% streamfor post in page_obj %}...{% endfor %} - как {% for %},
+    но при потоковом ответе карточки уходят клиенту по мере рендеринга."""
+    node = do_for(parser, token)
+    return StreamForNode(
+        node.loopvars, node.sequence, node.is_reversed,
+        node.nodelist_loop, node.nodelist_empty,
+    )
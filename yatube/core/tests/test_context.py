@@ -0,0 +1,45 @@
+import time
+from datetime import date
+
+from django.test import TestCase, override_settings
+
+from core.context import TIMINGS_ATTR
+from core.context_processors import year
+from posts.tests.utils import colorize_msg
+
+
+class ContextAssemblyTest(TestCase):
+    def timings(self, path):
+        response = self.client.get(path)
+        return response, getattr(response.wsgi_request, TIMINGS_ATTR)
+
+    def test_lazy_processors_run_only_when_used(self):
+        _, timings = self.timings('/about/author/')
+        msg = colorize_msg(f'Лишние context processors: {set(timings)}')
+        self.assertNotIn('messages', timings, msg)
+        self.assertNotIn('debug', timings, msg)
+        self.assertIn('year', timings, msg)
+        _, timings = self.timings('/admin/login/')
+        msg = colorize_msg('messages не выполнен для шаблона админки')
+        self.assertIn('messages', timings, msg)
+
+    def test_server_timing_header(self):
+        with override_settings(SERVER_TIMING=True):
+            response, timings = self.timings('/about/author/')
+        metrics = response['Server-Timing'].split(', ')
+        msg = colorize_msg('Server-Timing без времени context processors')
+        self.assertEqual(len(metrics), len(timings) + 1, msg)
+        self.assertTrue(metrics[-1].startswith('ctx;dur='), msg)
+        with override_settings(SERVER_TIMING=False):
+            response = self.client.get('/about/author/')
+        msg = colorize_msg('Server-Timing отдан при SERVER_TIMING = False')
+        self.assertFalse(response.has_header('Server-Timing'), msg)
+
+    def test_year_is_memoized_until_midnight(self):
+        year._year, year._expires = 1999, time.time() + 60
+        msg = colorize_msg('Год считается на каждом рендеринге')
+        self.assertEqual(year.year(None), {'year': 1999}, msg)
+        year._expires = 0
+        msg = colorize_msg('Год не пересчитан после полуночи')
+        self.assertEqual(year.year(None), {'year': date.today().year}, msg)
+        self.assertGreater(year._expires, time.time(), msg)
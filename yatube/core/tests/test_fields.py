@@ -0,0 +1,95 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.fields import StoredValue
+from posts.models import Post
+from posts.tests.utils import colorize_msg
+
+User = get_user_model()
+
+
+@override_settings(COMPRESSED_TEXT_THRESHOLD=100)
+class CompressedTextFieldTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test-user-Fields')
+
+    def stored(self, post):
+        return Post.objects.values_list(
+            StoredValue('text'), flat=True
+        ).get(id=post.id)
+
+    def test_long_text_is_compressed(self):
+        text = 'длинный текст ' * 50
+        post = Post.objects.create(text=text, author=self.user)
+        msg = colorize_msg('Длинный текст не сжат в БД')
+        self.assertIsInstance(self.stored(post), bytes, msg)
+        msg = colorize_msg('Текст после чтения из БД искажён')
+        self.assertEqual(Post.objects.get(id=post.id).text, text, msg)
+
+    def test_values_are_decompressed(self):
+        text = 'длинный текст ' * 50
+        Post.objects.create(text=text, author=self.user)
+        msg = colorize_msg('values_list вернул сжатые байты')
+        self.assertEqual(
+            list(Post.objects.values_list('text', flat=True)), [text], msg
+        )
+        self.assertEqual(Post.objects.values('text').get()['text'], text, msg)
+
+    def test_admin_finds_compressed_text(self):
+        admin = User.objects.create_superuser('test-admin-Fields')
+        post = Post.objects.create(
+            text='начало ' + 'длинный текст ' * 50 + 'иголка',
+            author=self.user,
+        )
+        self.assertIsInstance(self.stored(post), bytes)
+        self.client.force_login(admin)
+        for url in ('/admin/posts/post/', '/admin/posts/comment/'):
+            response = self.client.get(url, {'q': 'иголка'})
+            self.assertEqual(response.status_code, 200)
+        response = self.client.get('/admin/posts/post/', {'q': 'иголка'})
+        msg = colorize_msg('Поиск в админке не нашёл сжатый пост')
+        self.assertEqual(
+            list(response.context['cl'].result_list), [post], msg
+        )
+
+    def test_orm_filters_see_compressed_text(self):
+        text = 'начало ' + 'длинный текст ' * 50 + 'иголка needle'
+        post = Post.objects.create(text=text, author=self.user)
+        self.assertIsInstance(self.stored(post), bytes)
+        msg = colorize_msg('Фильтр ORM не нашёл сжатый пост')
+        for lookup in (
+            {'text__contains': 'иголка'},
+            {'text__icontains': 'NEEDLE'},
+            {'text__startswith': 'начало'},
+            {'text': text},
+        ):
+            with self.subTest(lookup=lookup):
+                self.assertEqual(
+                    list(Post.objects.filter(**lookup)), [post], msg
+                )
+
+    def test_short_text_is_searchable(self):
+        post = Post.objects.create(text='короткий', author=self.user)
+        msg = colorize_msg('Короткий текст сохранён не строкой')
+        self.assertEqual(self.stored(post), 'короткий', msg)
+        self.assertTrue(
+            Post.objects.filter(text__icontains='оротк').exists(), msg
+        )
+
+    def test_command_repacks_existing_rows(self):
+        text = 'длинный текст ' * 50
+        with self.settings(COMPRESSED_TEXT_THRESHOLD=None):
+            post = Post.objects.create(text=text, author=self.user)
+        call_command('compress_texts', stdout=StringIO())
+        msg = colorize_msg('compress_texts не сжал старую строку')
+        self.assertIsInstance(self.stored(post), bytes, msg)
+
+        with self.settings(COMPRESSED_TEXT_THRESHOLD=None):
+            call_command('compress_texts', stdout=StringIO())
+        msg = colorize_msg('compress_texts не распаковал строку')
+        self.assertEqual(self.stored(post), text, msg)
@@ -0,0 +1,27 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.lru import LRUCache
+from posts.tests.utils import colorize_msg
+
+
+class LRUCacheTest(SimpleTestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        msg = colorize_msg('LRU вытеснил не самую старую запись')
+        self.assertEqual(
+            [cache.get(key) for key in 'abc'], [1, None, 3], msg
+        )
+
+    def test_entries_expire(self):
+        cache = LRUCache(maxsize=2, ttl=60)
+        with mock.patch('core.lru.time.monotonic', return_value=0):
+            cache.set('a', 1)
+        with mock.patch('core.lru.time.monotonic', return_value=61):
+            msg = colorize_msg('Запись пережила свой срок жизни')
+            self.assertIsNone(cache.get('a'), msg)
@@ -0,0 +1,85 @@
+import cProfile
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.profiling import FILENAME, make_token, save
+from posts.tests.utils import colorize_msg
+
+
+@override_settings(PROFILE_SAMPLE_RATE=0)
+class ProfilingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.profile_dir = tempfile.mkdtemp()
+        cls.profile_settings = override_settings(PROFILE_DIR=cls.profile_dir)
+        cls.profile_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.profile_settings.disable()
+        shutil.rmtree(cls.profile_dir, ignore_errors=True)
+
+    def tearDown(self):
+        for name in os.listdir(self.profile_dir):
+            os.remove(os.path.join(self.profile_dir, name))
+
+    def profiles(self):
+        return sorted(os.listdir(self.profile_dir))
+
+    def test_sampled_request_is_saved_with_view_and_time(self):
+        with override_settings(PROFILE_SAMPLE_RATE=1):
+            self.client.get('/about/author/')
+        names = self.profiles()
+        msg = colorize_msg('Профиль запроса не сохранён')
+        self.assertEqual(len(names), 1, msg)
+        match = FILENAME.match(names[0])
+        msg = colorize_msg(f'Имя профиля без view и времени: {names[0]}')
+        self.assertIsNotNone(match, msg)
+        self.assertEqual(match['view'], 'about-author', msg)
+
+    def test_same_second_profiles_do_not_collide(self):
+        request = RequestFactory().get('/')
+        for _ in range(2):
+            save(cProfile.Profile(), request, 0.004)
+        msg = colorize_msg('Профили одной секунды и длительности совпали')
+        self.assertEqual(len(self.profiles()), 2, msg)
+        self.assertTrue(all(map(FILENAME.match, self.profiles())), msg)
+
+    def test_only_signed_header_forces_profiling(self):
+        self.client.get('/about/author/', HTTP_X_PROFILE='profile:forged')
+        msg = colorize_msg('Запрос с поддельным токеном профилирован')
+        self.assertEqual(self.profiles(), [], msg)
+        self.client.get('/about/author/', HTTP_X_PROFILE=make_token())
+        msg = colorize_msg('Запрос с токеном не профилирован')
+        self.assertEqual(len(self.profiles()), 1, msg)
+
+    def test_streamed_page_is_saved_after_body(self):
+        with override_settings(STREAM_LISTINGS=True):
+            response = self.client.get('/', HTTP_X_PROFILE=make_token())
+            msg = colorize_msg('Профиль сохранён до отдачи тела')
+            self.assertEqual(self.profiles(), [], msg)
+            b''.join(response.streaming_content)
+        msg = colorize_msg('Профиль потоковой страницы не сохранён')
+        self.assertEqual(len(self.profiles()), 1, msg)
+
+    def test_aggregate_profiles(self):
+        token = make_token()
+        for path in ('/about/author/', '/about/author/', '/about/tech/'):
+            self.client.get(path, HTTP_X_PROFILE=token)
+        out = StringIO()
+        call_command(
+            'aggregate_profiles', view=['about-author'], stdout=out
+        )
+        output = out.getvalue()
+        msg = colorize_msg('Сводка профилей не по фильтру view')
+        self.assertIn('about-author: 2 запр.', output, msg)
+        self.assertNotIn('about-tech', output, msg)
+        msg = colorize_msg('В сводке нет функций')
+        self.assertIn('function calls', output, msg)
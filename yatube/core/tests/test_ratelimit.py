@@ -0,0 +1,91 @@
+import time
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.ratelimit import (
+    CacheBucketStore, CacheLock, MemoryBucketStore, TokenBucket
+)
+from posts.models import Comment, Post
+from posts.tests.utils import colorize_msg
+
+User = get_user_model()
+
+
+class TokenBucketTest(TestCase):
+    def test_bucket_rejects_after_capacity(self):
+        bucket = TokenBucket('3/m', MemoryBucketStore())
+        results = [bucket.consume('user:1')[0] for _ in range(4)]
+        msg = colorize_msg('Корзина пропустила больше запросов, чем лимит')
+        self.assertEqual(results, [True, True, True, False], msg)
+
+    def test_buckets_are_separate_per_ident(self):
+        bucket = TokenBucket('1/m', MemoryBucketStore())
+        bucket.consume('user:1')
+        allowed, _ = bucket.consume('user:2')
+        msg = colorize_msg('Лимит одного клиента повлиял на другого')
+        self.assertTrue(allowed, msg)
+
+    def test_unlimited_scope(self):
+        bucket = TokenBucket(None, MemoryBucketStore())
+        msg = colorize_msg('Scope без лимита отклонил запрос')
+        self.assertTrue(
+            all(bucket.consume('ip:1')[0] for _ in range(100)), msg
+        )
+
+    def test_state_from_another_process_uses_wall_clock(self):
+        store = MemoryBucketStore()
+        bucket = TokenBucket('2/m', store)
+        # Другой процесс опустошил корзину минуту назад.
+        store.set('ratelimit:user:1', (0, time.time() - 60), 60)
+        msg = colorize_msg('Корзина не пополнилась по времени time.time()')
+        self.assertTrue(bucket.consume('user:1')[0], msg)
+        store.set('ratelimit:user:2', (0, time.time() + 60), 60)
+        msg = colorize_msg('Время из будущего пополнило корзину')
+        self.assertFalse(bucket.consume('user:2')[0], msg)
+
+    def test_cache_lock_is_shared(self):
+        cache.clear()
+        store = CacheBucketStore('default')
+        with store.lock('ratelimit:user:1') as held:
+            msg = colorize_msg('Блокировка корзины не взята')
+            self.assertTrue(held.acquired, msg)
+            other = CacheLock(cache, 'ratelimit:user:1')
+            other.WAIT = 0
+            with other:
+                msg = colorize_msg('Блокировку взяли дважды')
+                self.assertFalse(other.acquired, msg)
+        with store.lock('ratelimit:user:1') as held:
+            msg = colorize_msg('Блокировка не снята после выхода')
+            self.assertTrue(held.acquired, msg)
+
+
+@override_settings(RATELIMIT_RATES={'add_comment': '2/m'})
+class RateLimitViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test-user-RateLimit')
+        cls.post = Post.objects.create(text='post-text', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_comment_storm_is_rejected(self):
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.id})
+        for _ in range(2):
+            self.authorized_client.post(url, {'text': 'comment'})
+        response = self.authorized_client.post(url, {'text': 'comment'})
+        msg = colorize_msg('Третий комментарий за минуту не отклонён')
+        self.assertEqual(
+            response.status_code, HTTPStatus.TOO_MANY_REQUESTS, msg
+        )
+        self.assertEqual(Comment.objects.count(), 2, msg)
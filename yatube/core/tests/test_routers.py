@@ -0,0 +1,74 @@
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.middleware import ReplicaPinMiddleware
+from core.routers import ReplicaRouter
+from core.streaming import stream_render
+from posts.models import Post
+from posts.tests.utils import colorize_msg
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def run_request(self, request, write=False):
+        def view(request):
+            routed = self.router.db_for_read(Post)
+            if write:
+                self.router.db_for_write(Post)
+            return HttpResponse(routed)
+        return ReplicaPinMiddleware(view)(request)
+
+    def test_reads_go_to_replica(self):
+        response = self.run_request(self.factory.get('/'))
+        msg = colorize_msg('Чтение в GET-запросе ушло не в реплику')
+        self.assertEqual(response.content, b'replica', msg)
+
+    def test_write_pins_client_to_primary(self):
+        response = self.run_request(self.factory.get('/'), write=True)
+        cookie = response.cookies.get('pin_primary')
+        msg = colorize_msg('После записи клиент не закреплён за основной БД')
+        self.assertIsNotNone(cookie, msg)
+
+        request = self.factory.get('/')
+        request.COOKIES['pin_primary'] = '1'
+        response = self.run_request(request)
+        self.assertEqual(response.content, b'default', msg)
+
+    def test_post_reads_from_primary(self):
+        response = self.run_request(self.factory.post('/'))
+        msg = colorize_msg('Чтение в POST-запросе ушло в реплику')
+        self.assertEqual(response.content, b'default', msg)
+
+    def test_streamed_body_keeps_pin(self):
+        routed = []
+
+        class Posts:
+            def __iter__(inner):
+                routed.append(self.router.db_for_read(Post))
+                return iter([])
+
+        def view(request):
+            return stream_render(
+                request, 'posts/popular.html', {'page_obj': Posts()}
+            )
+
+        response = ReplicaPinMiddleware(view)(self.factory.post('/'))
+        b''.join(response.streaming_content)
+        msg = colorize_msg('Посты в теле потока читаются мимо закрепления')
+        self.assertEqual(routed, ['default'], msg)
+
+    def test_async_chain_pins_after_write(self):
+        async def view(request):
+            self.router.db_for_write(Post)
+            return HttpResponse(self.router.db_for_read(Post))
+
+        middleware = ReplicaPinMiddleware(view)
+        response = async_to_sync(middleware)(self.factory.get('/'))
+        msg = colorize_msg('Асинхронный запрос не закрепился после записи')
+        self.assertEqual(response.content, b'default', msg)
+        self.assertIsNotNone(response.cookies.get('pin_primary'), msg)
@@ -0,0 +1,131 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts.tests.utils import colorize_msg
+
+TEMP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SOURCE_DIR = os.path.join(TEMP_ROOT, 'source')
+STATIC_ROOT = os.path.join(TEMP_ROOT, 'static')
+MEDIA_ROOT = os.path.join(TEMP_ROOT, 'media')
+CSS = b'body { color: black; }\n' * 50
+manifest_storage = override_settings(
+    STATICFILES_STORAGE=(
+        'core.staticfiles.CompressedManifestStaticFilesStorage'
+    ),
+)
+
+
+@override_settings(
+    STATIC_ROOT=STATIC_ROOT,
+    MEDIA_ROOT=MEDIA_ROOT,
+    STATICFILES_DIRS=[SOURCE_DIR],
+    STATICFILES_FINDERS=[
+        'django.contrib.staticfiles.finders.FileSystemFinder',
+    ],
+)
+class ServingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(SOURCE_DIR, 'css'))
+        with open(os.path.join(SOURCE_DIR, 'css', 'site.css'), 'wb') as f:
+            f.write(CSS)
+        for name in ('blobs/ab/cd/abcd.gif', 'posts/old.gif'):
+            path = os.path.join(MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(b'GIF89a')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_ROOT, ignore_errors=True)
+
+    def collect(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        return staticfiles_storage.url('css/site.css')
+
+    @manifest_storage
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        url = self.collect()
+        msg = colorize_msg('В имени статики нет хэша')
+        self.assertRegex(url, r'/static/css/site\.[0-9a-f]{12}\.css$', msg)
+        msg = colorize_msg('Нет сжатой копии .gz')
+        with open(STATIC_ROOT + url[len('/static'):] + '.gz', 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), CSS, msg)
+
+    @manifest_storage
+    def test_hashed_static_is_immutable_and_precompressed(self):
+        url = self.collect()
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        msg = colorize_msg('Статика с хэшем кэшируется не навсегда')
+        self.assertIn('immutable', response['Cache-Control'], msg)
+        msg = colorize_msg('Не отдана готовая сжатая копия')
+        self.assertEqual(response['Content-Encoding'], 'gzip', msg)
+        self.assertEqual(response['Content-Type'], 'text/css', msg)
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)), CSS, msg
+        )
+
+        response = self.client.get('/static/css/site.css')
+        msg = colorize_msg('Статика без хэша кэшируется навсегда')
+        self.assertNotIn('immutable', response['Cache-Control'], msg)
+        self.assertFalse(response.has_header('Content-Encoding'), msg)
+
+    @manifest_storage
+    def test_refused_encodings_are_not_sent(self):
+        url = self.collect()
+        for header in ('gzip;q=0', 'xbr, gzip; q=0.0', 'identity', 'x-gzip2'):
+            with self.subTest(header=header):
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING=header)
+                msg = colorize_msg(
+                    f'Сжатая копия отдана при Accept-Encoding: {header}'
+                )
+                self.assertFalse(response.has_header('Content-Encoding'), msg)
+        response = self.client.get(
+            url, HTTP_ACCEPT_ENCODING='br;q=0, gzip;q=0.5'
+        )
+        msg = colorize_msg('Не отдана принятая с весом кодировка')
+        self.assertEqual(response['Content-Encoding'], 'gzip', msg)
+
+    def test_media_cache_headers(self):
+        response = self.client.get('/media/blobs/ab/cd/abcd.gif')
+        msg = colorize_msg('Файл по хэшу кэшируется не навсегда')
+        self.assertIn('immutable', response['Cache-Control'], msg)
+        response = self.client.get('/media/posts/old.gif')
+        msg = colorize_msg('Обычный файл медиа кэшируется навсегда')
+        self.assertIn(
+            f'max-age={settings.MEDIA_CACHE_MAX_AGE}',
+            response['Cache-Control'], msg,
+        )
+        response = self.client.get(
+            '/media/posts/old.gif',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        msg = colorize_msg('Нет 304 для неизменённого файла')
+        self.assertEqual(response.status_code, 304, msg)
+
+    def test_outside_and_missing_media_are_404(self):
+        for path in ('../source/css/site.css', 'posts/missing.gif'):
+            with self.subTest(path=path):
+                response = self.client.get(f'/media/{path}')
+                msg = colorize_msg(f'/media/{path} отдан наружу')
+                self.assertEqual(response.status_code, 404, msg)
+
+    @override_settings(SENDFILE_HEADER='X-Accel-Redirect')
+    def test_sendfile_hands_file_to_web_server(self):
+        response = self.client.get('/media/posts/old.gif')
+        msg = colorize_msg('Файл не передан веб-серверу')
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected/media/posts/old.gif',
+            msg,
+        )
+        self.assertEqual(response.content, b'', msg)
+        self.assertEqual(response['Content-Type'], 'image/gif', msg)
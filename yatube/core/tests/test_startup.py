@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from posts.tests.utils import colorize_msg
+
+# Пакеты rest_framework и djoser загружаются как приложения, но их
+# тяжёлые модули нужны только API.
+LAZY = (
+    'debug_toolbar', 'rest_framework.views', 'rest_framework.serializers',
+    'djoser.views', 'api.urls',
+)
+SCRIPT = '''
+import sys
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+from django.urls import resolve, reverse
+resolve('/')
+reverse('posts:index')
+print(*[name for name in {modules!r} if name in sys.modules])
+print(reverse('api:posts-detail', args=[1]), resolve('/api/v1/').view_name)
+'''
+
+
+class StartupTest(SimpleTestCase):
+    def test_production_worker_skips_dev_apps_and_api_imports(self):
+        result = subprocess.run(
+            [sys.executable, '-c', SCRIPT.format(modules=LAZY)],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+            env={**os.environ, 'YATUBE_DEBUG': '0'},
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        loaded, api = result.stdout.splitlines()
+        msg = colorize_msg(f'При запуске импортированы: {loaded}')
+        self.assertEqual(loaded, '', msg)
+        msg = colorize_msg('Отложенный URLconf API не работает')
+        self.assertEqual(api, '/api/v1/posts/1/ api:api-root', msg)
+
+    def test_bench_startup(self):
+        out = StringIO()
+        call_command(
+            'bench_startup', mode=['production'], runs=1, limit=3,
+            stdout=out,
+        )
+        lines = out.getvalue().splitlines()
+        msg = colorize_msg('bench_startup не показал время запуска')
+        self.assertTrue(lines[0].startswith('production: запуск'), msg)
+        self.assertEqual(len(lines), 4, msg)
@@ -0,0 +1,116 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from core.models import Blob
+from core.storage import blob_storage
+from posts.models import Post, UploadSession
+from posts.tests.utils import colorize_msg
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+IMAGE = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, BLOB_GC_GRACE=0)
+class ContentAddressedStorageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test-user-Storage')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def post(self, name='pic.gif'):
+        return Post.objects.create(
+            text='картинка', author=self.user,
+            image=SimpleUploadedFile(name, IMAGE, content_type='image/gif'),
+        )
+
+    def test_same_content_is_stored_once(self):
+        first = self.post()
+        second = self.post('repost.GIF')
+        msg = colorize_msg('Одинаковые картинки сохранены разными файлами')
+        self.assertEqual(first.image.name, second.image.name, msg)
+        self.assertEqual(Blob.objects.count(), 1, msg)
+        blob_dir = os.path.dirname(first.image.path)
+        self.assertEqual(os.listdir(blob_dir), [
+            os.path.basename(first.image.name)
+        ], msg)
+        msg = colorize_msg('Ссылки на файл не посчитаны')
+        self.assertEqual(Blob.objects.get().refs, 2, msg)
+
+    def test_thumbnails_are_shared(self):
+        first = self.post()
+        second = self.post('repost.gif')
+        msg = colorize_msg('Миниатюры одинаковых картинок не общие')
+        self.assertEqual(
+            get_thumbnail(first.image, '10x10').name,
+            get_thumbnail(second.image, '10x10').name,
+            msg,
+        )
+
+    def test_gc_keeps_referenced_and_removes_orphans(self):
+        post = self.post()
+        path = post.image.path
+        Blob.objects.update(refs=0)
+        call_command('gc_blobs', stdout=StringIO())
+        msg = colorize_msg('gc_blobs удалил файл, на который есть ссылка')
+        self.assertTrue(os.path.exists(path), msg)
+        self.assertEqual(Blob.objects.get().refs, 1, msg)
+
+        post.delete()
+        msg = colorize_msg('Удаление поста не отпустило ссылку')
+        self.assertEqual(Blob.objects.get().refs, 0, msg)
+        call_command('gc_blobs', stdout=StringIO())
+        msg = colorize_msg('gc_blobs не удалил файл без ссылок')
+        self.assertFalse(os.path.exists(path), msg)
+        self.assertFalse(Blob.objects.exists(), msg)
+
+    @override_settings(BLOB_GC_GRACE=60)
+    def test_dedupe_onto_old_orphan_survives_gc(self):
+        self.post().delete()
+        Blob.objects.update(last_seen=timezone.now() - timedelta(hours=1))
+        name = Blob.objects.get().name
+        stored = blob_storage.save(
+            'again.gif', SimpleUploadedFile('again.gif', IMAGE)
+        )
+        self.assertEqual(stored, name)
+        call_command('gc_blobs', stdout=StringIO())
+        msg = colorize_msg(
+            'gc_blobs удалил файл без ссылок, который только что сохранили'
+        )
+        self.assertTrue(blob_storage.exists(name), msg)
+        self.assertTrue(Blob.objects.exists(), msg)
+
+    def test_pending_upload_is_a_reference(self):
+        self.post().delete()
+        name = Blob.objects.get().name
+        UploadSession.objects.create(
+            user=self.user, filename='pic.gif', size=len(IMAGE),
+            received=len(IMAGE), stored_name=name,
+        )
+        call_command('gc_blobs', stdout=StringIO())
+        msg = colorize_msg('gc_blobs удалил файл незавершённой загрузки')
+        self.assertTrue(blob_storage.exists(name), msg)
+        self.assertEqual(Blob.objects.get().refs, 1, msg)
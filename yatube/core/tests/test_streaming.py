@@ -0,0 +1,94 @@
+import gzip
+import os
+import tempfile
+import zlib
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from posts.models import Group, Post
+from posts.tests.utils import colorize_msg
+
+User = get_user_model()
+
+
+class StreamingListingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='test-user-Streaming')
+        cls.group = Group.objects.create(title='Группа', slug='stream')
+        Post.objects.bulk_create([
+            Post(text=f'пост {i}', author=cls.user, group=cls.group)
+            for i in range(5)
+        ])
+        cls.paths = (
+            '/', '/popular/', f'/group/{cls.group.slug}/',
+            f'/profile/{cls.user.username}/',
+        )
+
+    def get(self, path, stream, **headers):
+        cache.clear()
+        with override_settings(STREAM_LISTINGS=stream):
+            return self.client.get(path, **headers)
+
+    def test_stream_matches_buffered_page(self):
+        for path in self.paths:
+            with self.subTest(path=path):
+                buffered = self.get(path, stream=False)
+                streamed = self.get(path, stream=True)
+                msg = colorize_msg(f'{path} не отдаётся потоком')
+                self.assertTrue(streamed.streaming, msg)
+                msg = colorize_msg(f'{path}: поток отличается от страницы')
+                self.assertEqual(
+                    b''.join(streamed.streaming_content),
+                    buffered.content, msg,
+                )
+
+    def test_header_is_sent_before_posts(self):
+        response = self.get(f'/group/{self.group.slug}/', stream=True)
+        chunks = iter(response.streaming_content)
+        head = next(chunks).decode()
+        msg = colorize_msg('Шапка страницы ждёт рендеринга постов')
+        self.assertIn('<h1>Группа</h1>', head, msg)
+        self.assertNotIn('<article>', head, msg)
+        self.assertIn('<article>', next(chunks).decode(), msg)
+
+    def test_gzip_stream_flushes_each_chunk(self):
+        buffered = self.get('/', stream=False)
+        response = self.get('/', stream=True, HTTP_ACCEPT_ENCODING='gzip')
+        msg = colorize_msg('Поток не сжат')
+        self.assertEqual(response['Content-Encoding'], 'gzip', msg)
+        chunks = list(response.streaming_content)
+        msg = colorize_msg('Первый кусок нельзя распаковать до конца потока')
+        head = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(chunks[0])
+        self.assertIn(b'<html', head, msg)
+        msg = colorize_msg('Сжатый поток искажает страницу')
+        self.assertEqual(
+            gzip.decompress(b''.join(chunks)), buffered.content, msg
+        )
+
+    def test_gzip_skips_small_and_binary_responses(self):
+        with override_settings(GZIP_MIN_LENGTH=10 ** 6):
+            response = self.client.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        msg = colorize_msg('Короткий ответ сжат')
+        self.assertFalse(response.has_header('Content-Encoding'), msg)
+        with tempfile.TemporaryDirectory() as media_root:
+            with open(os.path.join(media_root, 'pic.gif'), 'wb') as f:
+                f.write(b'GIF89a' + b'\x00' * 4096)
+            with override_settings(MEDIA_ROOT=media_root):
+                response = self.client.get(
+                    '/media/pic.gif', HTTP_ACCEPT_ENCODING='gzip'
+                )
+                response.close()
+        msg = colorize_msg('Картинка сжата gzip')
+        self.assertFalse(response.has_header('Content-Encoding'), msg)
+
+    def test_gzip_respects_zero_weight(self):
+        for header in ('gzip;q=0', 'x-gzip2, br'):
+            with self.subTest(header=header):
+                response = self.get(
+                    '/', stream=True, HTTP_ACCEPT_ENCODING=header
+                )
+                msg = colorize_msg(f'Ответ сжат при Accept-Encoding: {header}')
+                self.assertFalse(response.has_header('Content-Encoding'), msg)
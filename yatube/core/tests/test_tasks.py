@@ -0,0 +1,145 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import Task
+from core.routers import is_pinned
+from core.tasks import Worker, task
+from posts.tests.utils import colorize_msg
+
+calls = []
+
+
+@task(max_attempts=2)
+def remember(value):
+    calls.append(value)
+
+
+@task
+def remember_pin():
+    calls.append(is_pinned())
+
+
+@task(timeout=0.01)
+def hang():
+    pass
+
+
+@task(timeout=settings.TASKS_DEFAULT_TIMEOUT * 10)
+def slow():
+    pass
+
+
+@task(max_attempts=2)
+def explode():
+    raise ValueError('boom')
+
+
+class WorkerTest(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.worker = Worker(concurrency=2)
+
+    def tearDown(self):
+        self.worker.executor.shutdown()
+
+    def run_claimed(self):
+        for task_obj in self.worker.claim(10):
+            self.worker.execute(task_obj)
+
+    def test_delay_enqueues_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            remember.delay(42)
+        msg = colorize_msg('Задача не попала в очередь после коммита')
+        self.assertTrue(
+            Task.objects.filter(name=remember.task_name, args=[42]).exists(),
+            msg,
+        )
+
+    def test_task_is_executed_once(self):
+        Task.objects.create(name=remember.task_name, args=[1])
+        self.run_claimed()
+        self.run_claimed()
+        msg = colorize_msg('Задача выполнена не ровно один раз')
+        self.assertEqual(calls, [1], msg)
+        task_obj = Task.objects.get()
+        self.assertEqual(task_obj.status, Task.DONE, msg)
+        self.assertIsNotNone(task_obj.duration, msg)
+
+    def test_failed_task_is_retried_then_marked_failed(self):
+        Task.objects.create(name=explode.task_name, max_attempts=2)
+        self.run_claimed()
+        task_obj = Task.objects.get()
+        msg = colorize_msg('Упавшая задача не возвращена в очередь')
+        self.assertEqual(task_obj.status, Task.PENDING, msg)
+
+        Task.objects.update(run_at=task_obj.created)
+        self.run_claimed()
+        task_obj.refresh_from_db()
+        msg = colorize_msg('Задача не помечена ошибкой после всех попыток')
+        self.assertEqual(task_obj.status, Task.FAILED, msg)
+        self.assertIn('boom', task_obj.error, msg)
+
+    def test_task_reads_from_primary_and_leaves_thread_unpinned(self):
+        Task.objects.create(name=remember_pin.task_name)
+        worker = Worker(concurrency=1)
+        # Итог пишется из потока пула: мимо транзакции теста.
+        worker.finish = lambda *args, **kwargs: None
+        for task_obj in worker.claim(1):
+            worker.executor.submit(worker.execute, task_obj).result()
+        msg = colorize_msg('Задача читает не из основной БД')
+        self.assertEqual(calls, [True], msg)
+        msg = colorize_msg('Поток пула остался закреплён после задачи')
+        self.assertFalse(worker.executor.submit(is_pinned).result(), msg)
+        worker.executor.shutdown()
+
+    def test_timed_out_task_keeps_its_slot(self):
+        Task.objects.bulk_create([Task(name=hang.task_name) for _ in range(2)])
+        release = threading.Event()
+        worker = Worker(concurrency=1)
+        # Поток задачи занят, пока тест его не отпустит.
+        worker.execute = lambda task_obj: release.wait(5)
+        self.assertEqual(worker.run_once(), 1)
+        time.sleep(0.02)
+        msg = colorize_msg('Место зависшей задачи отдано следующей')
+        self.assertEqual(worker.run_once(), 0, msg)
+        self.assertEqual(
+            Task.objects.filter(status=Task.RUNNING).count(), 0, msg
+        )
+        release.set()
+        for future in list(worker.running):
+            future.result()
+        msg = colorize_msg('Освободившееся место не занято')
+        self.assertEqual(worker.run_once(), 1, msg)
+        worker.executor.shutdown()
+
+    def test_requeue_stale_uses_task_timeout_and_attempts(self):
+        started_at = timezone.now() - timedelta(
+            seconds=settings.TASKS_DEFAULT_TIMEOUT * 3
+        )
+        tasks = [
+            Task.objects.create(
+                name=name, status=Task.RUNNING, started_at=started_at,
+                attempts=attempts, max_attempts=2,
+            )
+            for name, attempts in (
+                (remember.task_name, 1),
+                (remember.task_name, 2),
+                (slow.task_name, 1),
+            )
+        ]
+        self.worker.requeue_stale()
+        statuses = [
+            Task.objects.get(id=task_obj.id).status for task_obj in tasks
+        ]
+        msg = colorize_msg(
+            'Брошенные задачи возвращены в очередь не по своему таймауту '
+            'и попыткам'
+        )
+        self.assertEqual(
+            statuses, [Task.PENDING, Task.FAILED, Task.RUNNING], msg
+        )
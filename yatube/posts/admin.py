@@ -1,16 +1,94 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+
+from core.admin import LargeTableAdmin
 
 from .models import Comment, Group, Post
+from .moderation import delete_posts_by_authors, move_posts, purge_comments
+
+
+class ModerationActionForm(ActionForm):
+    confirm = forms.BooleanField(
+        required=False, label='Подтверждаю удаление'
+    )
+
+
+class PostActionForm(ModerationActionForm):
+    group = forms.ModelChoiceField(
+        Group.objects.all(), required=False, label='Сообщество'
+    )
+
+
+def confirmed(modeladmin, request):
+    if request.POST.get('confirm'):
+        return True
+    modeladmin.message_user(
+        request, 'Отметьте "Подтверждаю удаление".', messages.WARNING
+    )
+    return False
 
 
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(LargeTableAdmin):
     """Управление постами."""
 
     list_display = ('pk', 'text', 'created', 'author', 'group',)
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
     list_filter = ['created']
+    date_hierarchy = 'created'
     empty_value_display = '-пусто-'
+    action_form = PostActionForm
+    actions = ('move_to_group', 'delete_by_authors', 'purge_post_comments')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer(
+            'preview', 'rendered_html'
+        )
+
+    @admin.action(description='Перенести в выбранное сообщество')
+    def move_to_group(self, request, queryset):
+        group_id = request.POST.get('group')
+        group = Group.objects.filter(pk=group_id).first() if group_id else None
+        if group_id and group is None:
+            self.message_user(
+                request, 'Сообщество не найдено.', messages.WARNING
+            )
+            return
+        # Без сообщества посты из него убираются - только с подтверждением.
+        if group is None and not request.POST.get('confirm'):
+            self.message_user(
+                request,
+                'Выберите сообщество или отметьте "Подтверждаю удаление", '
+                'чтобы убрать посты из сообществ.',
+                messages.WARNING,
+            )
+            return
+        self.run_bulk(
+            request, 'Перенесено постов', move_posts, queryset, group
+        )
+
+    @admin.action(description='Удалить все посты авторов выбранных постов')
+    def delete_by_authors(self, request, queryset):
+        if not confirmed(self, request):
+            return
+        author_ids = list(queryset.order_by().values_list(
+            'author_id', flat=True
+        ).distinct())
+        self.run_bulk(
+            request, 'Удалено постов', delete_posts_by_authors, author_ids
+        )
+
+    @admin.action(description='Удалить комментарии к выбранным постам')
+    def purge_post_comments(self, request, queryset):
+        if not confirmed(self, request):
+            return
+        self.run_bulk(
+            request, 'Удалено комментариев', purge_comments,
+            Comment.objects.filter(post__in=queryset.values('pk')),
+        )
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -21,12 +99,30 @@ class GroupAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     """Управление комментариями."""
 
     list_display = ('post', 'text', 'author')
-    search_fields = ('post', 'text')
+    list_select_related = ('post', 'author')
+    autocomplete_fields = ('post', 'author')
+    search_fields = ('text', 'author__username')
+    date_hierarchy = 'created'
     empty_value_display = '-пусто-'
+    action_form = ModerationActionForm
+    actions = ('purge',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer(
+            'rendered_html', 'post__preview', 'post__rendered_html'
+        )
+
+    @admin.action(description='Удалить выбранные комментарии пачками')
+    def purge(self, request, queryset):
+        if not confirmed(self, request):
+            return
+        self.run_bulk(
+            request, 'Удалено комментариев', purge_comments, queryset
+        )
 
 
 admin.site.register(Post, PostAdmin)
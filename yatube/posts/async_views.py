@@ -0,0 +1,187 @@
+"""Асинхронные версии страниц с лентами и постом для работы под ASGI.
+
+Независимые запросы к БД (страница постов и счётчики) выполняются
+одновременно в отдельных потоках; автор и сообщество берутся из
+posts.identity.
+"""
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db import close_old_connections
+from django.http import Http404, JsonResponse
+from django.shortcuts import render
+
+from .follow_cache import is_following
+from .forms import CommentForm
+from .identity import get_group_or_404, get_user_or_404
+from .models import Comment, Post
+from .utils import ListingCacheMiddleware, get_suggestions
+
+
+def _in_own_thread(func):
+    @wraps(func)
+    def wrapper():
+        close_old_connections()
+        try:
+            return func()
+        finally:
+            close_old_connections()
+    return wrapper
+
+
+async def gather_queries(*funcs):
+    """Выполняет синхронные функции с запросами к БД одновременно.
+
+    При ASYNC_DB_CONCURRENT = False выполняет их по очереди в общем потоке
+    (нужно, например, в тестах, где данные видны только в транзакции
+    основного соединения).
+    """
+    if not settings.ASYNC_DB_CONCURRENT:
+        return [await sync_to_async(func)() for func in funcs]
+    return await asyncio.gather(*(
+        sync_to_async(_in_own_thread(func), thread_sensitive=False)()
+        for func in funcs
+    ))
+
+
+def async_cache_page(timeout):
+    """Аналог listing_cache_page для асинхронных view."""
+    middleware = ListingCacheMiddleware(
+        lambda request: None, page_timeout=timeout
+    )
+
+    def decorator(view_func):
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            response = await sync_to_async(middleware.process_request)(
+                request
+            )
+            if response is not None:
+                return response
+            response = await view_func(request, *args, **kwargs)
+            return await sync_to_async(middleware.process_response)(
+                request, response
+            )
+        return wrapper
+    return decorator
+
+
+def _page_number(request):
+    try:
+        return max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        return 1
+
+
+def _page_queries(request, post_list):
+    """Запросы страницы: (кол-во постов, посты страницы)."""
+    per_page = settings.NUMBER_OF_POSTS_ON_ONE_PAGE
+    number = _page_number(request)
+    bottom = (number - 1) * per_page
+    return (
+        post_list.count,
+        lambda: list(post_list[bottom:bottom + per_page]),
+    )
+
+
+async def _build_page(request, post_list, count, items):
+    """Собирает Page из заранее полученных count и постов страницы."""
+    paginator = Paginator(post_list, settings.NUMBER_OF_POSTS_ON_ONE_PAGE)
+    paginator.count = count
+    number = _page_number(request)
+    if number > paginator.num_pages:
+        # Как Paginator.get_page: за последней страницей - последняя.
+        number = paginator.num_pages
+        items = await sync_to_async(
+            lambda: list(paginator.page(number).object_list)
+        )()
+    return Page(items, number, paginator)
+
+
+async def _user_id(request):
+    """Получает пользователя из сессии вне цикла событий."""
+    def load():
+        return request.user.id if request.user.is_authenticated else None
+    return await sync_to_async(load)()
+
+
+async def _render(request, template_name, context):
+    return await sync_to_async(render)(request, template_name, context)
+
+
+@async_cache_page(20)
+async def index(request):
+    post_list = Post.objects.listing().select_related('group', 'author')
+    count, items = await gather_queries(*_page_queries(request, post_list))
+    page_obj = await _build_page(request, post_list, count, items)
+    return await _render(request, 'posts/index.html', {'page_obj': page_obj})
+
+
+async def group_posts(request, slug):
+    group = await sync_to_async(get_group_or_404)(slug)
+    post_list = Post.objects.listing().filter(
+        group_id=group.id
+    ).select_related('author', 'group')
+    count, items = await gather_queries(*_page_queries(request, post_list))
+    page_obj = await _build_page(request, post_list, count, items)
+    context = {
+        'group': group,
+        'page_obj': page_obj,
+    }
+    return await _render(request, 'posts/group_list.html', context)
+
+
+async def profile(request, username):
+    user_id = await _user_id(request)
+    author = await sync_to_async(get_user_or_404)(username)
+    post_list = Post.objects.listing().filter(
+        author_id=author.id
+    ).select_related('author', 'group')
+    count, items = await gather_queries(*_page_queries(request, post_list))
+    following = (
+        user_id is not None
+        and user_id != author.id
+        and await sync_to_async(is_following)(user_id, author.id)
+    )
+    page_obj = await _build_page(request, post_list, count, items)
+    context = {
+        'author': author,
+        'page_obj': page_obj,
+        'following': following,
+        'suggestions': await sync_to_async(get_suggestions)(request.user),
+    }
+    return await _render(request, 'posts/profile.html', context)
+
+
+async def post_detail(request, post_id):
+    post, comments = await gather_queries(
+        Post.objects.select_related('author', 'group').filter(
+            pk=post_id
+        ).first,
+        lambda: list(Comment.objects.filter(
+            post_id=post_id
+        ).select_related('author').defer('text')),
+    )
+    if post is None:
+        raise Http404
+    context = {
+        'post': post,
+        'form': CommentForm(request.POST or None),
+        'comments': comments,
+    }
+    return await _render(request, 'posts/post_detail.html', context)
+
+
+async def get_post(request, post_id):
+    from posts.serializers import PostSerializer
+
+    if request.method == 'GET':
+        post = await sync_to_async(
+            Post.objects.filter(id=post_id).first
+        )()
+        if post is None:
+            raise Http404
+        return JsonResponse(PostSerializer(post).data)
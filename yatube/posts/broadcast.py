@@ -0,0 +1,148 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Max
+
+from .models import Post
+
+
+class Subscription:
+    """Подписка одного SSE-соединения на набор каналов.
+
+    Копит число новых постов с момента последней отправки клиенту.
+    """
+
+    def __init__(self, channels, loop):
+        self.channels = frozenset(channels)
+        self.loop = loop
+        self.pending = 0
+        self.event = asyncio.Event()
+
+    def notify(self):
+        self.pending += 1
+        self.event.set()
+
+    async def wait(self):
+        """Ждёт новых постов, возвращает их число и обнуляет счётчик."""
+        await self.event.wait()
+        self.event.clear()
+        count, self.pending = self.pending, 0
+        return count
+
+
+class Broadcaster:
+    """Раздаёт события о новых постах подписанным SSE-соединениям.
+
+    Публикация не трогает БД: один проход по подписчикам канала и
+    один call_soon_threadsafe на каждый цикл событий.
+    """
+
+    def __init__(self):
+        self._channels = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channels):
+        subscription = Subscription(channels, asyncio.get_running_loop())
+        with self._lock:
+            for channel in subscription.channels:
+                self._channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._channels.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[channel]
+
+    def subscribers_count(self):
+        with self._lock:
+            return len(set().union(*self._channels.values()))
+
+    def publish(self, channels):
+        """Сообщает о новом посте всем подписчикам любого из каналов.
+
+        Можно вызывать из любого потока.
+        """
+        by_loop = defaultdict(set)
+        with self._lock:
+            for channel in channels:
+                for subscription in self._channels.get(channel, ()):
+                    by_loop[subscription.loop].add(subscription)
+        for loop, subscriptions in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(self._deliver, subscriptions)
+            except RuntimeError:
+                # Цикл событий уже закрыт: соединения мертвы.
+                pass
+
+    @staticmethod
+    def _deliver(subscriptions):
+        for subscription in subscriptions:
+            subscription.notify()
+
+
+def post_channels(author_id, group_id):
+    """Каналы, в которых появился пост: общая лента, группа, автор."""
+    channels = ['all', f'author:{author_id}']
+    if group_id:
+        channels.append(f'group:{group_id}')
+    return channels
+
+
+class PostPoller:
+    """Источник событий для Broadcaster: новые посты из БД.
+
+    Посты создаются в любом процессе (воркеры WSGI, API, админка), а
+    сигналы видны только своему процессу. Поэтому, пока открыт хоть один
+    поток, раз в SSE_POLL_SECONDS выбираются посты с id больше последнего
+    увиденного. id растут в порядке коммитов: записи в SQLite идут по
+    одной.
+    """
+
+    def __init__(self, broadcaster):
+        self.broadcaster = broadcaster
+        self.streams = 0
+        self.last_id = None
+        self.task = None
+
+    def acquire(self):
+        """Поток открыт: опрос идёт в текущем цикле событий."""
+        self.streams += 1
+        if self.task is None:
+            self.task = asyncio.ensure_future(self.run())
+
+    def release(self):
+        self.streams -= 1
+        if not self.streams:
+            self.task.cancel()
+            self.task = None
+            self.last_id = None
+
+    async def run(self):
+        while True:
+            await sync_to_async(self.poll)()
+            await asyncio.sleep(settings.SSE_POLL_SECONDS)
+
+    def poll(self):
+        """Рассылает посты, появившиеся с прошлого опроса."""
+        posts = Post.objects.order_by('id')
+        if self.last_id is None:
+            self.last_id = posts.aggregate(last=Max('id'))['last'] or 0
+            return
+        new = list(posts.filter(id__gt=self.last_id).values_list(
+            'id', 'author_id', 'group_id'
+        )[:settings.SSE_POLL_LIMIT])
+        for post_id, author_id, group_id in new:
+            self.broadcaster.publish(post_channels(author_id, group_id))
+            self.last_id = post_id
+
+
+broadcaster = Broadcaster()
+post_poller = PostPoller(broadcaster)
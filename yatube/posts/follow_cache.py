@@ -0,0 +1,66 @@
+"""Кэш графа подписок.
+
+Для каждого пользователя в кэше хранится отсортированный массив id авторов,
+на которых он подписан (array('I') в байтах: 4 байта на подписку).
+Проверка подписки - двоичный поиск без запроса к БД.
+
+Кэш - FOLLOW_CACHE из CACHES, общий для всех процессов. Запись
+пользователя сбрасывается после коммита любой подписки или отписки
+(posts.signals), в том числе удалённой каскадом вместе с автором.
+Без FOLLOW_CACHE массив каждый раз читается из БД: кэш одного процесса
+не узнал бы о подписках из других.
+"""
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Follow
+
+
+def _key(user_id):
+    return f'following:{user_id}'
+
+
+def _cache():
+    if settings.FOLLOW_CACHE is None:
+        return None
+    return caches[settings.FOLLOW_CACHE]
+
+
+def _load(user_id):
+    return array('I', Follow.objects.filter(
+        user_id=user_id
+    ).order_by('author_id').values_list('author_id', flat=True))
+
+
+def get_following(user_id):
+    """Отсортированный массив id авторов, на которых подписан user_id."""
+    cache = _cache()
+    if cache is None:
+        return _load(user_id)
+    data = cache.get(_key(user_id))
+    if data is None:
+        following = _load(user_id)
+        cache.set(
+            _key(user_id), following.tobytes(),
+            settings.FOLLOW_CACHE_TIMEOUT,
+        )
+        return following
+    following = array('I')
+    following.frombytes(data)
+    return following
+
+
+def is_following(user_id, author_id):
+    following = get_following(user_id)
+    index = bisect_left(following, author_id)
+    return index < len(following) and following[index] == author_id
+
+
+def forget(*user_ids):
+    """Сбрасывает кэш подписок user_ids."""
+    cache = _cache()
+    if cache is not None and user_ids:
+        cache.delete_many([_key(user_id) for user_id in user_ids])
@@ -1,13 +1,59 @@
+from django import forms
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
 from django.forms import ModelForm
 
 from posts.models import Comment, Post
+from posts.tasks import store_post_image
+from posts.uploads import claim_upload, get_completed_upload, stash_upload
 
 
 class PostForm(ModelForm):
+    # Картинка, загруженная кусками через api/v1/uploads/ (posts.uploads).
+    upload_token = forms.UUIDField(required=False, widget=forms.HiddenInput)
+
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
 
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+
+    def clean_upload_token(self):
+        token = self.cleaned_data['upload_token']
+        if token is not None:
+            get_completed_upload(token, self.user)
+        return token
+
+    def save(self, commit=True):
+        token = self.cleaned_data.get('upload_token')
+        image = self.cleaned_data.get('image')
+        if commit and token is None and isinstance(image, UploadedFile):
+            return self.save_with_deferred_image(image)
+        if token is None:
+            return super().save(commit)
+        if not commit:
+            # Пост сохранит вызывающий код: сессия не закрывается и
+            # истечёт через UPLOAD_SESSION_TTL.
+            self.instance.image = get_completed_upload(
+                token, self.user
+            ).stored_name
+            return super().save(commit)
+        with claim_upload(token, self.user) as name:
+            self.instance.image = name
+            return super().save(commit)
+
+    def save_with_deferred_image(self, image):
+        """Сохраняет пост с прежней картинкой, а новую переносит в
+        хранилище и прикрепляет задача store_post_image."""
+        self.instance.image = self.initial.get('image') or ''
+        with transaction.atomic():
+            post = super().save()
+            session = stash_upload(self.user, image)
+            store_post_image.delay(post.id, str(session.token))
+        return post
+
 
 class CommentForm(ModelForm):
     class Meta:
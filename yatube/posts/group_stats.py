@@ -0,0 +1,121 @@
+"""Статистика сообществ для каталога групп.
+
+Строка GroupStats меняется сигналами постов при публикации, переносе в
+другую группу и удалении, поэтому каталог читает одну страницу таблицы.
+Активность хранится как в posts.trending - логарифмом суммы затухающих
+весов постов, отсчитанным от EPOCH:
+
+    activity = log2(sum(2 ** ((created - EPOCH) / half_life))).
+
+Порядок групп по activity со временем не меняется, а текущее значение
+(пост сейчас даёт 1, пост полупериод назад - 0.5) считает
+current_activity.
+"""
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Group, GroupStats, Post
+from .trending import EPOCH
+
+
+def _units(created):
+    return (created - EPOCH).total_seconds() / (
+        settings.GROUP_ACTIVITY_HALF_LIFE_HOURS * 3600
+    )
+
+
+def _add(activity, units):
+    high, low = max(activity, units), min(activity, units)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def activity_of(dates):
+    """Активность по датам постов; None - постов нет."""
+    activity = None
+    for created in dates:
+        units = _units(created)
+        activity = units if activity is None else _add(activity, units)
+    return activity
+
+
+def current_activity(stats):
+    """Затухшая на текущий момент сумма постов группы."""
+    if not stats.posts_count:
+        return 0.0
+    return 2 ** (stats.activity - _units(timezone.now()))
+
+
+def post_added(group_id, created):
+    if group_id is None:
+        return
+    with transaction.atomic():
+        stats, _ = GroupStats.objects.select_for_update().get_or_create(
+            group_id=group_id
+        )
+        units = _units(created)
+        stats.activity = (
+            _add(stats.activity, units) if stats.posts_count else units
+        )
+        stats.posts_count += 1
+        if stats.last_post is None or created > stats.last_post:
+            stats.last_post = created
+        stats.save()
+
+
+def post_removed(group_id, created):
+    if group_id is None:
+        return
+    with transaction.atomic():
+        stats = GroupStats.objects.select_for_update().filter(
+            group_id=group_id
+        ).first()
+        if stats is None:
+            return
+        rest = 1 - 2 ** (_units(created) - stats.activity)
+        # Удалён последний пост или вычитание потеряло точность:
+        # дешевле пересчитать одну группу целиком.
+        if stats.posts_count <= 1 or created == stats.last_post or (
+            rest < 1e-9
+        ):
+            rebuild_group_stats([group_id])
+            return
+        stats.activity += math.log2(rest)
+        stats.posts_count -= 1
+        stats.save()
+
+
+def rebuild_group_stats(group_ids=None):
+    """Пересчитывает статистику групп из постов. Возвращает число групп."""
+    groups = Group.objects.all()
+    posts = Post.objects.exclude(group=None)
+    if group_ids is not None:
+        groups = groups.filter(id__in=group_ids)
+        posts = posts.filter(group_id__in=group_ids)
+    ids = list(groups.values_list('id', flat=True))
+
+    dates = defaultdict(list)
+    for group_id, created in posts.order_by().values_list(
+        'group_id', 'created'
+    ).iterator():
+        dates[group_id].append(created)
+
+    stats = [
+        GroupStats(
+            group_id=group_id,
+            posts_count=len(dates[group_id]),
+            last_post=max(dates[group_id], default=None),
+            activity=activity_of(dates[group_id]) or 0,
+        )
+        for group_id in ids
+    ]
+    with transaction.atomic():
+        stale = GroupStats.objects.all()
+        if group_ids is not None:
+            stale = stale.filter(group_id__in=group_ids)
+        stale.delete()
+        GroupStats.objects.bulk_create(stats, batch_size=1000)
+    return len(stats)
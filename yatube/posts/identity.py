@@ -0,0 +1,68 @@
+"""Кэш сообществ по slug и пользователей по username.
+
+Группы и пользователи почти не меняются, а каждая страница группы,
+профиля и подписки начиналась с запроса за ними. Кэш живёт в памяти
+процесса (core.lru.LRUCache) и сбрасывается сигналами сохранения и
+удаления; в остальных процессах устаревшая запись живёт не дольше
+IDENTITY_CACHE_TTL.
+
+От пользователя хранятся только USER_FIELDS (без пароля и служебных
+полей), и записи не трогает обновление last_login. Рядом с записью
+лежит ключ по pk, чтобы сбросить её после смены username без обхода
+кэша. Отдаются копии объектов, чтобы правки в одном запросе не попали
+в другой.
+"""
+import copy
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import Http404
+
+from core.lru import LRUCache
+
+from .models import Group
+
+User = get_user_model()
+
+groups = LRUCache(settings.IDENTITY_CACHE_SIZE, settings.IDENTITY_CACHE_TTL)
+users = LRUCache(settings.IDENTITY_CACHE_SIZE, settings.IDENTITY_CACHE_TTL)
+
+# Поля пользователя, которые нужны страницам профиля и подписок.
+USER_FIELDS = ('id', 'username', 'first_name', 'last_name')
+
+
+def _lookup(cache, queryset, field, value):
+    obj = cache.get(value)
+    if obj is None:
+        obj = queryset.filter(**{field: value}).first()
+        if obj is None:
+            raise Http404
+        cache.set(value, obj)
+    # Ключ по pk читается вслед за записью и вытесняется не раньше неё.
+    cache.set(('pk', obj.pk), value)
+    return copy.copy(obj)
+
+
+def get_group_or_404(slug):
+    return _lookup(groups, Group.objects.all(), 'slug', slug)
+
+
+def get_user_or_404(username):
+    return _lookup(
+        users, User.objects.only(*USER_FIELDS), 'username', username
+    )
+
+
+def get_user_by_username(username):
+    """Как get_user_or_404, но None вместо 404 (для сериализаторов)."""
+    try:
+        return get_user_or_404(username)
+    except Http404:
+        return None
+
+
+def forget(cache, instance, key):
+    """Сбрасывает запись по ключу и по pk: ключ мог смениться."""
+    cache.delete(key)
+    cache.delete(cache.get(('pk', instance.pk)))
+    cache.delete(('pk', instance.pk))
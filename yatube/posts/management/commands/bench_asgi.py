@@ -0,0 +1,92 @@
+import asyncio
+import importlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+from django.urls import clear_url_caches
+
+from posts.models import Group, Post
+
+MODES = ('wsgi', 'asgi-sync', 'asgi-async')
+NO_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+def reload_urlconf():
+    import posts.urls
+
+    importlib.reload(posts.urls)
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность лент и страницы поста: '
+        'WSGI, синхронные view под ASGI и асинхронные view под ASGI. '
+        'Нужны данные в БД (manage.py seed_posts).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+
+    def handle(self, *args, **options):
+        paths = self.get_paths()
+        for mode in options['modes']:
+            urls = [
+                paths[i % len(paths)] for i in range(options['requests'])
+            ]
+            with override_settings(
+                DEBUG=False,
+                POSTS_ASYNC_VIEWS=mode == 'asgi-async',
+                CACHES=NO_CACHE,
+            ):
+                reload_urlconf()
+                started = time.perf_counter()
+                if mode == 'wsgi':
+                    statuses = self.run_wsgi(urls, options['concurrency'])
+                else:
+                    statuses = asyncio.run(
+                        self.run_asgi(urls, options['concurrency'])
+                    )
+                elapsed = time.perf_counter() - started
+            errors = sum(status != 200 for status in statuses)
+            self.stdout.write(
+                f'{mode}: {len(urls) / elapsed:.1f} запросов/с '
+                f'({len(urls)} запросов за {elapsed:.2f} с, ошибок {errors})'
+            )
+        reload_urlconf()
+
+    def get_paths(self):
+        post = Post.objects.select_related('author').first()
+        group = Group.objects.first()
+        if post is None or group is None:
+            raise CommandError('БД пуста: сначала manage.py seed_posts.')
+        return [
+            '/',
+            '/?page=2',
+            f'/group/{group.slug}/',
+            f'/profile/{post.author.username}/',
+            f'/posts/{post.id}/',
+        ]
+
+    def run_wsgi(self, urls, concurrency):
+        def fetch(url):
+            return Client().get(url).status_code
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(fetch, urls))
+
+    async def run_asgi(self, urls, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(url):
+            async with semaphore:
+                response = await AsyncClient().get(url)
+                return response.status_code
+        return await asyncio.gather(*(fetch(url) for url in urls))
@@ -0,0 +1,82 @@
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from posts.models import Group, Post
+
+MODES = ('buffered', 'stream')
+ENCODINGS = ('identity', 'gzip')
+
+
+def fetch(client, path, encoding):
+    """Время до первого байта, полное время и размер тела ответа."""
+    # cache_page держит кэш, созданный при импорте view: CACHES через
+    # override_settings его не заменит, поэтому кэш чистится перед
+    # каждым запросом.
+    cache.clear()
+    started = time.perf_counter()
+    response = client.get(path, HTTP_ACCEPT_ENCODING=encoding)
+    if response.streaming:
+        chunks = iter(response.streaming_content)
+        first = next(chunks, b'')
+        ttfb = time.perf_counter() - started
+        size = len(first) + sum(len(chunk) for chunk in chunks)
+    else:
+        ttfb = time.perf_counter() - started
+        size = len(response.content)
+    return ttfb, time.perf_counter() - started, size
+
+
+class Command(BaseCommand):
+    help = (
+        'Время до первого байта, полное время и размер лент: обычный и '
+        'потоковый (STREAM_LISTINGS) рендеринг, без сжатия и с gzip. '
+        'Нужны данные в БД (manage.py seed_posts).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20)
+        parser.add_argument(
+            '--page-size', type=int, default=100,
+            help='Постов на странице (NUMBER_OF_POSTS_ON_ONE_PAGE).',
+        )
+
+    def handle(self, *args, **options):
+        client = Client()
+        for path in self.get_paths():
+            self.stdout.write(path)
+            for mode in MODES:
+                for encoding in ENCODINGS:
+                    with override_settings(
+                        DEBUG=False,
+                        STREAM_LISTINGS=mode == 'stream',
+                        NUMBER_OF_POSTS_ON_ONE_PAGE=options['page_size'],
+                    ):
+                        results = [
+                            fetch(client, path, encoding)
+                            for _ in range(options['requests'])
+                        ]
+                    ttfb, total, size = (
+                        statistics.median(column) for column in zip(*results)
+                    )
+                    self.stdout.write(
+                        f'  {mode:>8} {encoding:>8}: '
+                        f'TTFB {ttfb * 1000:6.1f} мс, '
+                        f'всего {total * 1000:6.1f} мс, '
+                        f'{size / 1024:6.1f} КБ'
+                    )
+
+    def get_paths(self):
+        post = Post.objects.select_related('author').first()
+        group = Group.objects.first()
+        if post is None or group is None:
+            raise CommandError('БД пуста: сначала manage.py seed_posts.')
+        return [
+            '/',
+            '/popular/',
+            f'/group/{group.slug}/',
+            f'/profile/{post.author.username}/',
+        ]
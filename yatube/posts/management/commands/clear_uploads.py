@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.uploads import clear_stale_uploads
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет брошенные загрузки старше UPLOAD_SESSION_TTL вместе с '
+        'временными и непривязанными файлами.'
+    )
+
+    def handle(self, *args, **options):
+        count = clear_stale_uploads()
+        self.stdout.write(f'Удалено загрузок: {count}')
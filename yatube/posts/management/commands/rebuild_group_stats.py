@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.group_stats import rebuild_group_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает статистику сообществ из постов. Обычно она '
+        'обновляется сигналами; команда нужна после массовых правок в БД.'
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = rebuild_group_stats()
+        self.stdout.write(
+            f'Пересчитано сообществ: {count} '
+            f'за {time.monotonic() - started:.3f} с'
+        )
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает сохранённый HTML постов и комментариев (preview, '
+        'rendered_html) по текущим правилам posts.rendering. Идёт пачками '
+        'по pk.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        for model in (Post, Comment):
+            started = time.monotonic()
+            count = self.render_all(model, options['batch_size'])
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: {count} '
+                f'за {time.monotonic() - started:.2f} с'
+            )
+
+    def render_all(self, model, batch_size):
+        count = 0
+        last_pk = 0
+        while True:
+            objs = list(model.objects.filter(
+                pk__gt=last_pk
+            ).order_by('pk').only('pk', 'text')[:batch_size])
+            if not objs:
+                return count
+            last_pk = objs[-1].pk
+            for obj in objs:
+                obj.render()
+            with transaction.atomic():
+                model.objects.bulk_update(objs, model.rendered_fields)
+            count += len(objs)
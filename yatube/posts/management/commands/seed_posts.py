@@ -0,0 +1,103 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.follow_cache import forget
+from posts.group_stats import rebuild_group_stats
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+USERNAME_PREFIX = 'seed-user-'
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет БД тестовыми данными для бенчмарков: пользователи, '
+        'сообщества, посты, комментарии и подписки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--follows', type=int, default=10, help=(
+            'Подписок на одного пользователя.'
+        ))
+        parser.add_argument('--text-length', type=int, default=600)
+        parser.add_argument('--seed', type=int, default=0)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        start = User.objects.filter(
+            username__startswith=USERNAME_PREFIX
+        ).count()
+        User.objects.bulk_create(
+            User(username=f'{USERNAME_PREFIX}{start + i}')
+            for i in range(options['users'])
+        )
+        user_ids = list(User.objects.filter(
+            username__startswith=USERNAME_PREFIX
+        ).values_list('id', flat=True))
+
+        start = Group.objects.count()
+        Group.objects.bulk_create(
+            Group(
+                title=f'Сообщество {start + i}',
+                slug=f'seed-group-{start + i}',
+                description='Сообщество для бенчмарков',
+            )
+            for i in range(options['groups'])
+        )
+        group_ids = list(Group.objects.values_list('id', flat=True))
+
+        words = ('пост', 'текст', 'яндекс', 'практикум', 'джанго', 'кэш')
+        posts = [
+            Post(
+                author_id=rnd.choice(user_ids),
+                group_id=rnd.choice(group_ids + [None]),
+                text=' '.join(
+                    rnd.choice(words)
+                    for _ in range(options['text_length'] // 6)
+                ),
+            )
+            for _ in range(options['posts'])
+        ]
+        # bulk_create не вызывает save(): HTML считаем сами.
+        for post in posts:
+            post.render()
+        Post.objects.bulk_create(posts, batch_size=1000)
+        post_ids = list(Post.objects.values_list('id', flat=True))
+
+        comments = [
+            Comment(
+                author_id=rnd.choice(user_ids),
+                post_id=rnd.choice(post_ids),
+                text='Комментарий для бенчмарка',
+            )
+            for _ in range(options['comments'])
+        ]
+        for comment in comments:
+            comment.render()
+        Comment.objects.bulk_create(comments, batch_size=1000)
+
+        Follow.objects.bulk_create((
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id in user_ids
+            for author_id in rnd.sample(
+                user_ids, min(options['follows'], len(user_ids))
+            )
+            if author_id != user_id
+        ), batch_size=1000, ignore_conflicts=True)
+        # bulk_create не шлёт сигналов: кэш подписок сбрасываем сами.
+        transaction.on_commit(lambda: forget(*user_ids))
+        rebuild_group_stats()
+
+        self.stdout.write(
+            f'Пользователей: {len(user_ids)}, постов: {len(post_ids)}, '
+            f'комментариев: {Comment.objects.count()}'
+        )
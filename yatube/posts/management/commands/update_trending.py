@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.trending import update_trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинг "Популярное": только посты с новыми '
+        'комментариями или подписчиками автора. С --interval - в цикле.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать все посты окна.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Период повтора в секундах (0 - один раз).',
+        )
+
+    def handle(self, *args, **options):
+        full = options['full']
+        while True:
+            started = time.monotonic()
+            count = update_trending(full=full)
+            self.stdout.write(
+                f'Пересчитано постов: {count} '
+                f'за {time.monotonic() - started:.3f} с'
+            )
+            if not options['interval']:
+                break
+            full = False
+            time.sleep(options['interval'])
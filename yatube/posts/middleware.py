@@ -0,0 +1,24 @@
+from asgiref.sync import sync_to_async
+
+from core.middleware import AsyncCapableMiddleware
+
+from .writes import write_buffer
+
+
+class WriteBufferMiddleware(AsyncCapableMiddleware):
+    """Сбрасывает отложенные записи (posts.writes) до отдачи ответа.
+
+    Иначе редирект на пост уходил бы раньше, чем комментарий попал в
+    БД, и следующая страница его не показывала бы.
+    """
+
+    def sync_call(self, request):
+        response = self.get_response(request)
+        write_buffer.flush()
+        return response
+
+    async def async_call(self, request):
+        response = await self.get_response(request)
+        if not write_buffer.idle():
+            await sync_to_async(write_buffer.flush)()
+        return response
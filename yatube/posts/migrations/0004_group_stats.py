@@ -0,0 +1,67 @@
+# Generated by Django 3.2.16 on 2026-10-19 06:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+from datetime import datetime, timezone
+import math
+
+# Формула активности на момент миграции (posts.group_stats): код
+# приложения может измениться, а миграция должна давать тот же результат.
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+HALF_LIFE_HOURS = 24 * 7
+
+
+def activity_of(dates):
+    activity = None
+    for created in dates:
+        units = (created - EPOCH).total_seconds() / (HALF_LIFE_HOURS * 3600)
+        if activity is None:
+            activity = units
+        else:
+            high, low = max(activity, units), min(activity, units)
+            activity = high + math.log2(1 + 2 ** (low - high))
+    return activity
+
+
+def fill_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    stats = []
+    for group in Group.objects.all():
+        dates = list(group.posts.values_list('created', flat=True))
+        stats.append(GroupStats(
+            group=group,
+            posts_count=len(dates),
+            last_post=max(dates, default=None),
+            activity=activity_of(dates) or 0,
+        ))
+    GroupStats.objects.bulk_create(stats, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_trending_post'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.group', verbose_name='Сообщество')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('last_post', models.DateTimeField(blank=True, null=True, verbose_name='Последний пост')),
+                ('activity', models.FloatField(default=0, verbose_name='Активность')),
+            ],
+            options={
+                'verbose_name': 'Статистика сообщества',
+                'verbose_name_plural': 'Статистика сообществ',
+                'ordering': ['-activity'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['-activity'], name='group_stats_activity'),
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.16 on 2026-10-19 07:02
+
+import core.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_group_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='text',
+            field=core.fields.CompressedTextField(help_text='Напишите здесь свой комментарий', verbose_name='Текст комментария'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='text',
+            field=core.fields.CompressedTextField(help_text='Напишите здесь основной текст', verbose_name='Текст поста'),
+        ),
+    ]
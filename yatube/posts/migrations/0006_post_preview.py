@@ -0,0 +1,44 @@
+# Generated by Django 3.2.16 on 2026-10-19 07:03
+
+import core.fields
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def render_posts(apps, schema_editor):
+    from posts.rendering import render_preview, render_text
+
+    Post = apps.get_model('posts', 'Post')
+    fields = ['preview', 'rendered_html']
+    # Пишем пачками по ходу чтения, чтобы не держать в памяти все посты.
+    posts = []
+    for post in Post.objects.only('text').iterator(chunk_size=BATCH_SIZE):
+        post.preview = render_preview(post.text)
+        post.rendered_html = render_text(post.text)
+        posts.append(post)
+        if len(posts) == BATCH_SIZE:
+            Post.objects.bulk_update(posts, fields)
+            posts = []
+    Post.objects.bulk_update(posts, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_compressed_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='preview',
+            field=models.TextField(blank=True, editable=False, verbose_name='Анонс (HTML)'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='rendered_html',
+            field=core.fields.CompressedTextField(blank=True, editable=False, verbose_name='Текст (HTML)'),
+        ),
+        migrations.RunPython(render_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.2.16 on 2026-10-19 07:04
+
+import core.fields
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+
+def render_comments(apps, schema_editor):
+    from posts.rendering import render_text
+
+    Comment = apps.get_model('posts', 'Comment')
+    # Пишем пачками по ходу чтения, чтобы не держать в памяти все
+    # комментарии.
+    comments = []
+    for comment in Comment.objects.only('text').iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        comment.rendered_html = render_text(comment.text)
+        comments.append(comment)
+        if len(comments) == BATCH_SIZE:
+            Comment.objects.bulk_update(comments, ['rendered_html'])
+            comments = []
+    Comment.objects.bulk_update(comments, ['rendered_html'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_preview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='rendered_html',
+            field=core.fields.CompressedTextField(blank=True, editable=False, verbose_name='Текст (HTML)'),
+        ),
+        migrations.RunPython(render_comments, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,14 @@
+import uuid
+
+from core.fields import CompressedTextField
 from core.models import CreatedModel
+from core.storage import blob_storage
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.db.models import F, Q
 
+from .rendering import render_preview, render_text
+
 User = get_user_model()
 
 
@@ -22,10 +28,41 @@ class Group(models.Model):
         return f'Группа: {self.title}'
 
 
-class Post(CreatedModel):
+class RenderedTextMixin:
+    """HTML текста (rendered_html) считается при сохранении.
+
+    Записи в обход save() (bulk_create, накопитель posts.writes) должны
+    сами вызвать render().
+    """
+
+    rendered_fields = ('rendered_html',)
+
+    def render(self):
+        self.rendered_html = render_text(self.text)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if 'text' not in self.get_deferred_fields() and (
+            update_fields is None or 'text' in update_fields
+        ):
+            self.render()
+            if update_fields is not None:
+                kwargs['update_fields'] = {
+                    *update_fields, *self.rendered_fields
+                }
+        super().save(*args, **kwargs)
+
+
+class PostQuerySet(models.QuerySet):
+    def listing(self):
+        """Посты для лент: без полного текста, карточке хватает preview."""
+        return self.defer('text', 'rendered_html')
+
+
+class Post(RenderedTextMixin, CreatedModel):
     """Создание модели поста."""
 
-    text = models.TextField(
+    text = CompressedTextField(
         verbose_name='Текст поста',
         help_text='Напишите здесь основной текст',
     )
@@ -47,9 +84,17 @@ class Post(CreatedModel):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=blob_storage,
         blank=True,
         help_text='Добавьте картинку',
     )
+    preview = models.TextField('Анонс (HTML)', blank=True, editable=False)
+    rendered_html = CompressedTextField(
+        'Текст (HTML)', blank=True, editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
+    rendered_fields = ('preview', 'rendered_html')
 
     class Meta:
         verbose_name = 'Пост'
@@ -60,11 +105,16 @@ class Post(CreatedModel):
         """Текст поста при принте."""
         return self.text[:15]
 
+    def render(self):
+        """Пересчитывает preview и rendered_html по text."""
+        super().render()
+        self.preview = render_preview(self.text)
+
 
-class Comment(CreatedModel):
+class Comment(RenderedTextMixin, CreatedModel):
     """Модель комментария."""
 
-    text = models.TextField(
+    text = CompressedTextField(
         verbose_name='Текст комментария',
         help_text='Напишите здесь свой комментарий',
     )
@@ -80,6 +130,9 @@ class Comment(CreatedModel):
         related_name='comments',
         verbose_name='Комментарий',
     )
+    rendered_html = CompressedTextField(
+        'Текст (HTML)', blank=True, editable=False
+    )
 
     class Meta:
         verbose_name = 'Комментарий'
@@ -114,3 +167,122 @@ class Follow(models.Model):
                 check=~Q(user=F('author')),
             )
         ]
+
+
+class FollowSuggestion(models.Model):
+    """Рекомендация "кого почитать", считается compute_follow_suggestions."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+        verbose_name='Пользователь',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рекомендуемый автор',
+    )
+    score = models.PositiveIntegerField('Общих подписок')
+
+    class Meta:
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+        ordering = ['-score']
+        constraints = [
+            models.UniqueConstraint(
+                name='unique_suggestion_user_author',
+                fields=['user', 'author'],
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-score'], name='suggestion_user_score'
+            ),
+        ]
+
+
+class TrendingPost(models.Model):
+    """Предрассчитанный рейтинг поста для ленты "Популярное".
+
+    Заполняется командой update_trending (posts.trending).
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='Пост',
+    )
+    score = models.FloatField('Рейтинг')
+    comments_count = models.PositiveIntegerField('Комментариев', default=0)
+    author_followers = models.PositiveIntegerField(
+        'Подписчиков автора', default=0
+    )
+    updated = models.DateTimeField('Пересчитан')
+
+    class Meta:
+        verbose_name = 'Популярный пост'
+        verbose_name_plural = 'Популярные посты'
+        ordering = ['-score']
+        indexes = [
+            models.Index(fields=['-score'], name='trending_score'),
+        ]
+
+
+class GroupStats(models.Model):
+    """Статистика сообщества для каталога групп.
+
+    Обновляется сигналами постов (posts.group_stats).
+    """
+
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Сообщество',
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    last_post = models.DateTimeField('Последний пост', null=True, blank=True)
+    activity = models.FloatField('Активность', default=0)
+
+    class Meta:
+        verbose_name = 'Статистика сообщества'
+        verbose_name_plural = 'Статистика сообществ'
+        ordering = ['-activity']
+        indexes = [
+            models.Index(fields=['-activity'], name='group_stats_activity'),
+        ]
+
+
+class UploadSession(CreatedModel):
+    """Докачиваемая загрузка картинки поста (posts.uploads).
+
+    Куски пишутся во временный файл, готовый файл переносится в хранилище
+    и прикрепляется к посту по token.
+    """
+
+    token = models.UUIDField(unique=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions',
+        verbose_name='Пользователь',
+    )
+    filename = models.CharField('Имя файла', max_length=255)
+    size = models.PositiveBigIntegerField('Размер')
+    received = models.PositiveBigIntegerField('Получено', default=0)
+    stored_name = models.CharField(
+        'Файл в хранилище', max_length=255, blank=True
+    )
+
+    class Meta:
+        verbose_name = 'Загрузка'
+        verbose_name_plural = 'Загрузки'
+
+    @property
+    def complete(self):
+        return bool(self.stored_name)
@@ -0,0 +1,85 @@
+"""Массовая модерация: перенос постов, удаление постов авторов, чистка
+комментариев.
+
+Операции идут пачками по BULK_CHUNK_SIZE одиночными UPDATE/DELETE
+(core.bulk) без сигналов на каждый объект. Статистику сообществ,
+ссылки на картинки и ленты удалённых постов обновляет приёмник
+raw_deleting (posts.signals) после каждой пачки; после переноса
+пересчитывается статистика, после чистки комментариев - рейтинг
+"Популярное", и в обоих случаях сбрасываются ленты - один раз в
+конце.
+
+progress(номер пачки, обработано строк) вызывается после каждой пачки.
+"""
+import logging
+
+from django.db import transaction
+
+from core.bulk import chunked_pks, raw_delete
+
+from .group_stats import rebuild_group_stats
+from .models import Comment, Post
+from .trending import rescore_posts
+from .utils import invalidate_listings
+
+logger = logging.getLogger(__name__)
+
+
+def _run(queryset, apply, progress):
+    done = 0
+    for number, pks in enumerate(chunked_pks(queryset), 1):
+        with transaction.atomic():
+            done += apply(pks)
+        logger.info(
+            '%s: пачка %d, обработано %d',
+            queryset.model._meta.label, number, done,
+        )
+        if progress is not None:
+            progress(number, done)
+    return done
+
+
+def _group_ids(pks):
+    return set(Post.objects.filter(pk__in=pks).exclude(
+        group=None
+    ).values_list('group_id', flat=True).distinct())
+
+
+def move_posts(queryset, group, progress=None):
+    """Переносит посты в group (None - убрать из сообществ)."""
+    group_id = None if group is None else group.pk
+    groups = {group_id} - {None}
+
+    def apply(pks):
+        groups.update(_group_ids(pks))
+        return Post.objects.filter(pk__in=pks).update(group_id=group_id)
+
+    moved = _run(queryset, apply, progress)
+    rebuild_group_stats(groups)
+    invalidate_listings()
+    return moved
+
+
+def delete_posts_by_authors(author_ids, progress=None):
+    """Удаляет все посты авторов вместе с комментариями к ним."""
+    return _run(
+        Post.objects.filter(author_id__in=author_ids),
+        lambda pks: raw_delete(Post, pks),
+        progress,
+    )
+
+
+def purge_comments(queryset, progress=None):
+    """Удаляет комментарии queryset."""
+    post_ids = set()
+
+    def apply(pks):
+        post_ids.update(Comment.objects.filter(
+            pk__in=pks
+        ).values_list('post_id', flat=True).distinct())
+        return raw_delete(Comment, pks)
+
+    deleted = _run(queryset, apply, progress)
+    rescore_posts(post_ids)
+    invalidate_listings()
+    return deleted
@@ -0,0 +1,18 @@
+"""HTML текстов постов, рассчитанный при сохранении.
+
+Шаблоны выводят готовые preview и rendered_html вместо того, чтобы
+на каждом показе прогонять текст через linebreaksbr.
+"""
+from django.conf import settings
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+
+def render_text(text):
+    """Экранированный текст с <br> вместо переводов строк."""
+    return linebreaksbr(text, autoescape=True)
+
+
+def render_preview(text):
+    """HTML анонса для карточки поста в лентах."""
+    return render_text(Truncator(text).chars(settings.POST_PREVIEW_CHARS))
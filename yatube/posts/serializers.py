@@ -5,4 +5,4 @@ from posts.models import Post
 class PostSerializer(ModelSerializer):
     class Meta:
         model = Post
-        fields = ('author', 'text', 'created')
\ No newline at end of file
+        fields = ('author', 'text', 'rendered_html', 'created')
\ No newline at end of file
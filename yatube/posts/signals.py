@@ -0,0 +1,127 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete, post_init, post_save, pre_save
+)
+from django.dispatch import receiver
+
+from core.bulk import raw_deleting
+from core.storage import release, retain
+
+from . import follow_cache, identity
+from .group_stats import post_added, post_removed, rebuild_group_stats
+from .models import Follow, Group, GroupStats, Post
+from .tasks import warm_thumbnails
+from .utils import invalidate_listings
+from .writes import bulk_written
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if created:
+        GroupStats.objects.get_or_create(group=instance)
+
+
+@receiver([post_save, post_delete], sender=Group)
+def group_changed(sender, instance, **kwargs):
+    identity.forget(identity.groups, instance, instance.slug)
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # Вход пользователя сохраняет только last_login: кэш это не трогает.
+    if update_fields and not set(update_fields) & set(identity.USER_FIELDS):
+        return
+    identity.forget(identity.users, instance, instance.username)
+
+
+def _remember(post):
+    # Группа и картинка, с которыми пост загружен или сохранён: при
+    # переносе поста статистику меняют обе группы, а ссылку на старый
+    # файл надо отпустить. None - поле было отложено (.only/.defer).
+    values = post.__dict__
+    if 'group_id' in values and 'image' in values:
+        image = values['image']
+        post._saved_state = (
+            values['group_id'], getattr(image, 'name', image) or ''
+        )
+    else:
+        post._saved_state = None
+
+
+@receiver(post_init, sender=Post)
+def post_loaded(sender, instance, **kwargs):
+    _remember(instance)
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, **kwargs):
+    if instance._state.adding:
+        old = None
+    else:
+        old = instance._saved_state or Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', 'image').first()
+    instance._old_group_id, instance._old_image = old or (None, '')
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        post_added(instance.group_id, instance.created)
+    elif instance._old_group_id != instance.group_id:
+        post_removed(instance._old_group_id, instance.created)
+        post_added(instance.group_id, instance.created)
+    if instance._old_image != instance.image.name:
+        retain(instance.image.name)
+        release(instance._old_image)
+        if instance.image:
+            warm_thumbnails.delay(instance.id)
+    _remember(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    post_removed(instance.group_id, instance.created)
+    release(instance.image.name)
+
+
+@receiver([post_save, post_delete], sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: follow_cache.forget(user_id))
+
+
+@receiver(bulk_written, sender=Follow)
+def follows_written(sender, objs, **kwargs):
+    follow_cache.forget(*{follow.user_id for follow in objs})
+
+
+@receiver(raw_deleting, sender=Post)
+def posts_raw_deleting(sender, pks, using, **kwargs):
+    # Без post_delete: ссылки на картинки, статистику групп и ленты
+    # обновляем на всю пачку.
+    posts = Post.objects.using(using).filter(pk__in=pks)
+    for image in posts.exclude(image='').values_list('image', flat=True):
+        release(image)
+    groups = set(posts.exclude(group=None).values_list(
+        'group_id', flat=True
+    ).distinct())
+
+    def refresh():
+        rebuild_group_stats(groups)
+        invalidate_listings()
+
+    transaction.on_commit(refresh, using=using)
+
+
+@receiver(raw_deleting, sender=Follow)
+def follows_raw_deleting(sender, pks, using, **kwargs):
+    user_ids = list(Follow.objects.using(using).filter(
+        pk__in=pks
+    ).values_list('user_id', flat=True).distinct())
+    transaction.on_commit(
+        lambda: follow_cache.forget(*user_ids), using=using
+    )
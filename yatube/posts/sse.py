@@ -0,0 +1,123 @@
+"""ASGI-приложение потока server-sent events о новых постах.
+
+Подключается в yatube/asgi.py перед Django для путей /stream/...:
+  /stream/                - общая лента,
+  /stream/group/<slug>/   - лента сообщества,
+  /stream/follow/         - лента избранных авторов (нужна сессия).
+Клиент получает событие new_posts с числом постов, появившихся с
+прошлого события. О новых постах из любого процесса узнаёт
+posts.broadcast.PostPoller.
+"""
+import asyncio
+import json
+from http.cookies import SimpleCookie
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.utils.module_loading import import_string
+
+from .broadcast import broadcaster, post_poller
+from .follow_cache import get_following
+from .models import Group
+
+SSE_PREFIX = '/stream/'
+
+
+def _session_user_id(scope):
+    """id пользователя сессии из cookie или None.
+
+    Пользователь берётся через auth.get_user, как в
+    AuthenticationMiddleware: сессия, чей хэш пароля устарел (пароль
+    сменили), анонимна.
+    """
+    cookies = SimpleCookie()
+    for name, value in scope.get('headers', ()):
+        if name == b'cookie':
+            cookies.load(value.decode('latin-1'))
+    morsel = cookies.get(settings.SESSION_COOKIE_NAME)
+    if morsel is None:
+        return None
+    store = import_string(settings.SESSION_ENGINE + '.SessionStore')
+    user = get_user(SimpleNamespace(session=store(morsel.value)))
+    return user.id if user.is_authenticated else None
+
+
+def _resolve_channels(scope):
+    """Каналы для пути запроса; None - такого потока нет."""
+    parts = scope['path'][len(SSE_PREFIX):].strip('/').split('/')
+    if parts == ['']:
+        return ['all']
+    if len(parts) == 2 and parts[0] == 'group':
+        group_id = Group.objects.filter(
+            slug=parts[1]
+        ).values_list('id', flat=True).first()
+        return None if group_id is None else [f'group:{group_id}']
+    if parts == ['follow']:
+        user_id = _session_user_id(scope)
+        if user_id is None:
+            return None
+        return [
+            f'author:{author_id}' for author_id in get_following(user_id)
+        ]
+    return None
+
+
+async def _send_text(send, text, more_body=True):
+    await send({
+        'type': 'http.response.body',
+        'body': text.encode(),
+        'more_body': more_body,
+    })
+
+
+async def sse_application(scope, receive, send):
+    channels = await sync_to_async(_resolve_channels)(scope)
+    if channels is None:
+        await send({
+            'type': 'http.response.start',
+            'status': 404,
+            'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+        })
+        await _send_text(send, 'Not Found', more_body=False)
+        return
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    await _send_text(send, f'retry: {settings.SSE_RETRY_MS}\n\n')
+
+    subscription = broadcaster.subscribe(channels)
+    post_poller.acquire()
+    disconnect = asyncio.ensure_future(receive())
+    try:
+        while True:
+            waiter = asyncio.ensure_future(subscription.wait())
+            done, _ = await asyncio.wait(
+                {disconnect, waiter},
+                timeout=settings.SSE_HEARTBEAT_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if disconnect in done:
+                waiter.cancel()
+                if disconnect.result()['type'] == 'http.disconnect':
+                    break
+                disconnect = asyncio.ensure_future(receive())
+                continue
+            if waiter in done:
+                data = json.dumps({'count': waiter.result()})
+                await _send_text(send, f'event: new_posts\ndata: {data}\n\n')
+            else:
+                waiter.cancel()
+                await _send_text(send, ': ping\n\n')
+    finally:
+        disconnect.cancel()
+        post_poller.release()
+        broadcaster.unsubscribe(subscription)
@@ -0,0 +1,37 @@
+from sorl.thumbnail import get_thumbnail
+
+from core.tasks import task
+
+from .models import Post, UploadSession
+from .uploads import claim_upload, finish_upload
+
+# Те же параметры, что у {% thumbnail %} в шаблонах постов.
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+@task
+def warm_thumbnails(post_id):
+    """Заранее строит миниатюру картинки поста."""
+    post = Post.objects.filter(id=post_id).first()
+    if post is None or not post.image:
+        return
+    get_thumbnail(post.image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
+
+
+@task
+def store_post_image(post_id, token):
+    """Переносит картинку из формы поста (stash_upload) в хранилище и
+    прикрепляет к посту."""
+    session = UploadSession.objects.filter(token=token).first()
+    if session is None:
+        return
+    if not session.stored_name:
+        finish_upload(session)
+    post = Post.objects.filter(id=post_id).first()
+    if post is None:
+        # Сессию с файлом уберёт clear_stale_uploads.
+        return
+    with claim_upload(token, session.user_id) as name:
+        post.image = name
+        post.save(update_fields=['image'])
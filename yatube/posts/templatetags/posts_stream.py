@@ -0,0 +1,15 @@
+from django import template
+from django.conf import settings
+
+from posts.sse import SSE_PREFIX
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/new_posts.html')
+def new_posts_stream(feed='', slug=''):
+    """Плашка "N новых постов" с подпиской на поток ленты."""
+    if not settings.POSTS_SSE_ENABLED:
+        return {'stream_url': None}
+    path = '/'.join(part for part in (feed, slug) if part)
+    return {'stream_url': SSE_PREFIX + (f'{path}/' if path else '')}
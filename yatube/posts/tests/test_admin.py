@@ -0,0 +1,220 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import EmptyPage
+from django.db import connection, models
+from django.db.models import ProtectedError
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from core.bulk import raw_delete
+from core.models import Blob
+from core.paginator import EstimatedCountPaginator
+from posts.follow_cache import is_following
+from posts.models import Comment, Follow, Group, GroupStats, Post
+from posts.moderation import delete_posts_by_authors
+
+from .utils import colorize_msg
+
+User = get_user_model()
+
+
+class AdminChangelistTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='test-admin', email='admin@example.com', password='x'
+        )
+        cls.group = Group.objects.create(title='group', slug='admin-group')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def add_posts(self, count):
+        for _ in range(count):
+            post = Post.objects.create(
+                text='text', author=self.admin, group=self.group
+            )
+            Comment.objects.create(
+                text='comment', author=self.admin, post=post
+            )
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        for url in ('/admin/posts/post/', '/admin/posts/comment/'):
+            with self.subTest(url=url):
+                self.add_posts(2)
+                few = self.changelist_queries(url)
+                self.add_posts(10)
+                msg = colorize_msg(f'{url}: запросов больше с ростом строк')
+                self.assertEqual(self.changelist_queries(url), few, msg)
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=1)
+    def test_unfiltered_count_is_estimated(self):
+        self.add_posts(3)
+        self.analyze()
+        paginator = EstimatedCountPaginator(Post.objects.all(), 10)
+        with CaptureQueriesContext(connection) as queries:
+            count = paginator.count
+        msg = colorize_msg('Paginator посчитал строки через COUNT(*)')
+        self.assertFalse(
+            any('COUNT(' in query['sql'] for query in queries), msg
+        )
+        self.assertGreaterEqual(count, 3, msg)
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=1)
+    def test_stale_estimate_does_not_show_missing_pages(self):
+        self.add_posts(6)
+        self.analyze()
+        Post.objects.filter(
+            id__in=Post.objects.values('id')[:4]
+        ).delete()
+        paginator = EstimatedCountPaginator(
+            Post.objects.order_by('id'), 2
+        )
+        msg = colorize_msg('Paginator не поверил оценке по ANALYZE')
+        self.assertEqual(paginator.num_pages, 3, msg)
+        msg = colorize_msg('Пустая страница по устаревшей оценке')
+        with self.assertRaises(EmptyPage, msg=msg):
+            paginator.page(3)
+        self.assertEqual(
+            (paginator.count, paginator.num_pages), (2, 1), msg
+        )
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=1)
+    def test_no_statistics_means_exact_count(self):
+        self.add_posts(3)
+        Post.objects.filter(
+            id__in=Post.objects.order_by('id').values('id')[:2]
+        ).delete()
+        paginator = EstimatedCountPaginator(Post.objects.all(), 10)
+        msg = colorize_msg('Без ANALYZE число строк взято не из COUNT(*)')
+        self.assertEqual(paginator.count, 1, msg)
+
+
+@override_settings(BULK_CHUNK_SIZE=2)
+class AdminBulkActionsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='test-admin', email='admin@example.com', password='x'
+        )
+        cls.spammer = User.objects.create(username='test-spammer')
+        cls.source = Group.objects.create(title='source', slug='source')
+        cls.target = Group.objects.create(title='target', slug='target')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.posts = [
+            Post.objects.create(
+                text='spam', author=self.spammer, group=self.source
+            )
+            for _ in range(5)
+        ]
+        for post in self.posts:
+            Comment.objects.create(
+                text='spam', author=self.spammer, post=post
+            )
+
+    def act(self, url, action, pks, **data):
+        return self.client.post(url, {
+            'action': action, '_selected_action': pks, **data,
+        }, follow=True)
+
+    def test_move_to_group_updates_stats(self):
+        self.act(
+            '/admin/posts/post/', 'move_to_group',
+            [post.pk for post in self.posts], group=self.target.pk,
+        )
+        msg = colorize_msg('Посты не перенесены в сообщество')
+        self.assertEqual(self.target.posts.count(), 5, msg)
+        msg = colorize_msg('Статистика сообществ не пересчитана')
+        counts = dict(
+            GroupStats.objects.values_list('group__slug', 'posts_count')
+        )
+        self.assertEqual(counts, {'source': 0, 'target': 5}, msg)
+
+    def test_delete_by_authors_needs_confirmation(self):
+        url = '/admin/posts/post/'
+        pks = [self.posts[0].pk]
+        self.act(url, 'delete_by_authors', pks)
+        msg = colorize_msg('Удаление прошло без подтверждения')
+        self.assertEqual(Post.objects.count(), 5, msg)
+
+        response = self.act(url, 'delete_by_authors', pks, confirm='on')
+        msg = colorize_msg('Посты автора или комментарии к ним не удалены')
+        self.assertEqual(Post.objects.count(), 0, msg)
+        self.assertEqual(Comment.objects.count(), 0, msg)
+        msg = colorize_msg('Админка не сообщила число пачек')
+        self.assertContains(response, 'пачек: 3', msg_prefix=msg)
+
+    @override_settings(FOLLOW_CACHE='default')
+    def test_raw_delete_updates_signal_state(self):
+        Blob.objects.create(digest='0' * 64, name='blobs/spam.gif', size=1)
+        post = Post.objects.create(
+            text='spam', author=self.spammer, group=self.source,
+            image='blobs/spam.gif',
+        )
+        follower = User.objects.create(username='test-follower')
+        follow = Follow.objects.create(user=follower, author=self.spammer)
+        cache.clear()
+        self.client.get(reverse('posts:index'))
+        self.assertTrue(is_following(follower.id, self.spammer.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            delete_posts_by_authors([self.spammer.pk])
+            raw_delete(Follow, [follow.pk])
+        msg = colorize_msg('Статистика сообщества не пересчитана')
+        self.assertEqual(self.source.stats.posts_count, 0, msg)
+        msg = colorize_msg('Ссылка на картинку удалённого поста осталась')
+        self.assertEqual(Blob.objects.get(name=post.image).refs, 0, msg)
+        msg = colorize_msg('Главная отдала удалённые посты из кэша')
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(len(response.context['page_obj']), 0, msg)
+        msg = colorize_msg('Кэш подписок не сброшен после raw_delete')
+        self.assertFalse(is_following(follower.id, self.spammer.id), msg)
+
+    def test_purge_comments(self):
+        self.act(
+            '/admin/posts/comment/', 'purge',
+            list(Comment.objects.values_list('pk', flat=True)[:3]),
+            confirm='on',
+        )
+        msg = colorize_msg('Комментарии не удалены')
+        self.assertEqual(Comment.objects.count(), 2, msg)
+
+    def test_move_without_group_needs_confirmation(self):
+        url = '/admin/posts/post/'
+        pks = [post.pk for post in self.posts]
+        self.act(url, 'move_to_group', pks)
+        msg = colorize_msg('Посты убраны из сообщества без подтверждения')
+        self.assertEqual(self.source.posts.count(), 5, msg)
+        self.act(url, 'move_to_group', pks, confirm='on')
+        msg = colorize_msg('Посты не убраны из сообщества')
+        self.assertEqual(self.source.posts.count(), 0, msg)
+
+    def test_raw_delete_respects_protect(self):
+        relation = next(
+            relation for relation in Post._meta.related_objects
+            if relation.related_model is Comment
+        )
+        pks = [self.posts[0].pk]
+        with mock.patch.object(relation, 'on_delete', models.PROTECT):
+            msg = colorize_msg('PROTECT не остановил удаление')
+            with self.assertRaises(ProtectedError, msg=msg):
+                raw_delete(Post, pks)
+        self.assertEqual(raw_delete(Post, pks), 1)
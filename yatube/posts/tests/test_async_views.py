@@ -0,0 +1,113 @@
+from http import HTTPStatus
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.handlers.base import BaseHandler
+from django.http import Http404
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, TransactionTestCase,
+    override_settings
+)
+from posts import async_views
+from posts.models import Follow, Group, Post
+
+from .utils import colorize_msg
+
+User = get_user_model()
+
+
+class AsyncViewsMixin:
+    @classmethod
+    def create_data(cls):
+        cls.user = User.objects.create(username='test-user-Async')
+        cls.author = User.objects.create(username='test-author-Async')
+        cls.group = Group.objects.create(title='group', slug='group-async')
+        cls.post = Post.objects.create(
+            text='post-text-async', author=cls.author, group=cls.group
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def get(self, view, path='/', user=None, **kwargs):
+        request = self.factory.get(path)
+        request.user = user or AnonymousUser()
+        return async_to_sync(view)(request, **kwargs)
+
+    def test_feeds_render_posts(self):
+        pages = {
+            async_views.index: {},
+            async_views.group_posts: {'slug': self.group.slug},
+            async_views.profile: {'username': self.author.username},
+            async_views.post_detail: {'post_id': self.post.id},
+        }
+        for view, kwargs in pages.items():
+            with self.subTest(view=view.__name__):
+                response = self.get(view, **kwargs)
+                msg = colorize_msg(
+                    f'Асинхронная страница {view.__name__} не показала пост'
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK, msg)
+                self.assertIn(self.post.text, response.content.decode(), msg)
+
+
+@override_settings(ASYNC_DB_CONCURRENT=False)
+class AsyncViewsTest(AsyncViewsMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.create_data()
+
+    def test_profile_follow_state(self):
+        response = self.get(
+            async_views.profile, user=self.user,
+            username=self.author.username,
+        )
+        msg = colorize_msg('Профиль не показал кнопку "Отписаться"')
+        self.assertIn('Отписаться', response.content.decode(), msg)
+
+    def test_out_of_range_page_shows_last_page(self):
+        response = self.get(async_views.index, path='/?page=99')
+        msg = colorize_msg('Страница за пределами ленты не стала последней')
+        self.assertIn(self.post.text, response.content.decode(), msg)
+
+    def test_missing_objects_raise_404(self):
+        pages = {
+            async_views.group_posts: {'slug': 'missing'},
+            async_views.profile: {'username': 'missing'},
+            async_views.post_detail: {'post_id': 0},
+        }
+        for view, kwargs in pages.items():
+            with self.subTest(view=view.__name__):
+                with self.assertRaises(Http404):
+                    self.get(view, **kwargs)
+
+
+@override_settings(ASYNC_DB_CONCURRENT=True)
+class ConcurrentAsyncViewsTest(AsyncViewsMixin, TransactionTestCase):
+    """Запросы страницы идут в отдельных потоках со своими соединениями:
+    данные должны быть закоммичены."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_data()
+
+
+class AsyncMiddlewareChainTest(SimpleTestCase):
+    def test_chain_is_not_adapted(self):
+        # Как в боевом режиме: debug_toolbar подключается только с DEBUG.
+        middleware = [
+            path for path in settings.MIDDLEWARE
+            if not path.startswith('debug_toolbar.')
+        ]
+        # Адаптацию Django пишет в журнал django.request только с DEBUG.
+        with override_settings(MIDDLEWARE=middleware, DEBUG=True):
+            for is_async in (True, False):
+                with self.subTest(is_async=is_async):
+                    with self.assertNoLogs('django.request', 'DEBUG'):
+                        BaseHandler().load_middleware(is_async=is_async)
@@ -0,0 +1,121 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.follow_cache import get_following, is_following
+from posts.models import Follow, Post
+from rest_framework.test import APIClient
+
+from .utils import colorize_msg
+
+User = get_user_model()
+
+
+@override_settings(FOLLOW_CACHE='default')
+class FollowCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test-user-FollowCache')
+        cls.authors = [
+            User.objects.create(username=f'test-author-FollowCache-{i}')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_membership_needs_no_query_once_loaded(self):
+        Follow.objects.create(user=self.user, author=self.authors[1])
+        get_following(self.user.id)
+        msg = colorize_msg('Проверка подписки обратилась к БД')
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                is_following(self.user.id, self.authors[1].id), msg
+            )
+            self.assertFalse(
+                is_following(self.user.id, self.authors[0].id), msg
+            )
+
+    def test_views_keep_cache_in_sync(self):
+        get_following(self.user.id)
+        for author in reversed(self.authors):
+            self.client.get(reverse(
+                'posts:profile_follow', kwargs={'username': author.username}
+            ))
+        msg = colorize_msg('Кэш подписок не обновился после подписки')
+        expected = sorted(author.id for author in self.authors)
+        self.assertEqual(list(get_following(self.user.id)), expected, msg)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse(
+                'posts:profile_unfollow',
+                kwargs={'username': self.authors[0].username},
+            ))
+        msg = colorize_msg('Кэш подписок не обновился после отписки')
+        self.assertFalse(
+            is_following(self.user.id, self.authors[0].id), msg
+        )
+
+    def test_follow_saved_elsewhere_reaches_views(self):
+        author = self.authors[2]
+        post = Post.objects.create(text='post-FollowCache', author=author)
+        get_following(self.user.id)
+        # Подписка из админки или другого процесса: мимо view.
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(user=self.user, author=author)
+        msg = colorize_msg('Кэш не узнал о подписке, сохранённой мимо view')
+        self.assertTrue(is_following(self.user.id, author.id), msg)
+        response = self.client.get(reverse('posts:follow_index'))
+        msg = colorize_msg('Лента избранного не показала пост автора')
+        self.assertIn(post, response.context['page_obj'], msg)
+
+    def test_deleted_author_leaves_cache(self):
+        author = User.objects.create(username='test-author-FollowCache-gone')
+        Follow.objects.create(user=self.user, author=author)
+        get_following(self.user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            author.delete()
+        msg = colorize_msg('Удалённый автор остался в кэше подписок')
+        self.assertEqual(list(get_following(self.user.id)), [], msg)
+
+    @override_settings(FOLLOW_CACHE=None)
+    def test_without_shared_cache_reads_database(self):
+        get_following(self.user.id)
+        Follow.objects.create(user=self.user, author=self.authors[0])
+        msg = colorize_msg('Без общего кэша подписки читаются не из БД')
+        self.assertTrue(is_following(self.user.id, self.authors[0].id), msg)
+
+    def test_api_follow_rejects_duplicates(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = '/api/v1/follow/'
+        data = {'following': self.authors[0].username}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(url, data)
+        msg = colorize_msg('API не создало подписку')
+        self.assertEqual(response.status_code, HTTPStatus.CREATED, msg)
+        self.assertTrue(is_following(self.user.id, self.authors[0].id), msg)
+
+        response = client.post(url, data)
+        msg = colorize_msg('API создало повторную подписку')
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST, msg)
+
+    def test_api_follow_rejects_duplicate_missing_from_cache(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        get_following(self.user.id)
+        # Подписка ещё не закоммичена: кэш о ней не знает.
+        Follow.objects.create(user=self.user, author=self.authors[2])
+        response = client.post(
+            '/api/v1/follow/', {'following': self.authors[2].username}
+        )
+        msg = colorize_msg('Дубликат подписки мимо кэша не дал 400')
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST, msg)
@@ -0,0 +1,106 @@
+from importlib import import_module
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.group_stats import activity_of, rebuild_group_stats
+from posts.models import Group, GroupStats, Post
+
+from .utils import colorize_msg
+
+User = get_user_model()
+
+
+class GroupStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test-user-GroupStats')
+        cls.quiet = Group.objects.create(title='quiet', slug='quiet')
+        cls.busy = Group.objects.create(title='busy', slug='busy')
+
+    def stats(self, group):
+        return GroupStats.objects.get(group=group)
+
+    def snapshot(self):
+        return {
+            stats.group_id: (
+                stats.posts_count, stats.last_post,
+                round(stats.activity, 6),
+            )
+            for stats in GroupStats.objects.all()
+        }
+
+    def test_new_group_has_empty_stats(self):
+        stats = self.stats(self.quiet)
+        msg = colorize_msg('У нового сообщества непустая статистика')
+        self.assertEqual((stats.posts_count, stats.last_post), (0, None), msg)
+
+    def test_signals_match_full_rebuild(self):
+        posts = [
+            Post.objects.create(text=str(i), author=self.user, group=group)
+            for i, group in enumerate((self.busy, self.busy, self.quiet))
+        ]
+        msg = colorize_msg('Публикация поста не обновила статистику')
+        self.assertEqual(self.stats(self.busy).posts_count, 2, msg)
+        self.assertEqual(
+            self.stats(self.busy).last_post, posts[1].created, msg
+        )
+
+        posts[0].group = self.quiet
+        posts[0].save()
+        posts[2].delete()
+        incremental = self.snapshot()
+        rebuild_group_stats()
+        msg = colorize_msg('Инкрементальная статистика разошлась с пересчётом')
+        self.assertEqual(incremental, self.snapshot(), msg)
+
+    def test_move_needs_no_extra_select(self):
+        Post.objects.create(text='text', author=self.user, group=self.busy)
+        post = Post.objects.get(group=self.busy)
+        post.group = self.quiet
+        with CaptureQueriesContext(connection) as queries:
+            post.save()
+        msg = colorize_msg('Сохранение поста перечитало его из БД')
+        self.assertTrue(
+            queries[0]['sql'].startswith('UPDATE "posts_post"'), msg
+        )
+        post = Post.objects.only('id', 'text').get(pk=post.pk)
+        post.group = self.busy
+        post.save()
+        msg = colorize_msg('Перенос поста не обновил статистику')
+        self.assertEqual(
+            (self.stats(self.quiet).posts_count,
+             self.stats(self.busy).posts_count),
+            (0, 1), msg,
+        )
+
+    def test_migration_formula_matches_app(self):
+        migration = import_module('posts.migrations.0004_group_stats')
+        dates = [
+            Post.objects.create(text=str(i), author=self.user).created
+            for i in range(3)
+        ]
+        msg = colorize_msg('Формула активности в миграции разошлась с кодом')
+        self.assertAlmostEqual(
+            migration.activity_of(dates), activity_of(dates), msg=msg
+        )
+
+    def test_directory_is_ordered_by_activity(self):
+        for _ in range(3):
+            Post.objects.create(text='text', author=self.user, group=self.busy)
+        Post.objects.create(text='text', author=self.user, group=self.quiet)
+
+        response = Client().get(reverse('posts:group_index'))
+        groups = [stats.group for stats in response.context['page_obj']]
+        msg = colorize_msg('Каталог сообществ не отсортирован по активности')
+        self.assertEqual(groups, [self.busy, self.quiet], msg)
+
+        response = Client().get('/api/v1/groups/', {'limit': 1})
+        data = response.json()
+        msg = colorize_msg('API сообществ без пагинации и статистики')
+        self.assertEqual(data['count'], 2, msg)
+        self.assertEqual(data['results'][0]['slug'], 'busy', msg)
+        self.assertEqual(data['results'][0]['stats']['posts_count'], 3, msg)
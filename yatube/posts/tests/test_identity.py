@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.http import Http404
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts import identity
+from posts.models import Group, Post
+
+from .utils import colorize_msg
+
+User = get_user_model()
+
+
+class IdentityCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test-user-Identity')
+        cls.group = Group.objects.create(title='group', slug='identity')
+        Post.objects.create(text='text', author=cls.user, group=cls.group)
+
+    def setUp(self):
+        identity.groups.clear()
+        identity.users.clear()
+
+    def test_lookup_hits_db_once(self):
+        identity.get_group_or_404('identity')
+        with self.assertNumQueries(0):
+            group = identity.get_group_or_404('identity')
+        msg = colorize_msg('Кэш вернул не то сообщество')
+        self.assertEqual(group, self.group, msg)
+        with self.assertRaises(Http404):
+            identity.get_user_or_404('nobody')
+
+    def test_save_invalidates(self):
+        identity.get_user_or_404(self.user.username)
+        self.user.username = 'renamed'
+        self.user.save()
+        msg = colorize_msg('Старый username остался в кэше')
+        with self.assertRaises(Http404, msg=msg):
+            identity.get_user_or_404('test-user-Identity')
+        self.assertEqual(
+            identity.get_user_or_404('renamed').pk, self.user.pk, msg
+        )
+
+    def test_user_cache_holds_only_public_fields(self):
+        user = identity.get_user_or_404('test-user-Identity')
+        msg = colorize_msg('В кэше пользователя лежит хэш пароля')
+        self.assertIn('password', user.get_deferred_fields(), msg)
+        with self.assertNumQueries(0):
+            user.get_full_name()
+
+    def test_login_keeps_cache(self):
+        user = User.objects.get(username='test-user-Identity')
+        identity.get_user_or_404(user.username)
+        update_last_login(None, user)
+        msg = colorize_msg('Обновление last_login сбросило кэш')
+        with self.assertNumQueries(0, msg=msg):
+            identity.get_user_or_404(user.username)
+
+    def test_pages_use_cache(self):
+        client = Client()
+        url = reverse('posts:group_list', args=['identity'])
+        client.get(url)
+        with self.assertNumQueries(2):
+            # Только счётчик и страница постов.
+            client.get(url)
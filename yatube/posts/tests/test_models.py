@@ -76,3 +76,26 @@ class PostModelTest(TestCase):
             )
             with self.subTest(template=help_text):
                 self.assertEqual(help_text, expected, msg)
+
+    def test_post_html_is_rendered_on_save(self):
+        """HTML анонса и текста считается при сохранении и экранирован."""
+        post = Post(author=self.user, text='<b>один</b>\nдва')
+        post.save()
+        msg = colorize_msg('HTML поста не рассчитан при сохранении')
+        html = '&lt;b&gt;один&lt;/b&gt;<br>два'
+        self.assertEqual(post.rendered_html, html, msg)
+        self.assertEqual(post.preview, html, msg)
+
+        post.text = 'новый'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        msg = colorize_msg('update_fields=["text"] не обновил HTML')
+        self.assertEqual(post.preview, 'новый', msg)
+
+    def test_listing_defers_post_text(self):
+        """Ленты не загружают полный текст поста."""
+        post = Post.objects.listing().get(id=self.post.id)
+        msg = colorize_msg('Лента загрузила полный текст поста')
+        self.assertEqual(
+            post.get_deferred_fields(), {'text', 'rendered_html'}, msg
+        )
@@ -0,0 +1,275 @@
+"""Число запросов к БД и время ответа для каждого маршрута.
+
+Число запросов не должно зависеть ни от размера страницы, ни от числа
+постов: каждый маршрут проверяется при 1 и 10 постах на странице на
+наборах из 10 и 1000 постов (manage.py seed_posts), и везде ожидается
+одно и то же число из ROUTES. N+1 в ленте или сериализаторе ломает
+этот тест, новый маршрут без записи в ROUTES - test_every_route_*.
+
+Время ответа GET-маршрутов на наборе из 1000 постов сравнивается с
+LATENCY_BUDGET_MS; на медленной машине бюджет масштабируется
+переменной окружения YATUBE_LATENCY_SCALE.
+"""
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from collections import namedtuple
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import Client, TestCase, override_settings
+from django.urls import URLPattern, URLResolver
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from about import urls as about_urls
+from api import urls as api_urls
+from posts import identity
+from posts import urls as posts_urls
+from posts.models import Comment, Follow, Post, UploadSession
+
+from .utils import colorize_msg
+
+User = get_user_model()
+# url(t, size) и data(t) получают тест с данными набора (t.user, t.post...).
+Route = namedtuple('Route', ['name', 'method', 'url', 'data', 'queries'])
+PAGE_SIZES = (1, 10)
+LATENCY_BUDGET_MS = 250 * float(os.environ.get('YATUBE_LATENCY_SCALE', 1))
+LATENCY_RUNS = 5
+PASSWORD = 'perf-password'
+
+
+def get(name, url, queries):
+    return Route(name, 'get', url, lambda t: None, queries)
+
+
+ROUTES = (
+    get('posts:index', lambda t, size: '/', 4),
+    get('posts:popular', lambda t, size: '/popular/', 3),
+    get('posts:group_index', lambda t, size: '/groups/', 4),
+    get('posts:group_list', lambda t, size: f'/group/{t.group.slug}/', 5),
+    get('posts:profile', lambda t, size: f'/profile/{t.user.username}/', 6),
+    get('posts:post_detail', lambda t, size: f'/posts/{t.post.id}/', 5),
+    get('posts:get_post', lambda t, size: f'/api/v1/posts/{t.post.id}/', 1),
+    get('posts:follow_index', lambda t, size: '/follow/', 4),
+    get('posts:post_create', lambda t, size: '/create/', 3),
+    Route(
+        'posts:post_create', 'post', lambda t, size: '/create/',
+        lambda t: {'text': 'новый пост'}, 3,
+    ),
+    get('posts:post_edit', lambda t, size: f'/posts/{t.post.id}/edit/', 4),
+    Route(
+        'posts:post_edit', 'post',
+        lambda t, size: f'/posts/{t.post.id}/edit/',
+        lambda t: {'text': 'правка', 'group': t.group.id}, 6,
+    ),
+    Route(
+        'posts:add_comment', 'post',
+        lambda t, size: f'/posts/{t.post.id}/comment/',
+        lambda t: {'text': 'комментарий'}, 6,
+    ),
+    get(
+        'posts:profile_follow',
+        lambda t, size: f'/profile/{t.other.username}/follow/', 6,
+    ),
+    get(
+        'posts:profile_unfollow',
+        lambda t, size: f'/profile/{t.followed.username}/unfollow/', 5,
+    ),
+    get('about:author', lambda t, size: '/about/author/', 2),
+    get('about:tech', lambda t, size: '/about/tech/', 2),
+    get('api:api-root', lambda t, size: '/api/v1/', 1),
+    get('api:posts-list', lambda t, size: f'/api/v1/posts/?limit={size}', 3),
+    Route(
+        'api:posts-list', 'post', lambda t, size: '/api/v1/posts/',
+        lambda t: {'text': 'пост из API'}, 2,
+    ),
+    get('api:posts-detail', lambda t, size: f'/api/v1/posts/{t.post.id}/', 1),
+    get(
+        'api:groups-list', lambda t, size: f'/api/v1/groups/?limit={size}', 3
+    ),
+    get(
+        'api:groups-detail', lambda t, size: f'/api/v1/groups/{t.group.id}/',
+        2,
+    ),
+    get(
+        'api:comments-list',
+        lambda t, size: f'/api/v1/posts/{t.post.id}/comments/', 3,
+    ),
+    Route(
+        'api:comments-list', 'post',
+        lambda t, size: f'/api/v1/posts/{t.post.id}/comments/',
+        lambda t: {'text': 'комментарий из API'}, 3,
+    ),
+    get(
+        'api:comments-detail',
+        lambda t, size: (
+            f'/api/v1/posts/{t.post.id}/comments/{t.comment.id}/'
+        ), 3,
+    ),
+    get('api:follow-list', lambda t, size: '/api/v1/follow/', 2),
+    get(
+        'api:follow-suggestions',
+        lambda t, size: '/api/v1/follow/suggestions/', 2,
+    ),
+    Route(
+        'api:uploads-list', 'post', lambda t, size: '/api/v1/uploads/',
+        lambda t: {'filename': 'pic.gif', 'size': 100}, 2,
+    ),
+    get(
+        'api:uploads-detail',
+        lambda t, size: f'/api/v1/uploads/{t.upload.token}/', 2,
+    ),
+    Route(
+        'api:jwt-create', 'post', lambda t, size: '/api/v1/jwt/create/',
+        lambda t: {'username': t.user.username, 'password': PASSWORD}, 1,
+    ),
+    Route(
+        'api:jwt-refresh', 'post', lambda t, size: '/api/v1/jwt/refresh/',
+        lambda t: {'refresh': str(RefreshToken.for_user(t.user))}, 0,
+    ),
+    Route(
+        'api:jwt-verify', 'post', lambda t, size: '/api/v1/jwt/verify/',
+        lambda t: {'token': t.access}, 0,
+    ),
+)
+
+
+def route_names(patterns, namespace):
+    """Имена маршрутов без вариантов DRF с суффиксом формата (.json)."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from route_names(pattern.url_patterns, namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name and (
+            'format' not in pattern.pattern.regex.groupindex
+        ):
+            yield f'{namespace}:{pattern.name}'
+
+
+FAST_HASHER = override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+
+
+class QueryBudgetMixin:
+    posts = None
+
+    @classmethod
+    def setUpClass(cls):
+        # Маршруты загрузок пишут файлы: не в настоящие MEDIA_ROOT и
+        # UPLOAD_TEMP_DIR.
+        cls.temp_root = tempfile.mkdtemp()
+        cls.temp_settings = override_settings(
+            MEDIA_ROOT=os.path.join(cls.temp_root, 'media'),
+            UPLOAD_TEMP_DIR=os.path.join(cls.temp_root, 'upload_tmp'),
+        )
+        cls.temp_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.temp_settings.disable()
+        shutil.rmtree(cls.temp_root, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_posts', users=20, groups=3, posts=cls.posts,
+            comments=cls.posts * 2, follows=3, text_length=120,
+            stdout=StringIO(),
+        )
+        post = Post.objects.exclude(group=None).select_related(
+            'author', 'group'
+        ).first()
+        cls.post, cls.user, cls.group = post, post.author, post.group
+        cls.user.set_password(PASSWORD)
+        cls.user.save()
+        cls.comment = Comment.objects.create(
+            text='комментарий', author=cls.user, post=post
+        )
+        following = Follow.objects.filter(user=cls.user)
+        cls.followed = following.first().author
+        cls.other = User.objects.exclude(
+            id__in=following.values('author_id')
+        ).exclude(id=cls.user.id).first()
+        cls.upload = UploadSession.objects.create(
+            user=cls.user, filename='pic.gif', size=100
+        )
+        cls.access = str(RefreshToken.for_user(cls.user).access_token)
+
+    def setUp(self):
+        self.client = Client(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        self.client.force_login(self.user)
+
+    def request(self, route, size):
+        cache.clear()
+        identity.groups.clear()
+        identity.users.clear()
+        data = route.data(self)
+        return getattr(self.client, route.method)(
+            route.url(self, size), data,
+            **({'content_type': 'application/json'}
+               if route.name.startswith('api:') and data else {}),
+        )
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        for size in PAGE_SIZES:
+            for route in ROUTES:
+                with self.subTest(route=route.name, method=route.method,
+                                  page_size=size), override_settings(
+                    NUMBER_OF_POSTS_ON_ONE_PAGE=size
+                ), transaction.atomic():
+                    with self.assertNumQueries(route.queries):
+                        response = self.request(route, size)
+                    msg = colorize_msg(f'{route.name}: {response.status_code}')
+                    self.assertLess(response.status_code, 400, msg)
+                    transaction.set_rollback(True)
+
+
+@FAST_HASHER
+class SmallDatasetQueryTest(QueryBudgetMixin, TestCase):
+    posts = 10
+
+    def test_seeded_texts_are_rendered(self):
+        for model in (Post, Comment):
+            msg = colorize_msg(f'seed_posts не отрендерил {model.__name__}')
+            self.assertFalse(
+                model.objects.filter(rendered_html='').exists(), msg
+            )
+
+    def test_every_route_has_a_budget(self):
+        names = {
+            *route_names(posts_urls.urlpatterns, 'posts'),
+            *route_names(api_urls.urlpatterns, 'api'),
+            *route_names(about_urls.urlpatterns, 'about'),
+        }
+        msg = colorize_msg('Маршруты без бюджета запросов в ROUTES')
+        self.assertEqual(
+            names - {route.name for route in ROUTES}, set(), msg
+        )
+
+
+@FAST_HASHER
+class LargeDatasetQueryTest(QueryBudgetMixin, TestCase):
+    posts = 1000
+
+    def test_latency_budget(self):
+        for route in ROUTES:
+            if route.method != 'get':
+                continue
+            with self.subTest(route=route.name):
+                timings = []
+                for _ in range(LATENCY_RUNS):
+                    started = time.perf_counter()
+                    self.request(route, PAGE_SIZES[-1])
+                    timings.append(time.perf_counter() - started)
+                median = statistics.median(timings) * 1000
+                msg = colorize_msg(
+                    f'{route.name}: {median:.0f} мс > {LATENCY_BUDGET_MS} мс'
+                )
+                self.assertLessEqual(median, LATENCY_BUDGET_MS, msg)
@@ -0,0 +1,109 @@
+import asyncio
+import threading
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from posts.broadcast import broadcaster, post_poller
+from posts.models import Follow
+from posts.models import Group, Post
+from posts.sse import sse_application
+
+from .utils import colorize_msg
+
+User = get_user_model()
+
+
+class NewPostsStreamTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test-user-Stream')
+        cls.group = Group.objects.create(title='group', slug='group-stream')
+
+    @async_to_sync
+    async def open_stream(self, path, publish_to=None, create=None,
+                          headers=()):
+        """Открывает поток, публикует пост в канал (или создаёт пост
+        функцией create) и ждёт событие."""
+        sent = []
+        closed = asyncio.Event()
+
+        async def receive():
+            await closed.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+            body = message.get('body', b'')
+            if b'new_posts' in body or not message.get('more_body', True):
+                closed.set()
+
+        scope = {'type': 'http', 'path': path, 'headers': list(headers)}
+        stream = asyncio.ensure_future(sse_application(scope, receive, send))
+        if create is not None:
+            while post_poller.last_id is None:
+                await asyncio.sleep(0.01)
+            await sync_to_async(create)()
+        if publish_to is not None:
+            while not broadcaster.subscribers_count():
+                await asyncio.sleep(0.01)
+            threading.Thread(
+                target=broadcaster.publish, args=(publish_to,)
+            ).start()
+        await asyncio.wait_for(stream, 5)
+        return sent
+
+    def test_stream_receives_new_posts_event(self):
+        sent = self.open_stream('/stream/', publish_to=['all'])
+        msg = colorize_msg('Поток не получил событие о новом посте')
+        self.assertEqual(sent[0]['status'], 200, msg)
+        self.assertIn(b'"count": 1', sent[-1]['body'], msg)
+        msg = colorize_msg('Закрытый поток не отписался от рассылки')
+        self.assertEqual(broadcaster.subscribers_count(), 0, msg)
+
+    def test_unknown_group_stream_is_404(self):
+        sent = self.open_stream('/stream/group/missing/')
+        msg = colorize_msg('Поток несуществующей группы не вернул 404')
+        self.assertEqual(sent[0]['status'], 404, msg)
+
+    @override_settings(SSE_POLL_SECONDS=0.01)
+    def test_posts_saved_anywhere_reach_stream(self):
+        def create():
+            # bulk_create без сигналов - как пост из другого процесса.
+            Post.objects.bulk_create([
+                Post(text='post-text', author=self.user, group=self.group)
+            ])
+
+        sent = self.open_stream(
+            f'/stream/group/{self.group.slug}/', create=create
+        )
+        msg = colorize_msg('Пост из другого процесса не попал в поток')
+        self.assertIn(b'"count": 1', sent[-1]['body'], msg)
+        msg = colorize_msg('Опрос БД не остановлен после закрытия потока')
+        self.assertIsNone(post_poller.task, msg)
+
+    def test_follow_stream_checks_session_hash(self):
+        author = User.objects.create(username='test-author-Stream')
+        Follow.objects.create(user=self.user, author=author)
+        self.user.set_password('old-password')
+        self.user.save()
+        client = Client()
+        client.force_login(self.user)
+        cookie = client.cookies[settings.SESSION_COOKIE_NAME].value
+        headers = [(b'cookie', f'{settings.SESSION_COOKIE_NAME}={cookie}'
+                    .encode())]
+
+        sent = self.open_stream(
+            '/stream/follow/', publish_to=[f'author:{author.id}'],
+            headers=headers,
+        )
+        msg = colorize_msg('Поток избранных авторов не открылся по сессии')
+        self.assertEqual(sent[0]['status'], 200, msg)
+
+        self.user.set_password('new-password')
+        self.user.save()
+        sent = self.open_stream('/stream/follow/', headers=headers)
+        msg = colorize_msg('Сессия со старым паролем открыла поток')
+        self.assertEqual(sent[0]['status'], 404, msg)
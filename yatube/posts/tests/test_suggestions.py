@@ -0,0 +1,75 @@
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Follow, FollowSuggestion
+from posts.utils import get_suggestions
+from rest_framework.test import APIClient
+
+from .utils import colorize_msg
+
+User = get_user_model()
+
+
+class FollowSuggestionsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.me, cls.friend_1, cls.friend_2, cls.star, cls.other = (
+            User.objects.create(username=f'test-user-Suggestions-{i}')
+            for i in range(5)
+        )
+        # Оба автора, на которых подписан me, читают star; other - один.
+        for user, author in (
+            (cls.me, cls.friend_1),
+            (cls.me, cls.friend_2),
+            (cls.friend_1, cls.star),
+            (cls.friend_2, cls.star),
+            (cls.friend_2, cls.other),
+            (cls.friend_1, cls.me),
+        ):
+            Follow.objects.create(user=user, author=author)
+
+    def setUp(self):
+        cache.clear()
+        call_command('compute_follow_suggestions', top_k=10, stdout=StringIO())
+
+    def test_suggestions_ranked_by_common_follows(self):
+        suggestions = list(FollowSuggestion.objects.filter(
+            user=self.me
+        ).values_list('author', 'score'))
+        msg = colorize_msg('Рекомендации посчитаны неверно')
+        self.assertEqual(
+            suggestions, [(self.star.id, 2), (self.other.id, 1)], msg
+        )
+
+    def test_suggestions_shown_in_profile_and_api(self):
+        client = Client()
+        client.force_login(self.me)
+        response = client.get(reverse(
+            'posts:profile', kwargs={'username': self.star.username}
+        ))
+        msg = colorize_msg('Рекомендации не попали в профиль')
+        self.assertEqual(len(response.context['suggestions']), 2, msg)
+
+        api_client = APIClient()
+        api_client.force_authenticate(self.me)
+        response = api_client.get('/api/v1/follow/suggestions/')
+        msg = colorize_msg('API рекомендаций вернуло неверный ответ')
+        self.assertEqual(response.status_code, HTTPStatus.OK, msg)
+        self.assertEqual(
+            response.json()[0], {'author': self.star.username, 'score': 2},
+            msg,
+        )
+
+    def test_followed_authors_do_not_shrink_suggestions(self):
+        Follow.objects.create(user=self.me, author=self.star)
+        msg = colorize_msg('Подписка на автора съела место в рекомендациях')
+        self.assertEqual(
+            [s.author for s in get_suggestions(self.me, limit=1)],
+            [self.other], msg,
+        )
@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from posts.models import Comment, Post, TrendingPost
+from posts.trending import compute_score, update_trending
+
+from .utils import colorize_msg
+
+User = get_user_model()
+
+
+class TrendingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test-user-Trending')
+        cls.old_post = Post.objects.create(text='old', author=cls.user)
+        cls.new_post = Post.objects.create(text='new', author=cls.user)
+        for post, age in ((cls.old_post, 12), (cls.new_post, 1)):
+            Post.objects.filter(id=post.id).update(
+                created=timezone.now() - timedelta(hours=age)
+            )
+
+    def ranking(self):
+        return list(TrendingPost.objects.values_list('post_id', flat=True))
+
+    def test_score_decays_with_age(self):
+        now = timezone.now()
+        msg = colorize_msg('Более старый пост получил больший рейтинг')
+        self.assertLess(
+            compute_score(now - timedelta(days=1), 5, 0),
+            compute_score(now, 5, 0),
+            msg,
+        )
+
+    def test_incremental_update_picks_up_new_comments(self):
+        update_trending()
+        msg = colorize_msg('Новый пост без комментариев не первый')
+        self.assertEqual(
+            self.ranking(), [self.new_post.id, self.old_post.id], msg
+        )
+
+        Comment.objects.bulk_create(
+            Comment(text='comment', author=self.user, post=self.old_post)
+            for _ in range(3)
+        )
+        msg = colorize_msg('Инкрементальный пересчёт взял лишние посты')
+        self.assertEqual(update_trending(), 1, msg)
+        msg = colorize_msg('Обсуждаемый пост не поднялся в рейтинге')
+        self.assertEqual(
+            self.ranking(), [self.old_post.id, self.new_post.id], msg
+        )
+
+    def test_popular_page_lists_ranked_posts(self):
+        update_trending()
+        response = Client().get(reverse('posts:popular'))
+        posts = [item.post for item in response.context['page_obj']]
+        msg = colorize_msg('Страница "Популярное" не показала рейтинг')
+        self.assertEqual(posts, [self.new_post, self.old_post], msg)
@@ -0,0 +1,162 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from core.models import Task
+from core.tasks import Worker
+from posts.models import Post, UploadSession
+
+from .utils import colorize_msg
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+IMAGE = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    UPLOAD_TEMP_DIR=TEMP_MEDIA_ROOT + '-tmp',
+)
+class ChunkedUploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test-user-Uploads')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(TEMP_MEDIA_ROOT + '-tmp', ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def start(self, size=len(IMAGE)):
+        response = self.client.post(
+            '/api/v1/uploads/',
+            {'filename': 'pic.gif', 'size': size},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()['token']
+
+    def send(self, token, offset, data):
+        return self.client.patch(
+            f'/api/v1/uploads/{token}/', data,
+            content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def upload(self):
+        token = self.start()
+        self.send(token, 0, IMAGE[:20])
+        self.send(token, 20, IMAGE[20:])
+        return token
+
+    def test_chunks_resume_from_server_offset(self):
+        token = self.start()
+        response = self.send(token, 0, IMAGE[:20])
+        msg = colorize_msg('Кусок не принят')
+        self.assertEqual(response.json()['offset'], 20, msg)
+
+        response = self.send(token, 0, IMAGE[:20])
+        msg = colorize_msg('Повторный кусок не вернул 409 со смещением')
+        self.assertEqual(response.status_code, 409, msg)
+        self.assertEqual(response.json()['offset'], 20, msg)
+
+        response = self.send(token, 20, IMAGE[20:])
+        msg = colorize_msg('Загрузка не завершилась на последнем куске')
+        self.assertTrue(response.json()['complete'], msg)
+        session = UploadSession.objects.get(token=token)
+        stored = os.path.join(TEMP_MEDIA_ROOT, session.stored_name)
+        with open(stored, 'rb') as f:
+            self.assertEqual(f.read(), IMAGE, msg)
+
+    def test_not_an_image_is_rejected(self):
+        token = self.start(size=4)
+        response = self.send(token, 0, b'text')
+        msg = colorize_msg('Не-картинка принята')
+        self.assertEqual(response.status_code, 400, msg)
+        self.assertFalse(UploadSession.objects.exists(), msg)
+
+    def test_form_attaches_upload_by_token(self):
+        token = self.upload()
+        stored_name = UploadSession.objects.get(token=token).stored_name
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'with upload', 'upload_token': token,
+        })
+        msg = colorize_msg('Пост не получил загруженную картинку')
+        self.assertEqual(
+            Post.objects.get(text='with upload').image.name, stored_name, msg
+        )
+        msg = colorize_msg('Токен загрузки можно использовать повторно')
+        self.assertFalse(UploadSession.objects.exists(), msg)
+
+    def test_foreign_token_is_rejected(self):
+        token = self.upload()
+        other = Client()
+        other.force_login(User.objects.create(username='test-user-Other'))
+        response = other.post(reverse('posts:post_create'), {
+            'text': 'stolen', 'upload_token': token,
+        })
+        msg = colorize_msg('Чужая загрузка прикреплена к посту')
+        self.assertFalse(Post.objects.filter(text='stolen').exists(), msg)
+        self.assertTrue(response.context['form'].errors, msg)
+
+    def test_failed_post_save_keeps_upload(self):
+        token = self.upload()
+        msg = colorize_msg('Загрузка закрыта, хотя пост не сохранился')
+        with mock.patch.object(Post, 'save', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.client.post(reverse('posts:post_create'), {
+                    'text': 'failed', 'upload_token': token,
+                })
+        self.assertTrue(
+            UploadSession.objects.filter(token=token).exists(), msg
+        )
+
+    def test_form_image_is_stored_by_task(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('posts:post_create'), {
+                'text': 'deferred',
+                'image': SimpleUploadedFile('pic.gif', IMAGE, 'image/gif'),
+            })
+        post = Post.objects.get(text='deferred')
+        msg = colorize_msg('Картинка из формы сохранена в запросе')
+        self.assertFalse(post.image, msg)
+        self.assertTrue(Task.objects.exists(), msg)
+
+        worker = Worker(concurrency=1)
+        for task_obj in worker.claim(10):
+            worker.execute(task_obj)
+        worker.executor.shutdown()
+        post.refresh_from_db()
+        msg = colorize_msg('Задача не прикрепила картинку к посту')
+        self.assertTrue(post.image, msg)
+        self.assertTrue(os.path.exists(post.image.path), msg)
+        self.assertFalse(UploadSession.objects.exists(), msg)
+
+    def test_partial_upload_is_not_served_as_media(self):
+        token = self.start()
+        self.send(token, 0, IMAGE[:20])
+        msg = colorize_msg('Недокачанный файл лежит в MEDIA_ROOT')
+        for root, _, files in os.walk(TEMP_MEDIA_ROOT):
+            self.assertNotIn(f'{token}.part', files, msg)
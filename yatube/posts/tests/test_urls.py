@@ -31,6 +31,7 @@ class PostsURLTests(TestCase):
 
         cls.urls_common = {
             '/': 'posts/index.html',
+            '/groups/': 'posts/groups.html',
             f'/group/{cls.tmp_group.slug}/': 'posts/group_list.html',
             f'/profile/{cls.user.username}/': 'posts/profile.html',
             cls.url_first_post: 'posts/post_detail.html',
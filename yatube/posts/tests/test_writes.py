@@ -0,0 +1,122 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+
+from posts.middleware import WriteBufferMiddleware
+from posts.models import Comment, Follow, Post
+from posts.writes import WriteBuffer, write_buffer
+
+from .utils import colorize_msg
+
+User = get_user_model()
+
+
+class WriteBufferTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test-user-WriteBuffer')
+        cls.author = User.objects.create(username='test-author-WriteBuffer')
+        cls.post = Post.objects.create(text='post-text', author=cls.author)
+
+    def setUp(self):
+        self.buffer = WriteBuffer()
+
+    def make_comment(self):
+        return Comment(text='comment', author=self.user, post=self.post)
+
+    def test_sync_write_is_committed_immediately(self):
+        self.buffer.add(self.make_comment(), sync=True)
+        msg = colorize_msg('Синхронная запись не попала в БД')
+        self.assertEqual(Comment.objects.count(), 1, msg)
+        self.assertEqual(len(self.buffer), 0, msg)
+
+    def test_deferred_writes_are_flushed_in_batch(self):
+        for _ in range(3):
+            self.buffer.add(self.make_comment(), sync=False)
+        msg = colorize_msg('Отложенная запись попала в БД до сброса')
+        self.assertEqual(Comment.objects.count(), 0, msg)
+        with self.assertNumQueries(3):
+            self.buffer.flush()
+        msg = colorize_msg('Пачка комментариев не записана при сбросе')
+        self.assertEqual(Comment.objects.count(), 3, msg)
+
+    def test_duplicate_follow_is_ignored(self):
+        for _ in range(2):
+            self.buffer.add(Follow(user=self.user, author=self.author))
+        self.buffer.add(Follow(user=self.user, author=self.user))
+        msg = colorize_msg('Дубль или подписка на себя попали в БД')
+        self.assertEqual(Follow.objects.count(), 1, msg)
+
+    def test_flush_renders_comment_html(self):
+        comment = Comment(text='<i>a</i>\nb', author=self.user, post=self.post)
+        self.buffer.add(comment, sync=True)
+        msg = colorize_msg('Накопитель записал комментарий без HTML')
+        self.assertEqual(
+            Comment.objects.get().rendered_html,
+            '&lt;i&gt;a&lt;/i&gt;<br>b',
+            msg,
+        )
+
+    def test_deferred_write_is_committed_before_response(self):
+        def view(request):
+            write_buffer.add(self.make_comment(), sync=False)
+            return HttpResponse()
+
+        WriteBufferMiddleware(view)(RequestFactory().post('/'))
+        msg = colorize_msg('Отложенная запись не попала в БД до ответа')
+        self.assertEqual(Comment.objects.count(), 1, msg)
+
+
+class SlowBuffer(WriteBuffer):
+    """Первая пачка пишется, пока тест не отпустит release."""
+
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.batches = []
+
+    def _write(self, pending):
+        objs = [obj for objs in pending.values() for obj in objs]
+        if not self.batches:
+            self.started.set()
+            self.release.wait(5)
+        self.batches.append(objs)
+        return len(objs)
+
+
+class WriteBufferConcurrencyTest(SimpleTestCase):
+    def test_sync_add_waits_for_own_batch(self):
+        buffer = SlowBuffer()
+        buffer.add('первый', sync=False)
+        flusher = threading.Thread(target=buffer.flush)
+        flusher.start()
+        buffer.started.wait(5)
+        returned = []
+        writers = [
+            threading.Thread(
+                target=lambda obj=obj: returned.append(
+                    buffer.add(obj, sync=True) or obj
+                )
+            )
+            for obj in ('второй', 'третий')
+        ]
+        for writer in writers:
+            writer.start()
+        while len(buffer) < 2:
+            writers[0].join(0.01)
+        msg = colorize_msg('sync-запись вернулась до записи своей пачки')
+        self.assertEqual(returned, [], msg)
+        buffer.release.set()
+        for thread in (flusher, *writers):
+            thread.join(5)
+        self.assertEqual(sorted(returned), ['второй', 'третий'], msg)
+        msg = colorize_msg('Ждавшие sync-записи не ушли одной пачкой')
+        self.assertEqual(
+            [sorted(batch) for batch in buffer.batches],
+            [['первый'], ['второй', 'третий']],
+            msg,
+        )
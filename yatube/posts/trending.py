@@ -0,0 +1,127 @@
+"""Рейтинг популярных постов с затуханием по времени.
+
+Вес поста w = 1 + комментарии * TRENDING_COMMENT_WEIGHT
++ подписчики автора * TRENDING_FOLLOWER_WEIGHT затухает как
+w * 2 ** (-возраст / TRENDING_HALF_LIFE_HOURS). Храним логарифм веса,
+отсчитанный от общей точки EPOCH:
+
+    score = log2(w) + (created - EPOCH) / half_life.
+
+Порядок постов по такому score совпадает с порядком по затухшему весу
+в любой момент времени, поэтому пересчитывать нужно только посты, у
+которых изменились комментарии или подписчики автора.
+"""
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import Comment, Follow, Post, TrendingPost
+
+EPOCH = datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def compute_score(created, comments_count, author_followers):
+    weight = (
+        1
+        + comments_count * settings.TRENDING_COMMENT_WEIGHT
+        + author_followers * settings.TRENDING_FOLLOWER_WEIGHT
+    )
+    age_units = (created - EPOCH).total_seconds() / (
+        settings.TRENDING_HALF_LIFE_HOURS * 3600
+    )
+    return math.log2(weight) + age_units
+
+
+def _follower_counts(author_ids):
+    return dict(
+        Follow.objects.filter(
+            author_id__in=author_ids
+        ).values_list('author_id').annotate(Count('id'))
+    )
+
+
+def _changed_candidates(window_start, since):
+    """Посты окна, чьи входные данные изменились после since."""
+    candidates = set(Post.objects.filter(
+        created__gte=since
+    ).values_list('id', flat=True))
+    candidates.update(Comment.objects.filter(
+        created__gte=since, post__created__gte=window_start
+    ).values_list('post_id', flat=True))
+
+    stored = dict(TrendingPost.objects.order_by().values_list(
+        'post__author_id', 'author_followers'
+    ).distinct())
+    current = _follower_counts(list(stored))
+    changed_authors = [
+        author_id for author_id, followers in stored.items()
+        if current.get(author_id, 0) != followers
+    ]
+    candidates.update(Post.objects.filter(
+        author_id__in=changed_authors, created__gte=window_start
+    ).values_list('id', flat=True))
+    return candidates
+
+
+def update_trending(full=False):
+    """Пересчитывает рейтинг. Возвращает число пересчитанных постов."""
+    started = timezone.now()
+    window_start = started - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+    TrendingPost.objects.filter(post__created__lt=window_start).delete()
+
+    since = TrendingPost.objects.aggregate(since=Max('updated'))['since']
+    if full or since is None:
+        posts = Post.objects.filter(created__gte=window_start)
+    else:
+        posts = Post.objects.filter(
+            id__in=_changed_candidates(window_start, since),
+            created__gte=window_start,
+        )
+    return _rescore(posts, started)
+
+
+def rescore_posts(post_ids):
+    """Пересчитывает рейтинг данных постов (после массовых правок).
+
+    Отметка updated не сдвигается, чтобы следующий update_trending не
+    пропустил изменения остальных постов.
+    """
+    since = TrendingPost.objects.aggregate(since=Max('updated'))['since']
+    if since is None:
+        return 0
+    window_start = timezone.now() - timedelta(
+        days=settings.TRENDING_WINDOW_DAYS
+    )
+    return _rescore(Post.objects.filter(
+        id__in=post_ids, created__gte=window_start,
+    ), since)
+
+
+def _rescore(posts, updated):
+    rows = list(posts.annotate(
+        comments_count=Count('comments')
+    ).values_list('id', 'created', 'author_id', 'comments_count'))
+    followers = _follower_counts({row[2] for row in rows})
+
+    trending = [
+        TrendingPost(
+            post_id=post_id,
+            score=compute_score(
+                created, comments_count, followers.get(author_id, 0)
+            ),
+            comments_count=comments_count,
+            author_followers=followers.get(author_id, 0),
+            updated=updated,
+        )
+        for post_id, created, author_id, comments_count in rows
+    ]
+    with transaction.atomic():
+        TrendingPost.objects.filter(
+            post_id__in=[row.post_id for row in trending]
+        ).delete()
+        TrendingPost.objects.bulk_create(trending, batch_size=1000)
+    return len(trending)
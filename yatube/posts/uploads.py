@@ -0,0 +1,174 @@
+"""Докачиваемые загрузки картинок постов кусками.
+
+Протокол (api/v1/uploads/):
+  POST  {filename, size}          - открыть сессию, в ответе token;
+  PATCH <token>/ + Upload-Offset  - дописать кусок с указанного смещения;
+  GET   <token>/                  - сколько уже получено (для докачки).
+Кусок читается из запроса блоками и сразу пишется во временный файл в
+UPLOAD_TEMP_DIR, так что память процесса не зависит от размера файла.
+Когда получен весь файл, он проверяется Pillow и переносится в хранилище
+картинок постов (core.storage, без копирования), а сессия отдаёт
+stored_name.
+Пост получает картинку по token через claim_upload. Картинка из формы
+поста проходит тот же путь в фоновой задаче (stash_upload). Временные
+файлы лежат вне MEDIA_ROOT: недокачанное не отдаётся как медиа.
+"""
+import fcntl
+import os
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from core.storage import release, retain
+
+from .models import Post, UploadSession
+
+READ_BLOCK = 64 * 1024
+
+
+class UploadConflict(Exception):
+    """Смещение куска не совпало с уже полученным."""
+
+    def __init__(self, received):
+        super().__init__(f'Ожидалось смещение {received}')
+        self.received = received
+
+
+class TempFile(File):
+    """Файл на диске, который хранилище может переместить, а не копировать."""
+
+    def temporary_file_path(self):
+        return self.name
+
+
+def temp_path(session):
+    return os.path.join(settings.UPLOAD_TEMP_DIR, f'{session.token}.part')
+
+
+def start_upload(user, filename, size):
+    if size > settings.UPLOAD_MAX_SIZE:
+        raise ValidationError(
+            f'Файл больше {settings.UPLOAD_MAX_SIZE} байт.'
+        )
+    os.makedirs(settings.UPLOAD_TEMP_DIR, exist_ok=True)
+    session = UploadSession.objects.create(
+        user=user, filename=os.path.basename(filename), size=size
+    )
+    open(temp_path(session), 'wb').close()
+    return session
+
+
+def stash_upload(user, uploaded):
+    """Завершённая загрузка из файла формы поста.
+
+    Файл только пишется в UPLOAD_TEMP_DIR: проверку и перенос в хранилище
+    делает задача posts.tasks.store_post_image.
+    """
+    os.makedirs(settings.UPLOAD_TEMP_DIR, exist_ok=True)
+    session = UploadSession.objects.create(
+        user=user, filename=os.path.basename(uploaded.name),
+        size=uploaded.size, received=uploaded.size,
+    )
+    with open(temp_path(session), 'wb') as part:
+        for chunk in uploaded.chunks():
+            part.write(chunk)
+    return session
+
+
+def append_chunk(session, offset, stream, length):
+    """Дописывает length байт из stream с позиции offset.
+
+    Запись под блокировкой файла: параллельные куски одной сессии
+    не перемешаются. Возвращает обновлённую сессию.
+    """
+    if session.complete:
+        raise UploadConflict(session.size)
+    if offset + length > session.size:
+        raise ValidationError('Кусок выходит за объявленный размер файла.')
+    with open(temp_path(session), 'r+b') as part:
+        fcntl.flock(part, fcntl.LOCK_EX)
+        session.refresh_from_db()
+        if offset != session.received:
+            raise UploadConflict(session.received)
+        part.seek(offset)
+        left = length
+        while left:
+            block = stream.read(min(READ_BLOCK, left))
+            if not block:
+                break
+            part.write(block)
+            left -= len(block)
+        part.truncate()
+        session.received = offset + length - left
+        session.save(update_fields=['received'])
+    if session.received == session.size:
+        finish_upload(session)
+    return session
+
+
+def finish_upload(session):
+    path = temp_path(session)
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except Exception:
+        os.remove(path)
+        session.delete()
+        raise ValidationError('Загруженный файл - не картинка.')
+    field = Post._meta.get_field('image')
+    name = field.generate_filename(None, session.filename)
+    with TempFile(open(path, 'rb')) as content:
+        session.stored_name = field.storage.save(name, content)
+    if os.path.exists(path):
+        os.remove(path)
+    with transaction.atomic():
+        session.save(update_fields=['stored_name'])
+        retain(session.stored_name)
+
+
+def get_completed_upload(token, user):
+    """Завершённая загрузка user по token или ValidationError."""
+    session = UploadSession.objects.filter(
+        token=token, user=user
+    ).exclude(stored_name='').first()
+    if session is None:
+        raise ValidationError('Загрузка не найдена или не завершена.')
+    return session
+
+
+@contextmanager
+def claim_upload(token, user):
+    """Имя файла завершённой загрузки user для сохраняемого в блоке поста.
+
+    Сессия закрывается в одной транзакции с сохранением поста: если пост
+    не сохранился, загрузку можно прикрепить ещё раз.
+    """
+    session = get_completed_upload(token, user)
+    with transaction.atomic():
+        yield session.stored_name
+        session.delete()
+        release(session.stored_name)
+
+
+def clear_stale_uploads():
+    """Удаляет брошенные сессии старше UPLOAD_SESSION_TTL вместе с файлами."""
+    stale = UploadSession.objects.filter(
+        created__lt=timezone.now() - timedelta(
+            seconds=settings.UPLOAD_SESSION_TTL
+        )
+    )
+    count = 0
+    for session in stale.iterator():
+        if os.path.exists(temp_path(session)):
+            os.remove(temp_path(session))
+        with transaction.atomic():
+            session.delete()
+            release(session.stored_name)
+        count += 1
+    return count
@@ -1,14 +1,23 @@
+from django.conf import settings
 from django.urls import path
 
 from . import views
 
 app_name = 'posts'
 
+# Под ASGI ленты и пост отдаются асинхронными view (POSTS_ASYNC_VIEWS).
+if settings.POSTS_ASYNC_VIEWS:
+    from . import async_views as feed_views
+else:
+    feed_views = views
+
 urlpatterns = [
-    path('', views.index, name='index'),
-    path('group/<slug:slug>/', views.group_posts, name='group_list'),
-    path('profile/<str:username>/', views.profile, name='profile'),
-    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('', feed_views.index, name='index'),
+    path('popular/', views.popular, name='popular'),
+    path('groups/', views.group_index, name='group_index'),
+    path('group/<slug:slug>/', feed_views.group_posts, name='group_list'),
+    path('profile/<str:username>/', feed_views.profile, name='profile'),
+    path('posts/<int:post_id>/', feed_views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path(
@@ -25,5 +34,5 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
-    path('api/v1/posts/<int:post_id>/', views.get_post, name='get_post'),
+    path('api/v1/posts/<int:post_id>/', feed_views.get_post, name='get_post'),
 ]
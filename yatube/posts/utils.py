@@ -1,8 +1,69 @@
 from django.conf import settings
+from django.core.cache import caches
 from django.core.paginator import Paginator
+from django.middleware.cache import CacheMiddleware
+from django.shortcuts import render
+from django.utils.decorators import decorator_from_middleware_with_args
+
+from core.streaming import stream_render
+
+from .models import Follow, FollowSuggestion
 
 
 def paginator(request, post_list):
     paginator = Paginator(post_list, settings.NUMBER_OF_POSTS_ON_ONE_PAGE)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
+
+
+def render_listing(request, template_name, context):
+    """render для лент; при STREAM_LISTINGS ответ отдаётся потоком."""
+    if settings.STREAM_LISTINGS:
+        return stream_render(request, template_name, context)
+    return render(request, template_name, context)
+
+
+LISTINGS_GENERATION_KEY = 'listings:generation'
+
+
+class ListingCacheMiddleware(CacheMiddleware):
+    """CacheMiddleware лент: в префиксе ключа - поколение кэша лент.
+
+    Страницу в кэше нельзя найти по постам на ней, поэтому массовые
+    правки (posts.moderation) сбрасывают все ленты сразу через
+    invalidate_listings. Обычные правки поста кэш не трогают: ленты
+    обновятся по таймауту.
+    """
+
+    @property
+    def key_prefix(self):
+        generation = self.cache.get(LISTINGS_GENERATION_KEY, 0)
+        return f'{self._key_prefix}listings.{generation}'
+
+    @key_prefix.setter
+    def key_prefix(self, value):
+        self._key_prefix = value
+
+
+def listing_cache_page(timeout):
+    """cache_page для лент, сбрасываемый invalidate_listings."""
+    return decorator_from_middleware_with_args(ListingCacheMiddleware)(
+        page_timeout=timeout
+    )
+
+
+def invalidate_listings():
+    cache = caches[settings.CACHE_MIDDLEWARE_ALIAS]
+    try:
+        cache.incr(LISTINGS_GENERATION_KEY)
+    except ValueError:
+        cache.set(LISTINGS_GENERATION_KEY, 1, None)
+
+
+def get_suggestions(user, limit=None):
+    """Рекомендованные авторы без тех, на кого уже подписан user."""
+    if not user.is_authenticated:
+        return []
+    return list(FollowSuggestion.objects.filter(user=user).exclude(
+        author_id__in=Follow.objects.filter(user=user).values('author_id')
+    ).select_related('author')[:limit or settings.FOLLOW_SUGGESTIONS_LIMIT])
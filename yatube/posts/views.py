@@ -1,62 +1,95 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
-from posts.serializers import PostSerializer
+from core.ratelimit import ratelimit
 
+from .follow_cache import is_following
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
-from .utils import paginator
+from .group_stats import current_activity
+from .identity import get_group_or_404, get_user_or_404
+from .models import Follow, GroupStats, Post, TrendingPost
+from .utils import (
+    get_suggestions, listing_cache_page, paginator, render_listing
+)
+from .writes import write_buffer
 
 User = get_user_model()
 
 
-@cache_page(20)
+@listing_cache_page(20)
 def index(request):
     """View-функция для наполнения главной страницы."""
-    post_list = Post.objects.select_related('group', 'author')
+    post_list = Post.objects.listing().select_related('group', 'author')
     page_obj = paginator(request, post_list)
     context = {'page_obj': page_obj, }
-    return render(request, 'posts/index.html', context)
+    return render_listing(request, 'posts/index.html', context)
+
+
+def popular(request):
+    """Лента "Популярное": посты по предрассчитанному рейтингу."""
+    trending_list = TrendingPost.objects.select_related(
+        'post__author', 'post__group'
+    ).defer('post__text', 'post__rendered_html')
+    page_obj = paginator(request, trending_list)
+    context = {
+        'page_obj': page_obj,
+        'popular': True,
+    }
+    return render_listing(request, 'posts/popular.html', context)
+
+
+def group_index(request):
+    """Каталог сообществ по недавней активности."""
+    stats_list = GroupStats.objects.select_related('group')
+    page_obj = paginator(request, stats_list)
+    for stats in page_obj:
+        stats.recent_activity = current_activity(stats)
+    context = {
+        'page_obj': page_obj,
+        'half_life_hours': settings.GROUP_ACTIVITY_HALF_LIFE_HOURS,
+    }
+    return render(request, 'posts/groups.html', context)
 
 
 def group_posts(request, slug):
     """View-функция для наполнения страницы с записями одного сообщества."""
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('author')
+    group = get_group_or_404(slug)
+    post_list = group.posts.listing().select_related('author')
     page_obj = paginator(request, post_list)
     context = {
         'group': group,
         'page_obj': page_obj,
     }
-    return render(request, 'posts/group_list.html', context)
+    return render_listing(request, 'posts/group_list.html', context)
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.select_related('group')
+    author = get_user_or_404(username)
+    post_list = author.posts.listing().select_related('group')
     page_obj = paginator(request, post_list)
 
     following = (
         request.user.is_authenticated
         and request.user != author
-        and Follow.objects.filter(user=request.user, author=author).exists()
+        and is_following(request.user.id, author.id)
     )
     context = {
         'author': author,
         'page_obj': page_obj,
         'following': following,
+        'suggestions': get_suggestions(request.user),
     }
-    return render(request, 'posts/profile.html', context)
+    return render_listing(request, 'posts/profile.html', context)
 
 
 def post_detail(request, post_id):
     post = get_object_or_404(
         Post.objects.select_related('author', 'group'), pk=post_id
     )
-    comments = post.comments.select_related('author')
+    comments = post.comments.select_related('author').defer('text')
 
     form = CommentForm(request.POST or None)
     context = {
@@ -68,10 +101,12 @@ def post_detail(request, post_id):
 
 
 @login_required
+@ratelimit('post_create', key='user', methods=('POST',))
 def post_create(request):
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
+        user=request.user,
     )
     if not form.is_valid():
         context = {
@@ -79,22 +114,22 @@ def post_create(request):
             'form': form,
         }
         return render(request, 'posts/create_post.html', context)
-    new_post = form.save(commit=False)
-    new_post.author = request.user
-    new_post.save()
+    form.instance.author = request.user
+    new_post = form.save()
     return redirect('posts:profile', new_post.author)
 
 
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
-    if post.author != request.user:
+    if post.author_id != request.user.id:
         return redirect('posts:post_detail', post_id)
 
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
-        instance=post
+        instance=post,
+        user=request.user,
     )
     if form.is_valid():
         form.save()
@@ -108,45 +143,52 @@ def post_edit(request, post_id):
 
 
 @login_required
+@ratelimit('add_comment', key='user', methods=('POST',))
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    if not Post.objects.filter(id=post_id).exists():
+        raise Http404
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
-        comment.post = post
-        comment.save()
+        comment.post_id = post_id
+        write_buffer.add(comment)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user.id)
+    post_list = Post.objects.listing().filter(
+        author_id__in=Follow.objects.filter(
+            user=request.user
+        ).values('author_id')
+    ).select_related('author', 'group')
     page_obj = paginator(request, post_list)
     context = {
         'page_obj': page_obj,
     }
-    return render(request, 'posts/follow.html', context)
+    return render_listing(request, 'posts/follow.html', context)
 
 
 @login_required
+@ratelimit('profile_follow', key='user', methods=('GET', 'POST'))
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    if request.user != author:
-        Follow.objects.get_or_create(
-            user=request.user,
-            author=author,
-        )
+    author_id = get_user_or_404(username).id
+    if request.user.id != author_id:
+        write_buffer.add(Follow(user=request.user, author_id=author_id))
     return redirect('posts:profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
-    Follow.objects.filter(user=request.user, author=author).delete()
+    author_id = get_user_or_404(username).id
+    Follow.objects.filter(user=request.user, author_id=author_id).delete()
     return redirect('posts:profile', username=username)
 
 def get_post(request, post_id):
+    # DRF тянет за собой coreapi и заметно замедляет запуск воркера.
+    from posts.serializers import PostSerializer
+
     if request.method == 'GET':
         post = get_object_or_404(Post, id=post_id)
         serializer = PostSerializer(post)
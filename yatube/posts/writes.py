@@ -0,0 +1,136 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.dispatch import Signal
+
+logger = logging.getLogger(__name__)
+
+# Отправляется после записи пачки: sender - модель, objs - список объектов.
+bulk_written = Signal()
+
+
+class WriteBuffer:
+    """Накопитель записей комментариев и подписок.
+
+    Объекты копятся в памяти процесса и сбрасываются в БД пачками:
+    одна транзакция и один bulk_create(ignore_conflicts=True) на модель.
+    Сброс происходит при sync-записи, при заполнении пачки, по истечении
+    WRITE_BUFFER_MAX_DELAY и перед отдачей ответа (WriteBufferMiddleware).
+
+    Пачки пишутся по одной на процесс: пока одна пишется, новые объекты
+    копятся в следующую, и sync-записи из разных потоков уходят в БД
+    общей пачкой, а не по строке.
+    """
+
+    def __init__(self):
+        self._pending = defaultdict(list)
+        self._size = 0
+        self._first_added = None
+        self._cond = threading.Condition()
+        self._flushing = False
+        # Номер пачки, в которую попадают новые объекты, и последней
+        # записанной.
+        self._batch = 0
+        self._written = -1
+
+    def __len__(self):
+        return self._size
+
+    def idle(self):
+        """Нечего ждать: пусто и никто не пишет."""
+        with self._cond:
+            return not self._size and not self._flushing
+
+    def add(self, obj, sync=None):
+        """Ставит объект в очередь.
+
+        sync=True - объект записан в БД к моменту возврата,
+        sync=False - запись отложена до ближайшего сброса.
+        По умолчанию берётся настройка WRITE_BUFFER_SYNC.
+        """
+        if sync is None:
+            sync = settings.WRITE_BUFFER_SYNC
+        with self._cond:
+            self._pending[type(obj)].append(obj)
+            self._size += 1
+            batch = self._batch
+            if self._first_added is None:
+                self._first_added = time.monotonic()
+            overdue = (
+                time.monotonic() - self._first_added
+                >= settings.WRITE_BUFFER_MAX_DELAY
+            )
+            full = self._size >= settings.WRITE_BUFFER_BATCH_SIZE
+        if sync:
+            self.flush(batch)
+        elif full or overdue:
+            self.flush()
+
+    def flush(self, batch=None):
+        """Записывает накопленное. Возвращает число объектов.
+
+        Если пачку уже пишет другой поток, сначала дожидается её. К
+        возврату записано всё, что добавлено до вызова; с batch - только
+        пачка batch, и если её уже записал другой поток, больше ничего не
+        пишется.
+        """
+        with self._cond:
+            while self._flushing:
+                self._cond.wait()
+            if not self._size or (
+                batch is not None and self._written >= batch
+            ):
+                return 0
+            self._flushing = True
+            pending, self._pending = self._pending, defaultdict(list)
+            self._size = 0
+            self._first_added = None
+            taken = self._batch
+            self._batch += 1
+        try:
+            return self._write(pending)
+        finally:
+            with self._cond:
+                self._written = taken
+                self._flushing = False
+                self._cond.notify_all()
+
+    def _write(self, pending):
+        written = 0
+        for model, objs in pending.items():
+            # bulk_create обходит save(): HTML текста считаем здесь.
+            if hasattr(model, 'render'):
+                for obj in objs:
+                    obj.render()
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create(
+                        objs,
+                        batch_size=settings.WRITE_BUFFER_BATCH_SIZE,
+                        ignore_conflicts=True,
+                    )
+            except IntegrityError:
+                objs = self._save_one_by_one(model, objs)
+            written += len(objs)
+            bulk_written.send(sender=model, objs=objs)
+        return written
+
+    def _save_one_by_one(self, model, objs):
+        """Запасной путь: пачка не прошла целиком (например, пост удалён)."""
+        saved = []
+        for obj in objs:
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create([obj], ignore_conflicts=True)
+            except IntegrityError:
+                logger.warning('Не удалось записать %r', obj)
+            else:
+                saved.append(obj)
+        return saved
+
+
+write_buffer = WriteBuffer()
@@ -1,5 +1,5 @@
 """
-ASGI config for yatube_api project.
+ASGI config for yatube project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
@@ -11,6 +11,15 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube_api.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from posts.sse import SSE_PREFIX, sse_application  # noqa: E402
+
+
+async def application(scope, receive, send):
+    """Потоки новых постов обслуживаются напрямую, остальное - Django."""
+    if scope['type'] == 'http' and scope['path'].startswith(SSE_PREFIX):
+        return await sse_application(scope, receive, send)
+    return await django_application(scope, receive, send)
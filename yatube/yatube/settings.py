@@ -7,7 +7,9 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
 SECRET_KEY = 'hhz7l-ltdismtf@bzyz+rple7*s*w$jak%whj@(@u0eok^f9k4'
 
-DEBUG = True
+# YATUBE_DEBUG=0 - боевой режим: без приложений для разработки и со
+# статикой из collectstatic.
+DEBUG = os.environ.get('YATUBE_DEBUG', '1') == '1'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 
@@ -28,31 +30,41 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'sorl.thumbnail',
-    'debug_toolbar',
     'rest_framework',
     'djoser',
+    'core',
     'posts',
     'api',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.GZipMiddleware',
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'posts.middleware.WriteBufferMiddleware',
 ]
 
+# Приложения только для разработки: в боевом режиме воркер их даже не
+# импортирует (время запуска - manage.py bench_startup).
+if DEBUG:
+    INSTALLED_APPS += ['debug_toolbar']
+    MIDDLEWARE += ['debug_toolbar.middleware.DebugToolbarMiddleware']
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.context.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -63,18 +75,76 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
             ],
+            # Выполняются, только если шаблон обратился к их переменным.
+            'lazy_context_processors': {
+                'django.template.context_processors.debug': [
+                    'debug', 'sql_queries',
+                ],
+                'django.contrib.messages.context_processors.messages': [
+                    'messages', 'DEFAULT_MESSAGE_LEVELS',
+                ],
+            },
         },
     },
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Асинхронные view лент и поста (posts.async_views) для запуска под ASGI.
+# ASYNC_DB_CONCURRENT - выполнять их независимые запросы параллельно.
+POSTS_ASYNC_VIEWS = False
+ASYNC_DB_CONCURRENT = True
+
+# Поток новых постов (posts.sse, только под ASGI). Новые посты
+# выбираются из БД раз в SSE_POLL_SECONDS, не больше SSE_POLL_LIMIT
+# за раз (posts.broadcast.PostPoller).
+POSTS_SSE_ENABLED = False
+SSE_HEARTBEAT_SECONDS = 15
+SSE_RETRY_MS = 5000
+SSE_POLL_SECONDS = 1.0
+SSE_POLL_LIMIT = 1000
+
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'timeout': 5,
+        },
+    }
+}
+
+# Реплики для чтения (core.routers.ReplicaRouter). Локально роль реплики
+# играет второй файл SQLite, который обновляет manage.py sync_replica.
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+DATABASE_REPLICAS = []
+REPLICA_PIN_SECONDS = 5
+REPLICA_PIN_COOKIE = 'pin_primary'
+
+if os.environ.get('YATUBE_SQLITE_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db_replica.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'timeout': 5,
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
     }
+    DATABASE_REPLICAS = ['replica']
+
+# Выставляются на каждом новом соединении (core.db.configure_sqlite).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
 }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -103,9 +173,64 @@ USE_L10N = True
 USE_TZ = True
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# Без DEBUG статика собирается collectstatic с хэшем в именах и сжатыми
+# копиями .gz/.br (core.staticfiles).
+if not DEBUG:
+    STATICFILES_STORAGE = (
+        'core.staticfiles.CompressedManifestStaticFilesStorage'
+    )
+
+# Отдача статики и медиа (core.serving). SENDFILE_HEADER - заголовок,
+# по которому файл отдаёт веб-сервер: 'X-Accel-Redirect' (nginx, адреса
+# internal-локаций в SENDFILE_URLS) или 'X-Sendfile'; None - отдаёт
+# процесс. Срок кэша в секундах для файлов без хэша в имени.
+SENDFILE_HEADER = None
+SENDFILE_URLS = {
+    'static': '/protected/static/',
+    'media': '/protected/media/',
+}
+STATIC_CACHE_MAX_AGE = 60 * 60
+MEDIA_CACHE_MAX_AGE = 24 * 60 * 60
 
 NUMBER_OF_POSTS_ON_ONE_PAGE = 10
 
+# Ленты отдаются потоком (core.streaming): шапка страницы уходит клиенту
+# до запроса постов. Потоковые ответы cache_page не кэширует.
+STREAM_LISTINGS = False
+
+# Сжатие ответов (core.middleware.GZipMiddleware): уровень zlib и
+# минимальный размер обычного ответа в байтах.
+GZIP_LEVEL = 6
+GZIP_MIN_LENGTH = 200
+
+# Выборочное профилирование запросов (core.profiling): доля запросов
+# от 0 до 1, каталог .prof-файлов и срок жизни токена X-Profile в секундах.
+PROFILE_SAMPLE_RATE = 0
+PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILE_TOKEN_MAX_AGE = 24 * 60 * 60
+
+# Время context processors (core.context) в заголовке Server-Timing.
+SERVER_TIMING = DEBUG
+
+# Размер пачки массовых операций (core.bulk, действия админки).
+BULK_CHUNK_SIZE = 1000
+
+# С какого числа строк админка показывает оценку вместо COUNT(*)
+# (core.paginator.EstimatedCountPaginator).
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+# Длина анонса поста в лентах, в символах (posts.rendering).
+POST_PREVIEW_CHARS = 300
+
+# Накопитель записей комментариев и подписок (posts.writes).
+# WRITE_BUFFER_SYNC = False - запись в БД откладывается до отдачи ответа
+# (posts.middleware.WriteBufferMiddleware) или до заполнения пачки.
+WRITE_BUFFER_SYNC = True
+WRITE_BUFFER_BATCH_SIZE = 100
+WRITE_BUFFER_MAX_DELAY = 1.0
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
@@ -117,11 +242,78 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Докачиваемые загрузки картинок (posts.uploads): временные файлы (вне
+# MEDIA_ROOT, но на том же диске - готовый файл переносится без копии),
+# предельный размер файла и куска в байтах, срок жизни сессии в секундах.
+UPLOAD_TEMP_DIR = os.path.join(BASE_DIR, 'upload_tmp')
+UPLOAD_MAX_SIZE = 20 * 1024 * 1024
+UPLOAD_CHUNK_MAX_SIZE = 4 * 1024 * 1024
+UPLOAD_SESSION_TTL = 24 * 60 * 60
+
+# Файлы без ссылок (core.storage), сохранённые позже этого срока, в
+# секундах, gc_blobs не трогает: загрузка может ещё не быть прикреплена
+# к посту.
+BLOB_GC_GRACE = UPLOAD_SESSION_TTL
+# Поля, кроме FileField хранилища, где лежат имена файлов: gc_blobs
+# считает их ссылками.
+BLOB_REFERENCE_FIELDS = ['posts.UploadSession.stored_name']
+
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+
+# Фоновые задачи (core.tasks), исполнитель - manage.py run_worker.
+# TASKS_ALWAYS_EAGER = True - выполнять задачи сразу, без очереди.
+TASKS_ALWAYS_EAGER = False
+TASKS_CONCURRENCY = 4
+TASKS_POLL_INTERVAL = 1.0
+TASKS_DEFAULT_TIMEOUT = 60
+TASKS_RETRY_DELAY = 5
+
+# Кэш подписок (posts.follow_cache): алиас из CACHES, общего для всех
+# процессов (Memcached, Redis), и срок жизни записи в секундах. None -
+# подписки читаются из БД: LocMemCache у каждого процесса свой.
+FOLLOW_CACHE = None
+FOLLOW_CACHE_TIMEOUT = 60 * 60
+
+# Сжатие длинных текстов постов и комментариев (core.fields), в байтах.
+# None - хранить как есть; перепаковать старые строки - compress_texts.
+COMPRESSED_TEXT_THRESHOLD = 1024
+COMPRESSED_TEXT_LEVEL = 6
+
+# Кэш сообществ по slug и пользователей по username (posts.identity):
+# записей на процесс и срок жизни в секундах.
+IDENTITY_CACHE_SIZE = 1024
+IDENTITY_CACHE_TTL = 60
+
+# Сколько рекомендаций "кого почитать" показывать в профиле и API.
+FOLLOW_SUGGESTIONS_LIMIT = 5
+
+# Рейтинг "Популярное" (posts.trending), пересчёт - manage.py update_trending.
+TRENDING_WINDOW_DAYS = 7
+TRENDING_HALF_LIFE_HOURS = 12
+TRENDING_COMMENT_WEIGHT = 1.0
+TRENDING_FOLLOWER_WEIGHT = 0.1
+
+# Каталог сообществ: период полураспада активности группы.
+GROUP_ACTIVITY_HALF_LIFE_HOURS = 24 * 7
+
+# Корзины токенов: 'N/период' (s, m, h, d). None - без ограничения.
+RATELIMIT_CACHE = 'default'
+RATELIMIT_TRUST_FORWARDED = False
+RATELIMIT_RATES = {
+    'post_create': '10/m',
+    'add_comment': '30/m',
+    'profile_follow': '60/m',
+    'api_anon': '120/m',
+    'api_user': '600/m',
+    'api_posts_write': '10/m',
+    'api_comments_write': '30/m',
+    'api_follow_write': '60/m',
+}
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
@@ -134,6 +326,12 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
+
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.AnonTokenBucketThrottle',
+        'api.throttling.UserTokenBucketThrottle',
+        'api.throttling.ScopedTokenBucketThrottle',
+    ],
 }
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),